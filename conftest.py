@@ -0,0 +1,34 @@
+# Keep the test suite away from the real ~/.python_terminal: the command
+# history, the AI rate limiter and the file index go to a throwaway
+# directory. The variables are set as soon as pytest loads this file,
+# before the test modules import terminal.* (ai_parser opens its rate
+# limiter at import time).
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+STATE_DIR = tempfile.mkdtemp(prefix='python-terminal-tests-')
+STATE_PATHS = {
+    'TERMINAL_HISTORY_PATH': os.path.join(STATE_DIR, 'history'),
+    'TERMINAL_RATE_LIMIT_PATH': os.path.join(STATE_DIR, 'rate_limit.db'),
+    'TERMINAL_INDEX_PATH': os.path.join(STATE_DIR, 'file_index.db'),
+}
+os.environ.update(STATE_PATHS)
+
+
+@pytest.fixture(autouse=True)
+def terminal_state_paths():
+    """Point every test at the throwaway state files, even if an earlier test moved them"""
+    os.environ.update(STATE_PATHS)
+    yield STATE_PATHS
+
+
+def pytest_unconfigure(config):
+    # Flush the history writer now rather than at exit, after the cleanup
+    history = sys.modules.get('terminal.history')
+    if history is not None and history._writer is not None:
+        history._writer.close()
+    shutil.rmtree(STATE_DIR, ignore_errors=True)
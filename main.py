@@ -1,5 +1,8 @@
 import argparse
-from terminal.shell import Shell
+from terminal.shell import Shell, split_command_chain
+from terminal.session import Session, SessionManager
+# Legacy color codes are stripped from everything sent to the browser
+from terminal.render import sanitize, sanitize_stream
 
 
 def main():
@@ -7,15 +10,25 @@ def main():
     parser.add_argument(
         '--mode', choices=['cli', 'web'], default='cli', help='Interface mode: cli or web'
     )
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help='Report the import-time breakdown of starting the selected mode and exit'
+    )
     args = parser.parse_args()
 
-    shell = Shell()
+    if args.profile_startup:
+        from utils.startup_profile import profile_startup
+        print(profile_startup(args.mode))
+        return
+
     if args.mode == 'cli':
-        shell.run()
+        from terminal.system_monitor import warm_host_facts
+        warm_host_facts()
+        Shell().run()
     else:
         try:
             import os
-            from flask import Flask, request, jsonify, render_template
+            from flask import Flask, Response, request, jsonify, render_template, stream_with_context
         except ImportError:
             print("Flask is not installed. Please install Flask or use CLI mode.")
             return
@@ -27,6 +40,30 @@ def main():
             static_folder=os.path.join(base_dir, 'static')
         )
 
+        # Warm up the metrics sampler so cpu/mem answer from memory, and
+        # gather the static host facts sysinfo reports
+        from terminal.system_monitor import sampler, warm_host_facts
+        sampler.start()
+        warm_host_facts()
+
+        # Start the python/run workers now so the first script starts instantly
+        from terminal.script_pool import get_script_pool, pool_supported
+        if pool_supported():
+            get_script_pool().start()
+
+        # One shell (cwd, history, environment) per browser session; the
+        # jobs of a session stop when it expires
+        from terminal.jobs import job_manager
+        start_dir = os.getcwd()
+        shells = SessionManager(lambda session_id: Shell(Session(cwd=start_dir, session_id=session_id, mode='web')),
+                                on_expire=job_manager.cancel_session)
+
+        def get_shell():
+            return shells.get(request.headers.get('X-Session-Id'))
+
+        # Upper bound on commands accepted by one /execute/batch request
+        batch_limit = int(os.environ.get('TERMINAL_BATCH_LIMIT', 50))
+
         @app.route('/')
         def index():
             return render_template('index.html')
@@ -35,38 +72,145 @@ def main():
         def execute():
             data = request.get_json() or {}
             command = data.get('command', '')
+            shell = get_shell()
             
-            # Set a flag to indicate we're in web mode
-            import os
-            os.environ['TERMINAL_MODE'] = 'web'
+            if data.get('format') == 'json':
+                # Structured results (tables, trees, key/values) as data
+                from terminal.render import is_result, to_json
+                try:
+                    result = shell.run_structured(command)
+                except Exception as e:
+                    return jsonify({'error': str(e), 'cwd': shell.session.cwd}), 400
+                if is_result(result):
+                    return jsonify({'result': to_json(result), 'cwd': shell.session.cwd})
+                return jsonify({'output': sanitize(result), 'cwd': shell.session.cwd})
             
             output = shell.run_command(command)
-            
-            # Clean up ANSI escape codes for web display
-            import re
-            # Remove ANSI escape sequences
-            ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-            clean_output = ansi_escape.sub('', output)
-            
-            cwd = os.getcwd()
-            return jsonify({'output': clean_output, 'cwd': cwd})
+            return jsonify({'output': sanitize(output), 'cwd': shell.session.cwd})
+
+        @app.route('/execute/batch', methods=['POST'])
+        def execute_batch():
+            """Run an ordered list of commands (or a ;/&& chained line) in one request"""
+            data = request.get_json() or {}
+            commands = data.get('commands')
+            if isinstance(commands, list):
+                chain = [(str(command), ';') for command in commands if str(command).strip()]
+            else:
+                chain = split_command_chain(data.get('line') or commands or '')
+            if len(chain) > batch_limit:
+                return jsonify({'error': f'too many commands (max {batch_limit})'}), 400
+
+            shell = get_shell()
+            results = shell.run_batch(chain, stop_on_error=bool(data.get('stop_on_error')))
+            for result in results:
+                result['output'] = sanitize(result['output'])
+            return jsonify({'results': results, 'cwd': shell.session.cwd})
+
+        @app.route('/execute/stream', methods=['POST'])
+        def execute_stream():
+            data = request.get_json() or {}
+            command = data.get('command', '')
+            shell = get_shell()
+
+            def generate():
+                # Chunks can end mid escape sequence (cat yields 64 KiB blocks)
+                yield from sanitize_stream(shell.stream_command(command))
+
+            response = Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+            return response
+
+        @app.route('/jobs', methods=['GET', 'POST'])
+        def jobs():
+            """List this session's jobs, or start a command as a background job"""
+            from terminal.jobs import job_manager
+            shell = get_shell()
+            if request.method == 'GET':
+                return jsonify({'jobs': [job.to_dict() for job in job_manager.list(shell.session.id)]})
+            data = request.get_json() or {}
+            try:
+                job = shell.start_job(data.get('command', ''))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(job.to_dict()), 202
+
+        def find_job(job_id):
+            from terminal.jobs import job_manager
+            job = job_manager.get(job_id)
+            if job is None or job.session_id != get_shell().session.id:
+                return None
+            return job
+
+        @app.route('/jobs/<job_id>', methods=['GET'])
+        def job_output(job_id):
+            """Poll a job: its state plus any output after ``offset``"""
+            job = find_job(job_id)
+            if job is None:
+                return jsonify({'error': 'no such job'}), 404
+            wait = min(float(request.args.get('wait', 0)), 30)
+            offset = int(request.args.get('offset', 0))
+            if wait:
+                # Long poll: return as soon as there is something new
+                job.wait(offset, wait)
+            output, offset = job.read(offset)
+            return jsonify({**job.to_dict(), 'output': sanitize(output), 'offset': offset})
+
+        @app.route('/jobs/<job_id>/stream', methods=['GET'])
+        def job_stream(job_id):
+            """Reattach to a job and stream its output from ``offset`` until it ends"""
+            job = find_job(job_id)
+            if job is None:
+                return jsonify({'error': 'no such job'}), 404
+            offset = int(request.args.get('offset', 0))
+
+            def generate():
+                yield from sanitize_stream(job.follow(offset))
+
+            response = Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+
+        @app.route('/jobs/<job_id>/cancel', methods=['POST'])
+        def cancel_job(job_id):
+            job = find_job(job_id)
+            if job is None:
+                return jsonify({'error': 'no such job'}), 404
+            job.cancel()
+            return jsonify(job.to_dict())
 
         @app.route('/cwd', methods=['GET'])
         def get_cwd():
-            return jsonify({'cwd': os.getcwd()})
+            return jsonify({'cwd': get_shell().session.cwd})
         
         @app.route('/rate-limit', methods=['GET'])
         def get_rate_limit():
             from terminal.ai_parser import get_rate_limit_status
             return jsonify(get_rate_limit_status())
         
+        @app.route('/events', methods=['GET'])
+        def events():
+            """Server-Sent Events: rate-limit and metrics snapshots pushed to every tab"""
+            from terminal.events import event_hub
+            subscription = event_hub.subscribe()
+            response = Response(stream_with_context(event_hub.stream(subscription)), mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
+
+        @app.route('/ai-stats', methods=['GET'])
+        def get_ai_stats():
+            from terminal.ai_parser import get_ai_stats
+            return jsonify(get_ai_stats())
+        
         # Production configuration for hosting platforms like Render
         port = int(os.environ.get('PORT', 5000))
         host = '0.0.0.0'  # Bind to all interfaces for external access
         debug_mode = os.environ.get('FLASK_ENV') != 'production'
         
         print(f"Starting Flask app on {host}:{port}")
-        app.run(host=host, port=port, debug=debug_mode)
+        app.run(host=host, port=port, debug=debug_mode, threaded=True)
 
 
 if __name__ == '__main__':
@@ -2,6 +2,49 @@ let currentPath = '';
 let commandHistory = [];
 let historyIndex = -1;
 let commandCount = 0;
+let activeJobId = null;
+
+// Each browser tab gets its own server-side shell session (cwd, history)
+const sessionId = sessionStorage.getItem('terminalSessionId') ||
+    (window.crypto && crypto.randomUUID ? crypto.randomUUID() : String(Date.now()) + Math.random().toString(16).slice(2));
+sessionStorage.setItem('terminalSessionId', sessionId);
+
+// Shell operators that appear outside quotes: | > < ; && and &
+// (>> and << show up as > and <; a backslash escapes the next character)
+function shellOperators(line) {
+    const found = new Set();
+    let quote = null;
+    for (let i = 0; i < line.length; i++) {
+        const ch = line[i];
+        if (ch === '\\') {
+            i++;
+        } else if (quote) {
+            if (ch === quote) quote = null;
+        } else if (ch === '"' || ch === "'") {
+            quote = ch;
+        } else if (ch === '&' && line[i + 1] === '&') {
+            found.add('&&');
+            i++;
+        } else if ('|><;&'.includes(ch)) {
+            found.add(ch);
+        }
+    }
+    return found;
+}
+
+// Which endpoint a command line goes to: 'batch', 'listing', 'job' or 'stream'
+function routeCommand(command) {
+    const line = command.trim();
+    const operators = shellOperators(line);
+    // Chained lines (a; b && c) run in one batch request
+    if (operators.has(';') || operators.has('&&')) return 'batch';
+    // Plain directory listings come back as JSON pages rendered incrementally;
+    // pipes, redirects and a trailing & (background job) need the text path
+    if (/^ls(\s|$)/.test(line) && !/--json/.test(line) && operators.size === 0) return 'listing';
+    // Scripts and watch run as server-side jobs: Ctrl+C cancels, a reload reattaches
+    if (/^(python|run|watch)\s/.test(line) && !/&\s*$/.test(line)) return 'job';
+    return 'stream';
+}
 
 document.addEventListener('DOMContentLoaded', function() {
     const input = document.getElementById('command-input');
@@ -16,9 +59,9 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize
     updateCurrentPath();
     updateTime();
-    updateRateLimit();
+    reattachJobs();
+    connectEvents();
     setInterval(updateTime, 1000);
-    setInterval(updateRateLimit, 3000); // Update rate limit every 3 seconds
 
     // Input focus and event handling
     input.focus();
@@ -32,7 +75,9 @@ document.addEventListener('DOMContentLoaded', function() {
 
     // Command input handling
     input.addEventListener('keydown', function(e) {
-        if (e.key === 'Enter') {
+        if (e.key === 'c' && e.ctrlKey && !window.getSelection().toString()) {
+            if (cancelActiveJob()) e.preventDefault();
+        } else if (e.key === 'Enter') {
             e.preventDefault();
             const command = input.value.trim();
             if (command) {
@@ -112,38 +157,235 @@ document.addEventListener('DOMContentLoaded', function() {
         if (container) container.classList.add('executing');
         if (statusElement) statusElement.textContent = 'Executing...';
 
-        // Send command to server
-        fetch('/execute', {
+        // Handle clear command locally
+        if (command.trim() === 'clear') {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Ready';
+            clearTerminal();
+            return;
+        }
+
+        const route = routeCommand(command);
+        if (route === 'batch') {
+            executeBatch(command, container);
+            return;
+        }
+        if (route === 'listing') {
+            executeListing(command, 0, container);
+            return;
+        }
+        if (route === 'job') {
+            executeJob(command, container);
+            return;
+        }
+
+        // Output block filled in as chunks arrive from the server
+        const outputElement = document.createElement('div');
+        outputElement.className = 'command-output';
+        let outputText = '';
+
+        function finish() {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Ready';
+
+            if (!outputText.trim()) {
+                outputElement.remove();
+            } else {
+                const outputClass = outputText.includes('Error:') || outputText.includes('❌') ? 'error-output' :
+                                  outputText.includes('✅') || outputText.includes('SUCCESS') ? 'success-output' :
+                                  outputText.includes('INFO') || outputText.includes('🔥') ? 'info-output' : '';
+                if (outputClass) outputElement.classList.add(outputClass);
+            }
+
+            // Update path if directory changed
+            updateCurrentPath();
+            
+            // Scroll to bottom
+            output.scrollTop = output.scrollHeight;
+        }
+
+        function appendChunk(text) {
+            if (!text) return;
+            if (!outputElement.parentNode) output.appendChild(outputElement);
+            outputText += text;
+            // Append a text node instead of re-rendering the whole block
+            outputElement.appendChild(document.createTextNode(text));
+            output.scrollTop = output.scrollHeight;
+        }
+
+        // Send command to server and render the response as it streams in
+        fetch('/execute/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
+                'X-Session-Id': sessionId,
             },
             body: JSON.stringify({ command: command })
         })
+        .then(response => readStream(response, appendChunk))
+        .then(finish)
+        .catch(error => {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Error';
+            addToOutput(`<div class="command-output error-output">Network error: ${error.message}</div>`);
+        });
+    }
+
+    // Feed a streamed fetch response to onChunk as text arrives
+    function readStream(response, onChunk) {
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        if (!response.body || !window.TextDecoder) {
+            return response.text().then(onChunk);
+        }
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        function pump() {
+            return reader.read().then(({ done, value }) => {
+                if (done) {
+                    onChunk(decoder.decode());
+                    return;
+                }
+                onChunk(decoder.decode(value, { stream: true }));
+                return pump();
+            });
+        }
+        return pump();
+    }
+
+    function executeJob(command, container) {
+        fetch('/jobs', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Session-Id': sessionId,
+            },
+            body: JSON.stringify({ command: command })
+        })
+        .then(response => response.json())
+        .then(job => {
+            if (job.error) throw new Error(job.error);
+            return followJob(job, container);
+        })
+        .catch(error => {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Error';
+            addToOutput(`<div class="command-output error-output">${escapeHtml(error.message)}</div>`);
+        });
+    }
+
+    function followJob(job, container) {
+        const outputElement = document.createElement('div');
+        outputElement.className = 'command-output';
+        activeJobId = job.id;
+        if (statusElement) statusElement.textContent = `Running job ${job.id} (Ctrl+C to cancel)`;
+
+        return fetch(`/jobs/${job.id}/stream`, { headers: { 'X-Session-Id': sessionId } })
+        .then(response => readStream(response, text => {
+            if (!text) return;
+            if (!outputElement.parentNode) output.appendChild(outputElement);
+            outputElement.appendChild(document.createTextNode(text));
+            output.scrollTop = output.scrollHeight;
+        }))
+        .then(() => fetch(`/jobs/${job.id}`, { headers: { 'X-Session-Id': sessionId } }))
+        .then(response => response.json())
+        .then(state => {
+            if (activeJobId === job.id) activeJobId = null;
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Ready';
+            if (state.status === 'cancelled') {
+                const reason = state.reason && state.reason !== 'cancelled' ? ` (${state.reason})` : '';
+                addToOutput(`<div class="command-output error-output">^C job ${job.id} cancelled${escapeHtml(reason)}</div>`);
+            } else if (state.status === 'failed' || /Error:/.test(outputElement.textContent)) {
+                outputElement.classList.add('error-output');
+            }
+            output.scrollTop = output.scrollHeight;
+        });
+    }
+
+    function cancelActiveJob() {
+        if (!activeJobId) return false;
+        fetch(`/jobs/${activeJobId}/cancel`, { method: 'POST', headers: { 'X-Session-Id': sessionId } });
+        return true;
+    }
+
+    // Pick up scripts still running from before a page reload
+    function reattachJobs() {
+        fetch('/jobs', { headers: { 'X-Session-Id': sessionId } })
+        .then(response => response.json())
+        .then(data => {
+            (data.jobs || []).filter(job => job.status === 'running' || job.status === 'queued').forEach(job => {
+                addToOutput(`<div class="command-output info-output">» reattached to job ${job.id}: ${escapeHtml(job.command)}</div>`);
+                followJob(job, null);
+            });
+        })
+        .catch(() => {});
+    }
+
+    function executeListing(command, offset, container) {
+        const longFormat = /(^|\s)-[a-zA-Z]*l/.test(command);
+        const pageCommand = offset ? `${command} --offset ${offset}` : command;
+
+        fetch('/execute', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Session-Id': sessionId,
+            },
+            body: JSON.stringify({ command: `${pageCommand} --json` })
+        })
         .then(response => response.json())
         .then(data => {
-            // Remove loading state
             if (container) container.classList.remove('executing');
             if (statusElement) statusElement.textContent = 'Ready';
 
-            // Handle clear command
-            if (command.trim() === 'clear') {
-                clearTerminal();
+            let listing;
+            try {
+                listing = JSON.parse(data.output);
+            } catch (e) {
+                // Errors are plain text rather than a JSON listing
+                addToOutput(`<div class="command-output error-output">${escapeHtml(data.output || '')}</div>`);
                 return;
             }
+            renderListing(command, listing, longFormat, container);
+            updateCurrentPath();
+        })
+        .catch(error => {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Error';
+            addToOutput(`<div class="command-output error-output">Network error: ${error.message}</div>`);
+        });
+    }
 
-            // Add output
-            if (data.output) {
-                const outputClass = data.output.includes('Error:') || data.output.includes('❌') ? 'error-output' :
-                                  data.output.includes('✅') || data.output.includes('SUCCESS') ? 'success-output' :
-                                  data.output.includes('INFO') || data.output.includes('🔥') ? 'info-output' : '';
-                addToOutput(`<div class="command-output ${outputClass}">${escapeHtml(data.output)}</div>`);
+    function executeBatch(line, container) {
+        fetch('/execute/batch', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-Session-Id': sessionId,
+            },
+            body: JSON.stringify({ line: line })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (container) container.classList.remove('executing');
+            if (statusElement) statusElement.textContent = 'Ready';
+            if (data.error) {
+                addToOutput(`<div class="command-output error-output">${escapeHtml(data.error)}</div>`);
+                return;
             }
-
-            // Update path if directory changed
+            const results = data.results || [];
+            results.forEach(result => {
+                // Only label each block when the line really held several commands
+                if (results.length > 1) {
+                    addToOutput(`<div class="command-output info-output">» ${escapeHtml(result.command)} ` +
+                                `(${result.status}, ${result.duration_ms.toFixed(1)} ms)</div>`);
+                }
+                if (result.output) {
+                    const outputClass = result.status === 'error' ? ' error-output' : '';
+                    addToOutput(`<div class="command-output${outputClass}">${escapeHtml(result.output)}</div>`);
+                }
+            });
             updateCurrentPath();
-            
-            // Scroll to bottom
             output.scrollTop = output.scrollHeight;
         })
         .catch(error => {
@@ -153,6 +395,60 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function renderListing(command, listing, longFormat, container) {
+        const element = document.createElement('div');
+        element.className = 'command-output';
+        output.appendChild(element);
+
+        const lines = listing.entries.map(entry => {
+            if (!longFormat) {
+                return entry.is_dir ? `[DIR]  ${entry.name}/` : `[FILE] ${entry.name}`;
+            }
+            const modified = entry.mtime ? new Date(entry.mtime * 1000).toLocaleString() : 'Unknown';
+            const ext = entry.name.includes('.') ? entry.name.split('.').pop().toUpperCase() : 'FILE';
+            const type = entry.is_dir ? '[DIR]' : `[${ext}]`;
+            const size = entry.is_dir ? '-' : formatSize(entry.size);
+            return `${type.padEnd(8)} ${entry.name.padEnd(25)} ${size.padEnd(12)} ${modified}`;
+        });
+        if (longFormat && listing.offset === 0) {
+            lines.unshift(`Directory: ${listing.path}`, '', `${'Type'.padEnd(8)} ${'Name'.padEnd(25)} ${'Size'.padEnd(12)} Modified`, '='.repeat(65));
+        }
+
+        // Append a batch of rows per animation frame to keep the page responsive
+        const batchSize = 200;
+        let index = 0;
+        function renderBatch() {
+            const batch = lines.slice(index, index + batchSize);
+            index += batch.length;
+            element.appendChild(document.createTextNode(batch.join('\n') + (index < lines.length ? '\n' : '')));
+            output.scrollTop = output.scrollHeight;
+            if (index < lines.length) {
+                requestAnimationFrame(renderBatch);
+            } else if (listing.remaining > 0) {
+                const next = listing.offset + listing.entries.length;
+                const more = document.createElement('button');
+                more.className = 'action-btn load-more';
+                more.textContent = `Load more (${listing.remaining} remaining)`;
+                more.addEventListener('click', () => {
+                    more.remove();
+                    executeListing(command, next, container);
+                });
+                output.appendChild(more);
+            }
+        }
+        renderBatch();
+    }
+
+    function formatSize(size) {
+        if (size === null || size === undefined) return 'Unknown';
+        const units = ['B', 'KB', 'MB', 'GB'];
+        for (const unit of units) {
+            if (size < 1024) return `${size.toFixed(1)}${unit}`;
+            size /= 1024;
+        }
+        return `${size.toFixed(1)}TB`;
+    }
+
     function addToOutput(html) {
         output.insertAdjacentHTML('beforeend', html);
         output.scrollTop = output.scrollHeight;
@@ -176,7 +472,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     function updateCurrentPath() {
-        fetch('/cwd')
+        fetch('/cwd', { headers: { 'X-Session-Id': sessionId } })
         .then(response => response.json())
         .then(data => {
             currentPath = data.cwd;
@@ -200,46 +496,38 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Rate-limit and metrics snapshots are pushed by the server (/events)
+    // to every tab; browsers without EventSource fall back to polling
+    function connectEvents() {
+        if (!window.EventSource) {
+            updateRateLimit();
+            setInterval(updateRateLimit, 3000);
+            return;
+        }
+        const events = new EventSource('/events');
+        events.addEventListener('status', event => {
+            const data = JSON.parse(event.data);
+            renderRateLimit(data.rate_limit);
+            renderMetrics(data.metrics);
+        });
+        events.onerror = () => {
+            // EventSource reconnects by itself; dim the display meanwhile
+            const display = document.getElementById('rate-limit-display');
+            if (display) display.style.opacity = '0.5';
+        };
+    }
+
+    function renderMetrics(metrics) {
+        const element = document.getElementById('metrics');
+        if (element && metrics) {
+            element.textContent = `CPU ${metrics.cpu.toFixed(0)}% · Mem ${metrics.mem_percent.toFixed(0)}%`;
+        }
+    }
+
     function updateRateLimit() {
         fetch('/rate-limit')
         .then(response => response.json())
-        .then(data => {
-            const display = document.getElementById('rate-limit-display');
-            const icon = document.getElementById('rate-limit-icon');
-            const text = document.getElementById('rate-limit-text');
-            const bar = document.getElementById('rate-limit-bar');
-            
-            if (!display || !icon || !text || !bar) return;
-            
-            const { remaining, max_requests, reset_in } = data;
-            const usedPercentage = ((max_requests - remaining) / max_requests) * 100;
-            
-            // Update text
-            text.textContent = `${remaining}/${max_requests} API calls (${Math.ceil(reset_in)}s)`;
-            
-            // Update progress bar
-            bar.style.width = `${100 - usedPercentage}%`;
-            
-            // Update status indicators based on remaining requests
-            icon.className = 'rate-limit-icon';
-            bar.className = 'rate-limit-bar';
-            
-            if (remaining === 0) {
-                icon.classList.add('error');
-                bar.classList.add('critical');
-                icon.textContent = '🚫';
-            } else if (remaining <= 2) {
-                icon.classList.add('warning');
-                bar.classList.add('critical');
-                icon.textContent = '⚠️';
-            } else if (remaining <= 5) {
-                icon.classList.add('warning');
-                bar.classList.add('warning');
-                icon.textContent = '⚡';
-            } else {
-                icon.textContent = '✅';
-            }
-        })
+        .then(renderRateLimit)
         .catch(error => {
             console.warn('Failed to update rate limit:', error);
             const display = document.getElementById('rate-limit-display');
@@ -249,6 +537,48 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    function renderRateLimit(data) {
+        const display = document.getElementById('rate-limit-display');
+        const icon = document.getElementById('rate-limit-icon');
+        const text = document.getElementById('rate-limit-text');
+        const bar = document.getElementById('rate-limit-bar');
+        
+        if (!display || !icon || !text || !bar) return;
+        display.style.opacity = '';
+        
+        // Global (all workers) token-bucket state
+        const remaining = data.requests_remaining;
+        const { max_requests, queued } = data;
+        const usedPercentage = ((max_requests - remaining) / max_requests) * 100;
+        
+        // Update text
+        const waiting = queued ? `, ${queued} queued` : '';
+        text.textContent = `${remaining}/${max_requests} API calls (${Math.ceil(data.time_until_reset)}s${waiting})`;
+        
+        // Update progress bar
+        bar.style.width = `${100 - usedPercentage}%`;
+        
+        // Update status indicators based on remaining requests
+        icon.className = 'rate-limit-icon';
+        bar.className = 'rate-limit-bar';
+        
+        if (remaining === 0) {
+            icon.classList.add('error');
+            bar.classList.add('critical');
+            icon.textContent = '🚫';
+        } else if (remaining <= 2) {
+            icon.classList.add('warning');
+            bar.classList.add('critical');
+            icon.textContent = '⚠️';
+        } else if (remaining <= 5) {
+            icon.classList.add('warning');
+            bar.classList.add('warning');
+            icon.textContent = '⚡';
+        } else {
+            icon.textContent = '✅';
+        }
+    }
+
     function escapeHtml(text) {
         const div = document.createElement('div');
         div.textContent = text;
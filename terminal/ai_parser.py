@@ -1,390 +1,416 @@
+import asyncio
+import functools
+import json
 import os
+import re
+import threading
 import time
-from collections import deque
-from dotenv import load_dotenv
-import google.generativeai as genai
-
-load_dotenv()
-
-# Rate limiting for Gemini API (12 requests per minute)
-class APIRateLimiter:
-    def __init__(self, max_requests=12, time_window=60):
-        self.max_requests = max_requests
-        self.time_window = time_window
-        self.request_times = deque()
-    
-    def can_make_request(self):
-        """Check if we can make a request without exceeding rate limit"""
-        current_time = time.time()
-        
-        # Remove requests older than the time window
-        while self.request_times and current_time - self.request_times[0] > self.time_window:
-            self.request_times.popleft()
-        
-        # Check if we're under the limit
-        return len(self.request_times) < self.max_requests
-    
-    def record_request(self):
-        """Record that we made a request"""
-        self.request_times.append(time.time())
-    
-    def get_status(self):
-        """Get current rate limit status"""
-        current_time = time.time()
-        
-        # Clean old requests
-        while self.request_times and current_time - self.request_times[0] > self.time_window:
-            self.request_times.popleft()
-        
-        requests_made = len(self.request_times)
-        requests_remaining = self.max_requests - requests_made
-        
-        # Calculate time until next request if at limit
-        time_until_reset = 0
-        if requests_made >= self.max_requests and self.request_times:
-            oldest_request = self.request_times[0]
-            time_until_reset = max(0, self.time_window - (current_time - oldest_request))
-        
-        return {
-            'requests_made': requests_made,
-            'requests_remaining': requests_remaining,
-            'max_requests': self.max_requests,
-            'time_window': self.time_window,
-            'can_make_request': self.can_make_request(),
-            'time_until_reset': time_until_reset
-        }
+from collections import OrderedDict
+
+from . import aio
+from .nl_rules import engine
+from .rate_limit import TokenBucketLimiter
+
+# python-dotenv and google.generativeai are slow to import, so they are
+# loaded on the first natural-language request rather than at startup
+_env_loaded = False
 
-# Global rate limiter instance
-rate_limiter = APIRateLimiter()
+
+def load_env():
+    """Load .env once, on first use"""
+    global _env_loaded
+    if not _env_loaded:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        _env_loaded = True
+
+# Rate limiting for Gemini API (12 requests per minute), shared by every
+# worker process; requests over the limit wait briefly instead of failing
+rate_limiter = TokenBucketLimiter(
+    max_requests=int(os.environ.get('TERMINAL_AI_RATE', 12)),
+    time_window=60,
+    burst=int(os.environ.get('TERMINAL_AI_BURST', 0)) or None,
+    max_queue=int(os.environ.get('TERMINAL_AI_QUEUE', 12)),
+    max_wait=float(os.environ.get('TERMINAL_AI_MAX_WAIT', 10)),
+)
 
 def get_rate_limit_status():
-    """Get current rate limit status for API endpoint"""
+    """Get the global (cross-process) rate limit status for API endpoint"""
     return rate_limiter.get_status()
 
-def parse_nl(text):
-    """
-    Parse natural language text into shell commands using Google Gemini API.
-    Falls back to pattern matching if API fails.
-    Returns list of command strings that can be executed sequentially.
-    """
-    
-    # Enhanced fallback patterns for common multi-step operations
-    low = text.lower().strip()
-    
-    # Handle "create a new file X and move it into Y" pattern
-    if ('create' in low or 'make' in low) and 'file' in low and 'move' in low and 'into' in low:
-        words = text.split()
-        low_words = low.split()
-        commands = []
-        
-        # Find file name - look for word after "file"
-        file_name = None
-        if 'file' in low_words:
-            file_idx = low_words.index('file')
-            # Check if there's a name after "file" and before "and"
-            for i in range(file_idx + 1, len(words)):
-                if low_words[i] == 'and':
-                    break
-                if not low_words[i] in ['a', 'new', 'called', 'named']:
-                    file_name = words[i]
-                    break
-        
-        # Find destination folder - look for word after "into"
-        dest_folder = None
-        if 'into' in low_words:
-            into_idx = low_words.index('into')
-            if into_idx + 1 < len(words):
-                # Handle "into static folder" or "into static"
-                dest_folder = words[into_idx + 1]
-                # Remove "folder" if it's there
-                if dest_folder == 'folder' and into_idx + 2 < len(words):
-                    dest_folder = words[into_idx + 2]
-                elif dest_folder.endswith('folder'):
-                    dest_folder = dest_folder[:-6].strip()
-        
-        # Also check for "move it into X" pattern
-        if 'move' in low_words and 'it' in low_words:
-            move_idx = low_words.index('move')
-            if move_idx + 1 < len(low_words) and low_words[move_idx + 1] == 'it':
-                # The file to move is the one we just created
-                pass  # file_name is already set from above
-        
-        if file_name and dest_folder:
-            commands.append(f'touch {file_name}')
-            commands.append(f'mv {file_name} {dest_folder}/')
-            return commands
+# Cache of natural language -> commands translations from the AI model
+class TranslationCache:
+    def __init__(self, max_entries=256, ttl=24 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load()
     
-    # Handle "make a new folder X and move Y into it" pattern
-    if ('make' in low or 'create' in low) and 'folder' in low and 'move' in low and 'into' in low:
-        words = text.split()
-        low_words = low.split()
-        commands = []
-        
-        # Find folder name - look for word after "folder"
-        folder_name = None
-        if 'folder' in low_words:
-            folder_idx = low_words.index('folder')
-            # Check if there's a name after "folder" and before "and"
-            for i in range(folder_idx + 1, len(words)):
-                if low_words[i] == 'and':
-                    break
-                if not low_words[i] in ['a', 'new', 'called', 'named']:
-                    folder_name = words[i]
-                    break
-        
-        if folder_name:
-            commands.append(f'mkdir {folder_name}')
-            
-            # Find file to move - look for word after "move"
-            if 'move' in low_words:
-                move_idx = low_words.index('move')
-                if move_idx + 1 < len(words):
-                    file_name = words[move_idx + 1]
-                    commands.append(f'mv {file_name} {folder_name}/')
-                    
-        return commands if commands else fallback_simple_patterns(text)
+    @staticmethod
+    def normalize(text):
+        """Normalize a phrase so trivial variations share one cache entry"""
+        text = re.sub(r'\s+', ' ', text.lower()).strip()
+        return text.rstrip('.!?')
     
-    # Handle folder creation with "and" operations
-    if 'create' in low and 'folder' in low and 'and' in low:
-        return handle_multi_step_creation(text)
+    def get(self, text):
+        """Return cached commands for ``text`` or None"""
+        key = self.normalize(text)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.time():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0])
     
-    # Single-step patterns
-    return fallback_simple_patterns(text)
-
-def handle_multi_step_creation(text):
-    """Handle complex creation commands with multiple steps"""
-    commands = []
-    low = text.lower()
+    def put(self, text, commands):
+        """Cache a successful translation, evicting the least recently used entry"""
+        if not commands:
+            return
+        key = self.normalize(text)
+        with self._lock:
+            self.entries[key] = (list(commands), time.time() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self._save()
     
-    # Extract folder name
-    if 'called' in low or 'named' in low:
-        words = text.split()
-        low_words = low.split()
-        
-        # Find folder name
-        folder_name = None
-        if 'called' in low_words:
-            called_idx = low_words.index('called')
-            folder_name = words[called_idx + 1]
-        elif 'named' in low_words:
-            named_idx = low_words.index('named')
-            folder_name = words[named_idx + 1]
-            
-        if folder_name:
-            commands.append(f'mkdir {folder_name}')
-            
-            # Look for additional operations
-            if 'move' in low and 'into' in low:
-                # Find what to move
-                move_idx = low_words.index('move')
-                if move_idx + 1 < len(words):
-                    file_name = words[move_idx + 1]
-                    commands.append(f'mv {file_name} {folder_name}/')
-                    
-    return commands if commands else [text]  # Fallback to original text
-
-def fallback_simple_patterns(text):
-    """Handle simple single-step commands"""
-    low = text.lower().strip()
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+            self._save()
     
-    # Enhanced folder creation patterns
-    if low.startswith('make new folder called ') or low.startswith('create new folder called '):
-        name = text[len('make new folder called '):].strip() if 'make' in low else text[len('create new folder called '):].strip()
-        return [f'mkdir {name}']
-    elif low.startswith('make a new folder called ') or low.startswith('create a new folder called '):
-        name = text[len('make a new folder called '):].strip() if 'make' in low else text[len('create a new folder called '):].strip()
-        return [f'mkdir {name}']
-    elif 'create a new folder' in low and 'called' in low:
-        parts = text.split('called')
-        if len(parts) > 1:
-            name = parts[1].strip().split()[0]
-            return [f'mkdir {name}']
-    elif 'make a new folder' in low and 'called' in low:
-        parts = text.split('called')
-        if len(parts) > 1:
-            name = parts[1].strip().split()[0]
-            return [f'mkdir {name}']
-    # Handle "create a new folder" without specific name
-    elif low == 'create a new folder' or low == 'make a new folder':
-        return [f'mkdir new_folder']
-    # Handle "create folder X" pattern
-    elif ('create folder' in low or 'make folder' in low) and len(text.split()) >= 3:
-        words = text.split()
-        # Find the word after "folder"
-        for i, word in enumerate(words):
-            if word.lower() == 'folder' and i + 1 < len(words):
-                folder_name = words[i + 1]
-                return [f'mkdir {folder_name}']
-    
-    # Clear screen patterns
-    elif 'clear' in low and ('terminal' in low or 'screen' in low):
-        return ['clear']
-    elif low.strip() in ['clear', 'cls']:
-        return ['clear']
-    
-    # File creation with content
-    elif 'create a file' in low and 'write' in low:
-        words = text.lower().split()
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
         try:
-            # Find filename
-            filename = 'newfile.txt'  # Default filename
-            if 'named' in words:
-                named_idx = words.index('named')
-                filename = text.split()[named_idx + 1]
-            elif 'called' in words:
-                called_idx = words.index('called')
-                filename = text.split()[called_idx + 1]
-            
-            # Extract content after "write" or "code"
-            content = ""
-            if 'write code' in text.lower():
-                content_start = text.lower().find('write code') + len('write code')
-                content = text[content_start:].strip()
-                if content.endswith(' in it'):
-                    content = content[:-6].strip()
-            elif 'write' in text.lower():
-                content_start = text.lower().find('write') + len('write')
-                content = text[content_start:].strip()
-                if content.endswith(' in it'):
-                    content = content[:-6].strip()
-            
-            if content:
-                return [f'write {filename} "{content}"']
-            else:
-                return [f'touch {filename}']
-        except:
-            return [f'touch newfile.txt']
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            now = time.time()
+            for key, commands, expires in data.get('entries', []):
+                if expires > now:
+                    self.entries[key] = (commands, expires)
+        except Exception:
+            pass  # A corrupt cache file just means a cold cache
     
-    # File execution patterns
-    elif 'execute' in low or 'run' in low:
-        words = text.split()
+    def _save(self):
+        if not self.path:
+            return
         try:
-            if 'execute' in words:
-                exec_idx = words.index('execute')
-                if exec_idx + 1 < len(words):
-                    filename = words[exec_idx + 1]
-                    return [f'python {filename}']
-            elif 'run' in words:
-                run_idx = words.index('run')
-                if run_idx + 1 < len(words):
-                    filename = words[run_idx + 1]
-                    return [f'python {filename}']
-        except:
-            pass
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': [[k, c, e] for k, (c, e) in self.entries.items()]}, f)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            pass  # Persistence is best effort
     
-    # File movement patterns
-    elif 'move' in low and 'into' in low:
-        words = text.split()
+    def get_status(self):
+        """Get cache statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'persistent': bool(self.path),
+            }
+
+# Global translation cache; set TERMINAL_AI_CACHE_PATH to persist it across restarts
+translation_cache = TranslationCache(
+    max_entries=int(os.environ.get('TERMINAL_AI_CACHE_SIZE', 256)),
+    ttl=float(os.environ.get('TERMINAL_AI_CACHE_TTL', 24 * 3600)),
+    path=os.environ.get('TERMINAL_AI_CACHE_PATH'),
+)
+
+# Seconds to wait for the model before giving up on a translation
+AI_TIMEOUT = float(os.environ.get('TERMINAL_AI_TIMEOUT', 15))
+
+# Coalesces concurrent identical translations into one in-flight model call
+class SingleFlight:
+    def __init__(self):
+        self.inflight = {}  # key -> [task, number of waiters]
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key, factory):
+        """Await ``factory()`` for ``key``, sharing one call with concurrent callers.
+        
+        Must run on a single event loop. A waiter that is cancelled (or times
+        out) leaves the shared call running for the others; the call itself is
+        only cancelled once nobody is waiting for it.
+        """
+        entry = self.inflight.get(key)
+        if entry is None:
+            entry = [asyncio.ensure_future(factory()), 0]
+            self.inflight[key] = entry
+            entry[0].add_done_callback(functools.partial(self._forget, key, entry))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        entry[1] += 1
         try:
-            move_idx = [i for i, w in enumerate(words) if w.lower() == 'move'][0]
-            into_idx = [i for i, w in enumerate(words) if w.lower() == 'into'][0]
-            if move_idx < into_idx:
-                source = words[move_idx + 1]
-                dest = words[into_idx + 1]
-                return [f'mv {source} {dest}/']
-        except:
-            pass
+            return await asyncio.shield(entry[0])
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not entry[0].done():
+                entry[0].cancel()
     
-    # File listing patterns
-    elif 'show' in low and 'python' in low and 'file' in low:
-        return ['search *.py']
-    elif 'show' in low and 'all' in low and 'file' in low:
-        return ['ls -l']
-    elif 'list' in low and 'python' in low:
-        return ['search *.py']
-    elif 'find' in low and 'python' in low:
-        return ['search *.py']
+    def _forget(self, key, entry, _task):
+        if self.inflight.get(key) is entry:
+            del self.inflight[key]
     
-    # If no patterns match, try AI parsing
+    def get_status(self):
+        """Get in-flight and coalescing statistics"""
+        return {
+            'in_flight': len(self.inflight),
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'timeout': AI_TIMEOUT,
+        }
+
+# Global coalescer for model calls
+single_flight = SingleFlight()
+
+def get_ai_stats():
+    """Get rate limit, translation cache and in-flight statistics for API endpoint"""
+    return {
+        'rate_limit': rate_limiter.get_status(),
+        'cache': translation_cache.get_status(),
+        'translation': single_flight.get_status(),
+    }
+
+def parse_nl(text):
+    """
+    Parse natural language text into shell commands.
+    Common phrases are handled by the compiled rule table in nl_rules;
+    anything else goes to the Google Gemini API.
+    Returns list of command strings that can be executed sequentially.
+    """
+    commands = engine.match(text)
+    if commands is not None:
+        return commands
     return try_ai_parsing(text)
 
-def try_ai_parsing(text):
+# Static part of the Gemini prompt, built once at import time
+PROMPT_PREAMBLE = (
+    "Convert this user instruction into simple shell commands. "
+    "IMPORTANT: Use only these exact commands and syntax:\n"
+    "- ls, ls -l (list files)\n"
+    "- pwd (current directory)\n"
+    "- cd dirname (change directory)\n"
+    "- mkdir dirname (create directory)\n"
+    "- rm filename, rm -rf dirname (remove files/dirs)\n"
+    "- cat filename (read file)\n"
+    "- touch filename (create empty file)\n"
+    "- mv source dest (move/rename)\n"
+    "- write filename \"content\" (create file with content)\n"
+    "- echo \"text\" > filename (write text to file)\n"
+    "- python filename.py (execute Python file)\n"
+    "- run filename.py (execute Python file)\n"
+    "- search pattern (find files matching pattern, e.g., search *.py)\n"
+    "- tree (show directory structure)\n"
+    "- cpu, mem, ps (system info)\n\n"
+    "CRITICAL RULES:\n"
+    "1. Do NOT use pipes (|), grep, find, or any shell operators\n"
+    "2. To find Python files, use: search *.py\n"
+    "3. To show all files, use: ls -l\n"
+    "4. For file filtering, use the search command\n"
+    "5. Only return basic commands from the list above\n\n"
+)
+
+MODEL_NAME = 'gemini-2.5-flash-lite'
+
+# Generation config for better control
+GENERATION_CONFIG = {
+    "temperature": 0.1,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 100,
+}
+
+# Commands the model is allowed to return
+AI_COMMANDS = ('ls', 'pwd', 'cd', 'mkdir', 'rm', 'cat', 'touch', 'mv', 'cpu', 'mem', 'ps',
+               'echo', 'write', 'python', 'run', 'execute', 'search', 'tree')
+
+# Process-wide model, configured once and reused across requests
+_model = None
+_model_api_key = None
+_model_override = None
+_model_lock = threading.Lock()
+
+
+def build_prompt(text):
+    """Append the user instruction to the static prompt preamble"""
+    return f"{PROMPT_PREAMBLE}User instruction: {text}\nCommands:"
+
+
+def set_model(model):
+    """Use ``model`` instead of Gemini (e.g. a local stub); None restores Gemini.
+
+    The model needs a ``generate_content(prompt, generation_config=..., stream=...)``
+    method returning an object with a ``text`` attribute; an optional
+    ``generate_content_async`` coroutine method is used when present.
     """
-    Use Google Gemini API to parse natural language commands.
-    Returns list of shell commands or empty list if parsing fails.
-    Includes rate limiting to prevent API quota exceeded errors.
+    global _model_override
+    _model_override = model
+
+
+class ModelResponse:
+    """Minimal response object with the ``text`` attribute Gemini responses have"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+class HTTPModel:
+    """Model served over plain HTTP, e.g. a local fake model server in tests.
+
+    POSTs ``{"prompt": ..., "generation_config": ...}`` as JSON and expects
+    ``{"text": ...}`` back. Selected by setting ``TERMINAL_AI_URL``.
     """
+
+    def __init__(self, url, timeout=None):
+        self.url = url
+        self.timeout = timeout
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        import urllib.request
+        body = json.dumps({'prompt': prompt, 'generation_config': generation_config}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout or AI_TIMEOUT) as response:
+            return ModelResponse(json.loads(response.read().decode('utf-8')).get('text', ''))
+
+
+def get_model():
+    """Return the shared model, configuring the client on first use.
+
+    ``TERMINAL_AI_URL`` selects an HTTPModel; otherwise Gemini is used.
+    Returns None when neither a URL nor an API key is configured.
+    """
+    global _model, _model_api_key
+    if _model_override is not None:
+        return _model_override
+    
     # Load API key from .env
+    load_env()
+    url = os.getenv('TERMINAL_AI_URL')
+    if url:
+        with _model_lock:
+            if not isinstance(_model, HTTPModel) or _model.url != url:
+                _model, _model_api_key = HTTPModel(url), None
+            return _model
+    
     api_key = os.getenv('GEMINI_API_KEY')
     if not api_key:
-        return []
+        return None
     
-    # Check rate limiting before making API call
-    if not rate_limiter.can_make_request():
+    with _model_lock:
+        if _model is None or _model_api_key != api_key:
+            # Configure Google Gemini API once per process (and key)
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel(MODEL_NAME, generation_config=GENERATION_CONFIG)
+            _model_api_key = api_key
+        return _model
+
+
+def extract_commands(content):
+    """Keep only lines of a model response that are known commands"""
+    commands = [line.strip() for line in content.strip().splitlines() if line.strip()]
+    
+    # Filter out any non-command text and explanations
+    valid_commands = []
+    for cmd_clean in commands:
+        # Skip lines that look like explanations
+        if cmd_clean.startswith('#') or cmd_clean.startswith('//') or ':' in cmd_clean[:10]:
+            continue
+        # Only accept lines that start with known commands
+        if cmd_clean.split()[0] in AI_COMMANDS:
+            valid_commands.append(cmd_clean)
+    
+    return valid_commands[:3]  # Limit to max 3 commands to prevent issues
+
+
+async def generate_async(model, prompt):
+    """Call the model without blocking the event loop"""
+    if hasattr(model, 'generate_content_async'):
+        return await model.generate_content_async(prompt, generation_config=GENERATION_CONFIG)
+    # Synchronous clients run on the loop's default thread pool
+    call = functools.partial(model.generate_content, prompt, generation_config=GENERATION_CONFIG, stream=False)
+    return await asyncio.get_running_loop().run_in_executor(None, call)
+
+
+async def _request_translation(model, text):
+    """Make one rate-limited model call and cache its commands"""
+    # Take a token, queueing briefly if the shared budget is used up
+    if not await rate_limiter.acquire_async():
         status = rate_limiter.get_status()
-        print(f"⏳ Rate limit reached ({status['requests_made']}/{status['max_requests']}). Please wait {status['time_until_reset']:.1f} seconds.")
+        print(f"⏳ Rate limit reached ({status['requests_made']}/{status['max_requests']}, {status['queued']} queued). Please wait {status['time_until_reset']:.1f} seconds.")
         return []
     
-    # Configure Google Gemini API
-    genai.configure(api_key=api_key)
-    prompt = (
-        "Convert this user instruction into simple shell commands. "
-        "IMPORTANT: Use only these exact commands and syntax:\n"
-        "- ls, ls -l (list files)\n"
-        "- pwd (current directory)\n"
-        "- cd dirname (change directory)\n"
-        "- mkdir dirname (create directory)\n"
-        "- rm filename, rm -rf dirname (remove files/dirs)\n"
-        "- cat filename (read file)\n"
-        "- touch filename (create empty file)\n"
-        "- mv source dest (move/rename)\n"
-        "- write filename \"content\" (create file with content)\n"
-        "- echo \"text\" > filename (write text to file)\n"
-        "- python filename.py (execute Python file)\n"
-        "- run filename.py (execute Python file)\n"
-        "- search pattern (find files matching pattern, e.g., search *.py)\n"
-        "- tree (show directory structure)\n"
-        "- cpu, mem, ps (system info)\n\n"
-        "CRITICAL RULES:\n"
-        "1. Do NOT use pipes (|), grep, find, or any shell operators\n"
-        "2. To find Python files, use: search *.py\n"
-        "3. To show all files, use: ls -l\n"
-        "4. For file filtering, use the search command\n"
-        "5. Only return basic commands from the list above\n\n"
-        f"User instruction: {text}\n"
-        "Commands:"
-    )
-    
     try:
-        # Record the API request for rate limiting
-        rate_limiter.record_request()
-        
-        # Use GenerativeModel for Gemini with timeout and safety settings
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
-        
-        # Add generation config for better control
-        generation_config = {
-            "temperature": 0.1,
-            "top_p": 0.8,
-            "top_k": 40,
-            "max_output_tokens": 100,
-        }
-        
-        response = model.generate_content(
-            prompt,
-            generation_config=generation_config,
-            stream=False
-        )
+        response = await generate_async(model, build_prompt(text))
         
         if not response or not response.text:
             return []
-            
-        content = response.text.strip()
-        commands = [line.strip() for line in content.splitlines() if line.strip()]
         
-        # Filter out any non-command text and explanations
-        valid_commands = []
-        for cmd in commands:
-            cmd_clean = cmd.strip()
-            # Skip lines that look like explanations
-            if cmd_clean.startswith('#') or cmd_clean.startswith('//') or ':' in cmd_clean[:10]:
-                continue
-            # Only accept lines that start with known commands
-            if any(cmd_clean.startswith(c + ' ') or cmd_clean == c for c in ['ls', 'pwd', 'cd', 'mkdir', 'rm', 'cat', 'touch', 'mv', 'cpu', 'mem', 'ps', 'echo', 'write', 'python', 'run', 'execute']):
-                valid_commands.append(cmd_clean)
-        
-        return valid_commands[:3]  # Limit to max 3 commands to prevent issues
+        commands = extract_commands(response.text)
+        translation_cache.put(text, commands)
+        return commands
         
     except Exception as e:
         print(f"AI parsing error: {e}")
-        return []
\ No newline at end of file
+        return []
+
+
+async def translate_async(text, timeout=None):
+    """
+    Translate natural language into commands without blocking.
+    Cached phrases return immediately; concurrent identical phrases share a
+    single in-flight model call. Gives up (returning []) after ``timeout``
+    seconds, default ``TERMINAL_AI_TIMEOUT``.
+    """
+    # Cached translations skip both the network and the rate limiter
+    cached = translation_cache.get(text)
+    if cached is not None:
+        return cached
+    
+    model = get_model()
+    if model is None:
+        return []
+    
+    timeout = AI_TIMEOUT if timeout is None else timeout
+    key = TranslationCache.normalize(text)
+    try:
+        commands = await asyncio.wait_for(
+            single_flight.do(key, lambda: _request_translation(model, text)), timeout
+        )
+    except asyncio.TimeoutError:
+        print(f"⏳ AI request timed out after {timeout:g} seconds.")
+        return []
+    return list(commands)
+
+
+def try_ai_parsing(text):
+    """
+    Use Google Gemini API to parse natural language commands.
+    Returns list of shell commands or empty list if parsing fails.
+    Runs translate_async on the shared background event loop; Ctrl+C
+    cancels the wait (and the model call if nobody else is waiting).
+    """
+    return aio.run(translate_async(text))
@@ -0,0 +1,43 @@
+"""
+Shared background asyncio event loop.
+
+Slow network calls (AI translation) run as coroutines on one daemon loop
+thread; synchronous callers such as the shell and the Flask views submit
+work with ``submit``/``run`` and wait on the returned future.
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the background event loop, starting its thread on first use"""
+    global _loop, _thread
+    with _lock:
+        if _loop is None or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name='terminal-aio', daemon=True)
+            _thread.start()
+        return _loop
+
+
+def submit(coro):
+    """Schedule ``coro`` on the background loop and return a concurrent future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop())
+
+
+def run(coro, timeout=None):
+    """Run ``coro`` on the background loop and wait for its result.
+
+    If the wait is interrupted (timeout, Ctrl+C) the coroutine is cancelled.
+    """
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except (concurrent.futures.TimeoutError, KeyboardInterrupt):
+        future.cancel()
+        raise
@@ -1,22 +1,24 @@
 import os
+import shlex
 import shutil
 import sys
-import psutil
+import threading
 from colorama import init, Fore, Back, Style
-from rich.console import Console
-from rich.table import Table
-from rich.tree import Tree
-import platform
+import itertools
 import time
+from .session import current_session, resolve_path
+from .status import error_text, fail
 
 # Initialize colorama for cross-platform color support
 init(autoreset=True)
-console = Console()
+from .render import Column, KeyValues, Table, Tree, get_console, render_rich
 
 
-def get_file_type_icon(path):
+def get_file_type_icon(path, is_dir=None):
     """Get retro ASCII icon based on file type"""
-    if os.path.isdir(path):
+    if is_dir is None:
+        is_dir = os.path.isdir(path)
+    if is_dir:
         return "[DIR]"
     ext = os.path.splitext(path)[1].lower()
     icon_map = {
@@ -49,116 +51,195 @@ def add_loading_animation(duration=2):
     print("\r" + " " * 20 + "\r", end="")  # Clear loading line
 
 def log_command(command):
-    """Log executed command to history file"""
+    """Log executed command to history file (batched by the history writer)"""
+    from .history import get_history_writer
+    get_history_writer().log(command)
+
+
+LS_WEB_DEFAULT_LIMIT = 1000
+LS_SORT_KEYS = ('name', 'size', 'mtime', 'none')
+
+
+def _entry_stat(entry):
+    """Return the DirEntry's cached stat result, or None if it can't be read"""
+    try:
+        return entry.stat()
+    except OSError:
+        try:
+            return entry.stat(follow_symlinks=False)
+        except OSError:
+            return None
+
+
+def _entry_is_dir(entry):
     try:
-        with open('.terminal_history', 'a', encoding='utf-8') as f:
-            timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
-            f.write(f"[{timestamp}] {command}\n")
-    except Exception:
-        pass  # Silently ignore logging errors
+        return entry.is_dir()
+    except OSError:
+        return False
 
 
 def ls(args):
-    # Log command
-    log_command(f"ls {' '.join(args)}")
-    
-    # Check if we're in web mode
-    import os
-    is_web_mode = os.environ.get('TERMINAL_MODE') == 'web'
+    is_web_mode = current_session().mode == 'web'
     
     # Parse flags and path
     show_all = False
     long_format = False
+    reverse = False
+    json_output = False
+    sort_key = 'name'
+    limit = None
+    offset = 0
     path = '.'
     
-    for arg in args:
-        if arg.startswith('-'):
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--sort', '--limit', '--offset'):
+            if i + 1 >= len(args):
+                fail()
+                return f"Error: ls: option '{arg}' requires a value"
+            value = args[i + 1]
+            i += 2
+            if arg == '--sort':
+                if value not in LS_SORT_KEYS:
+                    fail()
+                    return f"Error: ls: invalid sort key '{value}' (use {', '.join(LS_SORT_KEYS)})"
+                sort_key = value
+            elif not value.isdigit():
+                fail()
+                return f"Error: ls: option '{arg}' expects a number, got '{value}'"
+            elif arg == '--limit':
+                limit = int(value)
+            else:
+                offset = int(value)
+            continue
+        if arg == '--json':
+            json_output = True
+        elif arg.startswith('-') and not arg.startswith('--'):
             if 'a' in arg:
                 show_all = True
             if 'l' in arg:
                 long_format = True
+            if 'r' in arg:
+                reverse = True
+            if 'S' in arg:
+                sort_key = 'size'
+            if 't' in arg:
+                sort_key = 'mtime'
+            if 'U' in arg:
+                sort_key = 'none'
         else:
             path = arg
+        i += 1
+    path = resolve_path(path)
+    if limit is None and (is_web_mode or json_output):
+        # Keep responses bounded; the web client pages with --offset
+        limit = LS_WEB_DEFAULT_LIMIT
     
     try:
-        items = os.listdir(path)
-        if not show_all:
-            items = [item for item in items if not item.startswith('.')]
+        # Single scandir pass; DirEntry caches is_dir() and stat() results
+        entries = []
+        stop = None if sort_key != 'none' or limit is None else offset + limit
+        total = 0
+        with os.scandir(path) as it:
+            for entry in it:
+                if not show_all and entry.name.startswith('.'):
+                    continue
+                total += 1
+                if stop is None or len(entries) < stop:
+                    entries.append(entry)
+        
+        if sort_key == 'name':
+            entries.sort(key=lambda e: e.name, reverse=reverse)
+        elif sort_key in ('size', 'mtime'):
+            attr = 'st_size' if sort_key == 'size' else 'st_mtime'
+            # Largest / newest first, like ls -S / ls -t
+            entries.sort(key=lambda e: getattr(_entry_stat(e), attr, 0), reverse=not reverse)
+        
+        page = entries[offset:offset + limit] if limit is not None else entries[offset:]
+        remaining = total - offset - len(page)
+        
+        if json_output:
+            import json
+            rows = []
+            for entry in page:
+                stat_info = _entry_stat(entry)
+                rows.append({
+                    'name': entry.name,
+                    'is_dir': _entry_is_dir(entry),
+                    'size': stat_info.st_size if stat_info else None,
+                    'mtime': stat_info.st_mtime if stat_info else None,
+                })
+            return json.dumps({
+                'path': path,
+                'total': total,
+                'offset': offset,
+                'limit': limit,
+                'remaining': max(remaining, 0),
+                'entries': rows,
+            })
+        
+        footer = None
+        if remaining > 0:
+            footer = (f"-- showing {offset + 1}-{offset + len(page)} of {total} entries; "
+                      f"next: {_ls_next_page(args, offset + len(page))} --")
         
         if long_format:
-            if is_web_mode:
-                # Simple table format for web
-                result = f"Directory: {os.path.abspath(path)}\n\n"
-                result += f"{'Type':<8} {'Name':<25} {'Size':<12} {'Modified':<20}\n"
-                result += "=" * 65 + "\n"
-                
-                for item in sorted(items):
-                    item_path = os.path.join(path, item)
-                    try:
-                        stat_info = os.stat(item_path)
-                        mod_time = time.strftime('%Y-%m-%d %H:%M', time.localtime(stat_info.st_mtime))
-                        
-                        if os.path.isdir(item_path):
-                            result += f"{'[DIR]':<8} {item:<25} {'-':<12} {mod_time:<20}\n"
-                        else:
-                            ext = os.path.splitext(item)[1][1:].upper() or 'FILE'
-                            size = format_file_size(stat_info.st_size)
-                            result += f"{'[' + ext + ']':<8} {item:<25} {size:<12} {mod_time:<20}\n"
-                    except Exception:
-                        result += f"{'[UNK]':<8} {item:<25} {'Unknown':<12} {'Unknown':<20}\n"
-                
-                return result
-            else:
-                # Rich table for CLI
-                table = Table(title=f">> DIRECTORY: {os.path.abspath(path)}")
-                table.add_column("TYPE", style="cyan", no_wrap=True)
-                table.add_column("NAME", style="green")
-                table.add_column("SIZE", style="yellow", justify="right")
-                table.add_column("MODIFIED", style="magenta")
-                
-                for item in sorted(items):
-                    item_path = os.path.join(path, item)
-                    try:
-                        stat_info = os.stat(item_path)
-                        mod_time = time.strftime('%Y-%m-%d %H:%M', time.localtime(stat_info.st_mtime))
-                        
-                        if os.path.isdir(item_path):
-                            table.add_row("[DIR]", item, "-", mod_time)
-                        else:
-                            icon = get_file_type_icon(item_path)
-                            size = format_file_size(stat_info.st_size)
-                            table.add_row(icon, item, size, mod_time)
-                    except Exception:
-                        table.add_row("[???]", item, "UNKNOWN", "UNKNOWN")
-                
-                with console.capture() as capture:
-                    console.print(table)
-                return capture.get()
+            table = Table([Column("TYPE", style="cyan"), Column("NAME", style="green"),
+                           Column("SIZE", style="yellow", justify="right"), Column("MODIFIED", style="magenta")],
+                          title=f">> DIRECTORY: {path}", footer=footer)
+            for entry in page:
+                item = entry.name
+                stat_info = _entry_stat(entry)
+                if stat_info is None:
+                    table.add_row("[???]", item, "UNKNOWN", "UNKNOWN")
+                    continue
+                mod_time = time.strftime('%Y-%m-%d %H:%M', time.localtime(stat_info.st_mtime))
+                if _entry_is_dir(entry):
+                    table.add_row("[DIR]", item, "-", mod_time)
+                else:
+                    icon = get_file_type_icon(entry.path, is_dir=False)
+                    table.add_row(icon, item, format_file_size(stat_info.st_size), mod_time)
+            return table
         else:
             # Simple listing for both web and CLI
             result = []
-            for item in sorted(items):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
+            for entry in page:
+                item = entry.name
+                if _entry_is_dir(entry):
                     if is_web_mode:
                         result.append(f"[DIR]  {item}/")
                     else:
                         result.append(f">> {item}/")
                 else:
-                    ext = os.path.splitext(item)[1] or ''
                     if is_web_mode:
                         result.append(f"[FILE] {item}")
                     else:
                         result.append(f"   {item}")
+            if footer:
+                result.append(footer)
             return '\n'.join(result)
     except Exception as e:
+        fail()
         return f"Error: {e}"
 
 
+def _ls_next_page(args, offset):
+    """The ``ls`` command line for the next page: ``args`` with only the offset changed"""
+    words = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--offset':
+            i += 2
+            continue
+        words.append(args[i])
+        i += 1
+    return shlex.join(['ls', *words, '--offset', str(offset)])
+
+
 def pwd(args):
-    log_command("pwd")
-    current_path = os.getcwd()
-    is_web_mode = os.environ.get('TERMINAL_MODE') == 'web'
+    current_path = current_session().cwd
+    is_web_mode = current_session().mode == 'web'
     
     if is_web_mode:
         return f"Current directory: {current_path}"
@@ -167,30 +248,28 @@ def pwd(args):
 
 
 def cd(args):
-    log_command(f"cd {' '.join(args)}")
     if not args:
-        return f"{Fore.RED}[ERROR] cd: missing operand{Style.RESET_ALL}"
+        return error_text("[ERROR] cd: missing operand")
     try:
-        os.chdir(args[0])
-        return f"{Fore.GREEN}[OK] Changed to: {os.getcwd()}{Style.RESET_ALL}"
+        cwd = current_session().chdir(args[0])
+        return f"{Fore.GREEN}[OK] Changed to: {cwd}{Style.RESET_ALL}"
     except Exception as e:
-        return f"{Fore.RED}[ERROR] cd: {e}{Style.RESET_ALL}"
+        return error_text(f"[ERROR] cd: {e}")
 
 
 def mkdir(args):
-    log_command(f"mkdir {' '.join(args)}")
     if not args:
-        return f"{Fore.RED}[ERROR] mkdir: missing operand{Style.RESET_ALL}"
+        return error_text("[ERROR] mkdir: missing operand")
     try:
-        os.makedirs(args[0], exist_ok=True)
+        os.makedirs(resolve_path(args[0]), exist_ok=True)
         return f"{Fore.GREEN}[OK] Directory '{args[0]}' created{Style.RESET_ALL}"
     except Exception as e:
-        return f"{Fore.RED}[ERROR] mkdir: {e}{Style.RESET_ALL}"
+        return error_text(f"[ERROR] mkdir: {e}")
 
 
 def rm(args):
     if not args:
-        return f"{Fore.RED}rm: missing operand{Style.RESET_ALL}"
+        return error_text("rm: missing operand")
     
     # Parse flags and paths
     recursive = False
@@ -207,148 +286,145 @@ def rm(args):
             paths.append(arg)
     
     if not paths:
-        return f"{Fore.RED}rm: missing operand{Style.RESET_ALL}"
+        return error_text("rm: missing operand")
     
     results = []
-    for path in paths:
+    for name in paths:
+        path = resolve_path(name)
         try:
             if os.path.isdir(path):
                 if not force:
                     # Ask for confirmation
-                    print(f"{Fore.YELLOW}⚠️  Delete directory '{path}' and all contents? (y/N): {Style.RESET_ALL}", end='')
+                    print(f"{Fore.YELLOW}⚠️  Delete directory '{name}' and all contents? (y/N): {Style.RESET_ALL}", end='')
                     try:
                         response = input().lower()
                         if response != 'y':
-                            results.append(f"{Fore.YELLOW}❌ Cancelled deletion of '{path}'{Style.RESET_ALL}")
+                            results.append(f"{Fore.YELLOW}❌ Cancelled deletion of '{name}'{Style.RESET_ALL}")
                             continue
                     except:
-                        results.append(f"{Fore.YELLOW}❌ Cancelled deletion of '{path}'{Style.RESET_ALL}")
+                        results.append(f"{Fore.YELLOW}❌ Cancelled deletion of '{name}'{Style.RESET_ALL}")
                         continue
                 
                 if recursive:
                     shutil.rmtree(path)
-                    results.append(f"{Fore.GREEN}✅ Directory '{path}' deleted{Style.RESET_ALL}")
+                    results.append(f"{Fore.GREEN}✅ Directory '{name}' deleted{Style.RESET_ALL}")
                 else:
                     try:
                         os.rmdir(path)  # Only works if empty
-                        results.append(f"{Fore.GREEN}✅ Directory '{path}' deleted{Style.RESET_ALL}")
+                        results.append(f"{Fore.GREEN}✅ Directory '{name}' deleted{Style.RESET_ALL}")
                     except OSError:
-                        results.append(f"{Fore.RED}rm: cannot remove '{path}': Directory not empty (use -r){Style.RESET_ALL}")
+                        results.append(error_text(f"rm: cannot remove '{name}': Directory not empty (use -r)"))
             elif os.path.isfile(path):
                 os.remove(path)
-                results.append(f"{Fore.GREEN}✅ File '{path}' deleted{Style.RESET_ALL}")
+                results.append(f"{Fore.GREEN}✅ File '{name}' deleted{Style.RESET_ALL}")
             else:
                 if not force:
-                    results.append(f"{Fore.RED}rm: cannot remove '{path}': No such file or directory{Style.RESET_ALL}")
+                    results.append(error_text(f"rm: cannot remove '{name}': No such file or directory"))
         except Exception as e:
             if not force:
-                results.append(f"{Fore.RED}rm: {e}{Style.RESET_ALL}")
+                results.append(error_text(f"rm: {e}"))
     
     return '\n'.join(results)
 
 
 def cat(args):
+    """Display file contents (--head N, --tail N, --bytes START:END, --page N)"""
+    from . import fileview
+    
     if not args:
         raise ValueError("cat: missing operand")
-    with open(args[0], 'r') as f:
-        return f.read()
+    
+    # Parse options; every mode reads through mmap and streams bounded chunks
+    mode, value, page_size, filename = 'all', None, 100, None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-n', '--head', '--tail', '--bytes', '--page', '--page-size'):
+            if i + 1 >= len(args):
+                raise ValueError(f"cat: option '{arg}' requires a value")
+            option_value = args[i + 1]
+            i += 2
+            if arg == '--page-size':
+                page_size = _positive_int(option_value, arg)
+            elif arg == '--bytes':
+                mode, value = 'bytes', _parse_byte_range(option_value)
+            else:
+                mode = {'-n': 'head'}.get(arg, arg[2:])
+                value = _positive_int(option_value, arg)
+        else:
+            filename = arg
+            i += 1
+    if filename is None:
+        raise ValueError("cat: missing operand")
+    
+    path = resolve_path(filename)
+    if os.path.isdir(path):
+        raise ValueError(f"cat: {filename}: Is a directory")
+    if fileview.is_binary(path):
+        raise ValueError(f"cat: {filename}: binary file, refusing to display")
+    # Map eagerly so a missing file fails before any output is streamed
+    mapped = fileview.MappedFile(path)
+    return _iter_cat(mapped, mode, value, page_size)
+
+
+def _positive_int(value, option):
+    """Parse a positive integer option value"""
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"cat: {option}: expected a positive number, got '{value}'")
+    return int(value)
+
+
+def _parse_byte_range(value):
+    """Parse START:END (either side optional) into a (start, end) tuple"""
+    start, sep, end = value.partition(':')
+    if not sep or not (start or end) or not (start or '0').isdigit() or (end and not end.isdigit()):
+        raise ValueError(f"cat: --bytes: expected START:END, got '{value}'")
+    return int(start or 0), int(end) if end else None
+
+
+def _iter_cat(mapped, mode, value, page_size):
+    """Yield the selected part of a memory-mapped file"""
+    from . import fileview
+    
+    with mapped:
+        if mode == 'head':
+            yield from fileview.iter_lines(mapped, 0, value)
+        elif mode == 'tail':
+            yield from fileview.iter_bytes(mapped, mapped.tail_start(value), mapped.size)
+        elif mode == 'bytes':
+            start, end = value
+            yield from fileview.iter_bytes(mapped, start, mapped.size if end is None else end)
+        elif mode == 'page':
+            first_line = (value - 1) * page_size
+            start = mapped.line_end(0, first_line)
+            if start >= mapped.size and value > 1:
+                raise ValueError(f"cat: page {value} is past the end ({mapped.line_count()} lines)")
+            end = mapped.line_end(start, page_size)
+            yield from fileview.iter_bytes(mapped, start, end)
+            if end < mapped.size:
+                yield f"\n-- page {value}, lines {first_line + 1}-{first_line + page_size}; next: cat --page {value + 1} --\n"
+        else:
+            yield from fileview.iter_bytes(mapped, 0, mapped.size)
 
 
 def mv(args):
     if len(args) < 2:
         raise ValueError("mv: missing operand")
     src, dst = args[0], args[1]
-    shutil.move(src, dst)
+    shutil.move(resolve_path(src), resolve_path(dst))
 
 
 def touch(args):
     if not args:
         raise ValueError("touch: missing operand")
-    path = args[0]
+    path = resolve_path(args[0])
     open(path, 'a').close()
     os.utime(path, None)
 
 
 def echo(args):
-    """Echo text to stdout or redirect to file"""
-    if not args:
-        return ""
-    
-    text = " ".join(args)
-    
-    # Handle redirection: echo "text" > file.txt
-    if ">" in args:
-        redirect_idx = args.index(">")
-        if redirect_idx < len(args) - 1:
-            filename = args[redirect_idx + 1]
-            content = " ".join(args[:redirect_idx])
-            # Remove quotes if present
-            if content.startswith('"') and content.endswith('"'):
-                content = content[1:-1]
-            elif content.startswith("'") and content.endswith("'"):
-                content = content[1:-1]
-            
-            with open(filename, 'w') as f:
-                f.write(content)
-            return f"Content written to {filename}"
-        else:
-            raise ValueError("echo: missing filename after >")
-    
-    # Handle append redirection: echo "text" >> file.txt
-    elif ">>" in args:
-        redirect_idx = args.index(">>")
-        if redirect_idx < len(args) - 1:
-            filename = args[redirect_idx + 1]
-            content = " ".join(args[:redirect_idx])
-            # Remove quotes if present
-            if content.startswith('"') and content.endswith('"'):
-                content = content[1:-1]
-            elif content.startswith("'") and content.endswith("'"):
-                content = content[1:-1]
-            
-            with open(filename, 'a') as f:
-                f.write(content + '\n')
-            return f"Content appended to {filename}"
-        else:
-            raise ValueError("echo: missing filename after >>")
-    
-    # Regular echo
-    return text
-
-
-def python_exec(args):
-    """Execute Python files"""
-    if not args:
-        raise ValueError("python: missing script name")
-    
-    script = args[0]
-    if not script.endswith('.py'):
-        script += '.py'
-    
-    if not os.path.exists(script):
-        raise ValueError(f"python: can't open file '{script}': No such file or directory")
-    
-    import subprocess
-    import sys
-    
-    try:
-        result = subprocess.run([sys.executable, script], 
-                              capture_output=True, 
-                              text=True, 
-                              timeout=10)
-        
-        output = ""
-        if result.stdout:
-            output += result.stdout
-        if result.stderr:
-            output += f"Error: {result.stderr}"
-        
-        return output.strip() if output else f"Script {script} executed successfully"
-    
-    except subprocess.TimeoutExpired:
-        raise ValueError(f"python: script '{script}' timed out")
-    except Exception as e:
-        raise ValueError(f"python: execution error: {e}")
+    """Echo text to stdout; the shell's pipeline layer handles > and >> redirection"""
+    return " ".join(args)
 
 
 def clear(args):
@@ -375,10 +451,15 @@ def help_cmd(args):
         'echo': 'Print text or write to file',
         'write': 'Write content to file',
         'python': 'Execute Python scripts',
+        'jobs': 'List background jobs (start one with cmd &)',
+        'fg': 'Stream a job until it finishes',
+        'kill': 'Cancel a job: kill %N',
+        'watch': 'Re-run a command: watch cpu 1',
         'clear': 'Clear screen',
         'cpu': 'Show CPU usage',
         'mem': 'Show memory usage', 
         'ps': 'List processes',
+        'top': 'Show the busiest processes',
         'exit': 'Exit terminal'
     }
     
@@ -390,37 +471,94 @@ def help_cmd(args):
 
 
 def python_exec(args):
-    """Execute a Python file"""
+    """Execute a Python file: python [--timeout N] file.py [args...]"""
+    timeout = None
+    if args and args[0] == '--timeout':
+        if len(args) < 2:
+            raise ValueError("python: --timeout needs a number of seconds")
+        try:
+            timeout = float(args[1])
+        except ValueError:
+            raise ValueError(f"python: invalid timeout: {args[1]}")
+        args = args[2:]
     if not args:
         raise ValueError("python: missing filename")
     
     filename = args[0]
+    session = current_session()
     
-    if not os.path.exists(filename):
+    if not os.path.exists(session.resolve(filename)):
         raise ValueError(f"python: cannot execute '{filename}': No such file")
     
     if not filename.endswith('.py'):
         raise ValueError(f"python: '{filename}' is not a Python file")
     
+    from .script_pool import get_script_pool, pool_supported
+    
+    if pool_supported():
+        # Pre-warmed workers fork per script: fresh namespace, limits, streamed output
+        return get_script_pool().run(session.resolve(filename), args[1:], cwd=session.cwd,
+                                     env=session.env, timeout=timeout)
+    
     import subprocess
     import sys
     
     try:
-        result = subprocess.run([sys.executable, filename], 
-                              capture_output=True, 
-                              text=True, 
-                              cwd=os.getcwd())
-        
-        output = ""
-        if result.stdout:
-            output += result.stdout
-        if result.stderr:
-            output += f"Error: {result.stderr}"
-        
-        return output.strip() if output else "Program executed successfully"
-        
+        process = subprocess.Popen([sys.executable, session.resolve(filename), *args[1:]], 
+                                   stdout=subprocess.PIPE, 
+                                   stderr=subprocess.PIPE, 
+                                   text=True, 
+                                   cwd=session.cwd,
+                                   env=session.env)
     except Exception as e:
         raise ValueError(f"python: execution failed: {e}")
+    return _iter_process(process, get_script_pool().timeout if timeout is None else timeout)
+
+
+def _iter_process(process, timeout=None):
+    """Yield a subprocess's stdout line by line, then the end of its stderr"""
+    import threading
+    from .script_pool import StderrTail
+    
+    # Drain stderr in the background so a chatty script cannot deadlock
+    stderr = StderrTail()
+    
+    def drain():
+        for line in process.stderr:
+            stderr.add(line.encode('utf-8', 'replace'))
+    
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    timer = threading.Timer(timeout, process.kill) if timeout else None
+    if timer:
+        timer.start()
+    from .jobs import on_cancel
+    unregister = on_cancel(process.kill)
+    produced = False
+    try:
+        # Bounded reads: a script that never prints a newline still streams
+        for line in iter(lambda: process.stdout.readline(64 * 1024), ''):
+            produced = True
+            yield line
+        process.wait()
+        reader.join()
+        if stderr:
+            produced = True
+            yield "Error: " + stderr.text()
+        if process.returncode:
+            fail()
+        if timer and not timer.is_alive() and process.returncode < 0:
+            raise ValueError(f"python: script timed out after {timeout:g}s")
+        if not produced:
+            yield "Program executed successfully"
+    finally:
+        unregister()
+        if timer:
+            timer.cancel()
+        # Consumer went away early (client disconnect, Ctrl-C): stop the script
+        if process.poll() is None:
+            process.kill()
+            process.wait()
 
 
 def run(args):
@@ -436,6 +574,179 @@ def run(args):
         raise ValueError(f"run: unsupported file type '{filename}'")
 
 
+def _find_job(spec, command):
+    """Resolve ``%N``/``N`` to one of the session's jobs; default is the newest.
+
+    Run as a job itself (``fg &``), a command never picks its own job:
+    it would follow its own output forever.
+    """
+    from .jobs import current_job, job_manager
+    this_job = current_job()
+    jobs = job_manager.list(current_session().id)
+    if spec is None:
+        jobs = [job for job in jobs if job is not this_job]
+        if not jobs:
+            raise ValueError(f"{command}: no current job")
+        return jobs[-1]
+    job_id = spec.lstrip('%')
+    for job in jobs:
+        if job.id == job_id:
+            if job is this_job:
+                raise ValueError(f"{command}: {spec}: is the job running this command")
+            return job
+    raise ValueError(f"{command}: {spec}: no such job")
+
+
+def jobs_cmd(args):
+    """List background jobs of this session"""
+    from .jobs import job_manager
+    jobs = job_manager.list(current_session().id)
+    if args and args[0] in ('-r', '--running'):
+        jobs = [job for job in jobs if not job.done]
+    if not jobs:
+        return f"{Fore.YELLOW}No jobs{Style.RESET_ALL}"
+    colors = {'running': Fore.CYAN, 'queued': Fore.YELLOW, 'done': Fore.GREEN}
+    lines = []
+    for job in jobs:
+        color = colors.get(job.status, Fore.RED)
+        lines.append(f"[{job.id}] {color}{job.status.capitalize():<10}{Style.RESET_ALL} "
+                     f"{job.elapsed():>8.1f}s  {job.command}")
+    return '\n'.join(lines)
+
+
+def fg(args):
+    """Bring a job to the foreground: stream its output until it finishes"""
+    return _iter_jobs([_find_job(args[0] if args else None, 'fg')], cancel_on_interrupt=True)
+
+
+def wait_cmd(args):
+    """Wait for jobs (all unfinished ones by default) and collect their output"""
+    from .jobs import current_job, job_manager
+    if args:
+        jobs = [_find_job(spec, 'wait') for spec in args]
+    else:
+        # A job running ``wait`` must not wait for itself
+        jobs = [job for job in job_manager.list(current_session().id) if not job.done and job is not current_job()]
+        if not jobs:
+            return ""
+    return _iter_jobs(jobs)
+
+
+def _iter_jobs(jobs, cancel_on_interrupt=False):
+    for job in jobs:
+        if len(jobs) > 1:
+            yield f"{Fore.CYAN}[{job.id}] {job.command}{Style.RESET_ALL}\n"
+        dropped = job.dropped(0)
+        if dropped:
+            yield f"{Fore.YELLOW}... {dropped} earlier chunk(s) of output dropped{Style.RESET_ALL}\n"
+        try:
+            ends_with_newline = True
+            for chunk in job.follow(0):
+                ends_with_newline = chunk.endswith('\n')
+                yield chunk
+        except KeyboardInterrupt:
+            # Ctrl+C on a foreground job stops it, as in a POSIX shell
+            if cancel_on_interrupt:
+                job.cancel()
+            raise
+        job.notify = False  # Already reported here
+        if not ends_with_newline:
+            yield '\n'
+        if job.status != 'done':
+            reason = f" ({job.reason})" if job.reason and job.reason != 'cancelled' else ''
+            yield f"{Fore.RED}[{job.id}] {job.status}{reason}{Style.RESET_ALL}\n"
+
+
+def kill_cmd(args):
+    """Cancel background jobs: kill %N [%M...]"""
+    if not args:
+        raise ValueError("kill: usage: kill %N")
+    lines = []
+    for spec in args:
+        job = _find_job(spec, 'kill')
+        if job.cancel():
+            lines.append(f"{Fore.YELLOW}[{job.id}] cancelling: {job.command}{Style.RESET_ALL}")
+        else:
+            lines.append(f"{Fore.YELLOW}[{job.id}] already {job.status}{Style.RESET_ALL}")
+    return '\n'.join(lines)
+
+
+# Commands that make no sense on a schedule
+UNWATCHABLE = ('watch', 'fg', 'wait', 'clear', 'exit')
+
+
+def watch_cmd(args):
+    """Re-run a command on a schedule: watch [-n SECONDS] [-c COUNT] <command> [interval]"""
+    from . import pipeline
+    from .system_monitor import SYS_COMMANDS
+    args = list(args or [])
+    interval, count = 2.0, None
+    while args and args[0] in ('-n', '--interval', '-c', '--count'):
+        if len(args) < 2:
+            raise ValueError(f"watch: {args[0]}: missing value")
+        option, value = args[0], args[1]
+        try:
+            if option in ('-n', '--interval'):
+                interval = float(value)
+            else:
+                count = int(value)
+        except ValueError:
+            raise ValueError(f"watch: {option}: invalid number '{value}'")
+        args = args[2:]
+    # A trailing number is the interval; quote the command to pass it a number
+    if len(args) > 1:
+        try:
+            interval = float(args[-1])
+            args = args[:-1]
+        except ValueError:
+            pass
+    if not args:
+        raise ValueError("watch: usage: watch [-n SECONDS] [-c COUNT] <command> [interval]")
+    if interval < 0.1:
+        raise ValueError("watch: interval must be at least 0.1 seconds")
+    line = args[0] if len(args) == 1 else shlex.join(args)
+    parsed = pipeline.parse(line)
+    if parsed is None:
+        words = pipeline.tokenize(line)
+        if not words:
+            raise ValueError("watch: missing command")
+        parsed = pipeline.Pipeline([(words[0], list(words[1:]))])
+    name = parsed.stages[0][0]
+    if name in UNWATCHABLE:
+        raise ValueError(f"watch: cannot watch '{name}'")
+    if name not in COMMANDS and name not in SYS_COMMANDS and name not in pipeline.FILTERS:
+        raise ValueError(f"watch: unknown command '{name}'")
+    return _iter_watch(line, parsed, interval, count)
+
+
+def _iter_watch(line, parsed, interval, count):
+    from . import pipeline
+    from .jobs import mark_streaming, on_cancel
+    stop = threading.Event()
+    unregister = on_cancel(stop.set)  # Wake up from the sleep when the job is cancelled
+    mark_streaming()  # Runs until cancelled; the job's ring keeps the latest frames
+    web = current_session().mode == 'web'
+    runs = 0
+    try:
+        while True:
+            started = time.monotonic()
+            header = f"Every {interval:g}s: {line}    {time.strftime('%H:%M:%S')}"
+            if web:
+                # The browser appends output, so frames are separated rather than redrawn
+                yield ('\n' if runs else '') + header + '\n\n'
+            else:
+                yield f"\033[H\033[2J{Fore.CYAN}{header}{Style.RESET_ALL}\n\n"
+            yield from pipeline.run(parsed)
+            runs += 1
+            if count and runs >= count:
+                return
+            # Fixed rate: the interval counts from the start of each run
+            if stop.wait(max(0.0, interval - (time.monotonic() - started))):
+                return
+    finally:
+        unregister()
+
+
 def write_file(args):
     """Write content to file: write filename "content" """
     if len(args) < 2:
@@ -453,7 +764,7 @@ def write_file(args):
     # Handle escape sequences
     content = content.replace('\\n', '\n').replace('\\t', '\t')
     
-    with open(filename, 'w') as f:
+    with open(resolve_path(filename), 'w') as f:
         f.write(content)
     
     return f"Content written to {filename}"
@@ -465,146 +776,459 @@ def clear(args):
     return f"{Fore.GREEN}🧹 Screen cleared{Style.RESET_ALL}\n" + "\n" * 30
 
 
+def _parse_walk_options(args, max_depth=None, include_hidden=True):
+    """Split directory walker options from positional arguments.
+
+    Recognizes -L/--depth N, -a/--all, --no-hidden, --exclude GLOB
+    (repeatable) and --max N.
+    """
+    options = {'max_depth': max_depth, 'include_hidden': include_hidden, 'exclude': [], 'max_results': None}
+    positional = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-L', '--depth', '--exclude', '--max'):
+            if i + 1 >= len(args):
+                raise ValueError(f"option '{arg}' requires a value")
+            value = args[i + 1]
+            i += 2
+            if arg == '--exclude':
+                options['exclude'].append(value)
+                continue
+            if not value.isdigit() or int(value) < 1:
+                raise ValueError(f"option '{arg}' expects a positive number, got '{value}'")
+            options['max_results' if arg == '--max' else 'max_depth'] = int(value)
+        elif arg in ('-a', '--all'):
+            options['include_hidden'] = True
+            i += 1
+        elif arg == '--no-hidden':
+            options['include_hidden'] = False
+            i += 1
+        else:
+            positional.append(arg)
+            i += 1
+    return positional, options
+
+
 def tree(args):
     """Print a tree view of files & folders"""
-    path = args[0] if args else '.'
+    from .walker import walk
     
     try:
-        tree_view = Tree(f"📁 {os.path.abspath(path)}")
+        positional, options = _parse_walk_options(args, max_depth=3, include_hidden=False)
+        path = resolve_path(positional[0] if positional else '.')
         
-        def add_tree_items(tree_node, dir_path, max_depth=3, current_depth=0):
-            if current_depth >= max_depth:
-                return
-            
-            try:
-                items = sorted(os.listdir(dir_path))
-                for item in items:
-                    if item.startswith('.'):
-                        continue
-                    item_path = os.path.join(dir_path, item)
-                    if os.path.isdir(item_path):
-                        branch = tree_node.add(f"📁 {item}")
-                        add_tree_items(branch, item_path, max_depth, current_depth + 1)
-                    else:
-                        tree_node.add(f"📄 {item}")
-            except PermissionError:
+        # Walk in parallel, then lay the entries out in sorted order
+        children = {}
+        errors = {}
+        truncated = False
+        limit = options['max_results']
+        if limit:
+            options['max_results'] = limit + 1  # One extra tells whether anything was left out
+        entries = walk(path, on_error=lambda p, e: errors.setdefault(p, e), **options)
+        for count, entry in enumerate(entries, 1):
+            if limit and count > limit:
+                truncated = True
+                continue
+            children.setdefault(entry.parent, []).append(entry)
+        
+        if path in errors and not isinstance(errors[path], PermissionError):
+            raise errors[path]
+        
+        tree_view = Tree(f"📁 {path}")
+        
+        def add_tree_items(tree_node, dir_path):
+            if isinstance(errors.get(dir_path), PermissionError):
                 tree_node.add("❌ Permission denied")
+            for entry in sorted(children.get(dir_path, ()), key=lambda e: e.name):
+                if entry.is_dir:
+                    branch = tree_node.add(f"📁 {entry.name}")
+                    add_tree_items(branch, entry.path)
+                else:
+                    tree_node.add(f"📄 {entry.name}")
         
         add_tree_items(tree_view, path)
+        if truncated:
+            tree_view.add(f"… stopped after {limit} entries")
         
-        with console.capture() as capture:
-            console.print(tree_view)
-        return capture.get()
+        return tree_view
         
     except Exception as e:
-        return f"{Fore.RED}tree: {e}{Style.RESET_ALL}"
+        return error_text(f"tree: {e}")
 
 
 def search(args):
-    """Search filenames matching a pattern"""
-    if not args:
-        return f"{Fore.RED}search: missing search pattern{Style.RESET_ALL}"
+    """Search filenames matching a pattern (substring, glob or --regex)"""
+    from . import file_index
+    
+    if '--index-stats' in args:
+        return _format_index_stats(file_index.get_index().stats())
+    if '--rebuild-index' in args:
+        rest = [arg for arg in args if arg != '--rebuild-index']
+        root = resolve_path(rest[0] if rest else '.')
+        try:
+            counts = file_index.get_index().rebuild(root)
+        except ValueError as e:
+            return error_text(f"search: {e}")
+        return (f"{Fore.GREEN}[OK] Indexed {counts['entries']} entries in {counts['dirs']} directories "
+                f"under {root} ({counts['seconds']:.2f}s){Style.RESET_ALL}")
+    
+    regex = '--regex' in args or '-r' in args
+    use_index = '--no-index' not in args
+    try:
+        positional, options = _parse_walk_options([arg for arg in args if arg not in ('--regex', '-r', '--no-index')])
+    except ValueError as e:
+        return error_text(f"search: {e}")
+    if not positional:
+        return error_text("search: missing search pattern")
     
-    pattern = args[0].lower()
-    path = args[1] if len(args) > 1 else '.'
+    pattern = positional[0]
+    path = positional[1] if len(positional) > 1 else '.'
+    try:
+        matcher = file_index.make_name_matcher(pattern, regex=regex)
+    except Exception as e:
+        return error_text(f"search: invalid pattern: {e}")
+    
+    base = resolve_path(path)
+    # The index only answers plain searches; walker limits need a real walk
+    walk_limits = options['max_depth'] or options['exclude'] or not options['include_hidden']
+    if use_index and not walk_limits and os.path.exists(file_index.get_index_path()):
+        index = file_index.get_index()
+        if index.covering_root(base):
+            matches = _iter_index_matches(index, base, path, pattern, regex)
+            return _iter_search(itertools.islice(matches, options['max_results']), pattern)
+    return _iter_search(_iter_walk_matches(base, path, matcher, options), pattern)
+
+
+def _display_path(base, path, full_path):
+    """Display a match relative to the search argument, as os.walk(path) would"""
+    rel = os.path.relpath(full_path, base)
+    return path if rel == '.' else os.path.join(path, rel)
+
+
+def _iter_walk_matches(base, path, matcher, options):
+    """Yield (display_path, is_dir) using the parallel directory walker"""
+    from .walker import walk
     
+    for entry in walk(base, match=lambda entry: matcher(entry.name), **options):
+        yield _display_path(base, path, entry.path), entry.is_dir
+
+
+def _iter_index_matches(index, base, path, pattern, regex):
+    """Yield (display_path, is_dir) from the persistent file index"""
+    for full_path, is_dir in index.query(base, pattern, regex=regex):
+        yield _display_path(base, path, full_path), is_dir
+
+
+def _iter_search(matches, pattern):
+    """Yield search matches as they are found, then a summary line"""
     try:
-        matches = []
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if pattern in file.lower():
-                    full_path = os.path.join(root, file)
-                    matches.append(f"{Fore.GREEN}📄 {full_path}{Style.RESET_ALL}")
-            for dir in dirs:
-                if pattern in dir.lower():
-                    full_path = os.path.join(root, dir)
-                    matches.append(f"{Fore.BLUE}📁 {full_path}/{Style.RESET_ALL}")
+        count = 0
+        for full_path, is_dir in matches:
+            count += 1
+            if is_dir:
+                yield f"{Fore.BLUE}📁 {full_path}/{Style.RESET_ALL}\n"
+            else:
+                yield f"{Fore.GREEN}📄 {full_path}{Style.RESET_ALL}\n"
         
-        if matches:
-            return f"{Fore.CYAN}🔍 Found {len(matches)} matches:\n{Style.RESET_ALL}" + '\n'.join(matches)
+        if count:
+            yield f"{Fore.CYAN}🔍 Found {count} matches{Style.RESET_ALL}\n"
         else:
-            return f"{Fore.YELLOW}🔍 No matches found for '{pattern}'{Style.RESET_ALL}"
+            yield f"{Fore.YELLOW}🔍 No matches found for '{pattern}'{Style.RESET_ALL}\n"
             
     except Exception as e:
-        return f"{Fore.RED}search: {e}{Style.RESET_ALL}"
+        yield error_text(f"search: {e}") + "\n"
+
+
+def _format_index_stats(stats):
+    """Format file index statistics"""
+    lines = [
+        f"{Fore.CYAN}🗂️  File index: {stats['db_path']} ({format_file_size(stats['db_size'])}){Style.RESET_ALL}",
+        f"  Files: {stats['files']}   Directories: {stats['dirs']}   "
+        f"Background refresh: {'running' if stats['refresher_running'] else 'stopped'}",
+    ]
+    if not stats['roots']:
+        lines.append("  No indexed roots; build one with: search --rebuild-index [path]")
+    for root in stats['roots']:
+        refreshed = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(root['refreshed']))
+        lines.append(f"  {root['path']}  (refreshed {refreshed}, last pass {root['duration']:.2f}s)")
+    return '\n'.join(lines)
+
+
+# Files per grep work item; batches amortize the worker round-trip
+GREP_BATCH_FILES = 32
+GREP_WORKERS = int(os.environ.get('TERMINAL_GREP_WORKERS', os.cpu_count() or 1))
+_grep_pool = None
+
+
+def _get_grep_pool():
+    """Return the shared grep process pool, starting it on first use"""
+    global _grep_pool
+    if _grep_pool is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        # forkserver avoids forking a process that already runs threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else None)
+        _grep_pool = ProcessPoolExecutor(max_workers=GREP_WORKERS, mp_context=context)
+    return _grep_pool
+
+
+# Walker options grep passes through to _parse_walk_options
+GREP_WALK_OPTIONS = ('-L', '--depth', '--exclude', '--all', '--no-hidden')
+
+
+def grep(args):
+    """Search file contents for a regular expression across a process pool"""
+    import re
+    
+    flags = set()
+    max_count = None
+    max_bytes = None
+    rest = []
+    literal = []  # Everything after '--', even if it starts with '-'
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-m', '--max-count', '--max', '--max-bytes'):
+            if i + 1 >= len(args) or not args[i + 1].isdigit() or int(args[i + 1]) < 1:
+                return error_text(f"grep: option '{arg}' expects a positive number")
+            if arg == '--max-bytes':
+                max_bytes = int(args[i + 1])
+            else:
+                max_count = int(args[i + 1])
+            i += 2
+            continue
+        if arg == '--':
+            literal = args[i + 1:]
+            break
+        if arg in GREP_WALK_OPTIONS:
+            rest.extend(args[i:i + 2] if arg in ('-L', '--depth', '--exclude') else [arg])
+            i += 2 if arg in ('-L', '--depth', '--exclude') else 1
+            continue
+        if arg.startswith('--'):
+            return error_text(f"grep: invalid option '{arg}'")
+        if arg.startswith('-') and len(arg) > 1:
+            unknown = set(arg[1:]) - set('iFlcvna')
+            if unknown:
+                return error_text(f"grep: invalid option -- '{sorted(unknown)[0]}'")
+            flags.update(arg[1:])
+            if 'a' in arg:
+                rest.append('-a')  # Hidden files are a walker option
+        else:
+            rest.append(arg)
+        i += 1
+    try:
+        positional, options = _parse_walk_options(rest, include_hidden=False)
+    except ValueError as e:
+        return error_text(f"grep: {e}")
+    positional += literal
+    if not positional:
+        return error_text("grep: missing pattern")
+    
+    pattern = positional[0]
+    source = pattern.encode('utf-8')
+    if 'F' in flags:
+        source = re.escape(source)
+    try:
+        regex = re.compile(source, re.MULTILINE | (re.IGNORECASE if 'i' in flags else 0))
+    except re.error as e:
+        return error_text(f"grep: invalid pattern: {e}")
+    
+    # --max on the walker would limit files, not matches
+    max_count = max_count or options.pop('max_results')
+    files = _iter_grep_files(positional[1:] or ['.'], options)
+    return _iter_grep(files, regex, pattern, flags, max_count, max_bytes)
+
+
+def _iter_grep_files(paths, options):
+    """Yield (display_path, full_path) for every file to scan"""
+    from .walker import walk
+    
+    for path in paths:
+        base = resolve_path(path)
+        if not os.path.isdir(base):
+            if not os.path.exists(base):
+                raise FileNotFoundError(f"{path}: No such file or directory")
+            yield path, base
+            continue
+        entries = walk(base, match=lambda entry: not entry.is_dir, **options)
+        for entry in entries:
+            yield _display_path(base, path, entry.path), entry.path
+
+
+def _iter_grep_results(files, regex, max_count, max_bytes, count_only, invert):
+    """Yield (display_path, matches, count or None) as files are scanned.
+
+    A handful of files is scanned in-process; larger trees are sent to the
+    process pool in batches, with a bounded number of batches in flight.
+    """
+    from .fileview import grep_files
+    
+    first = list(itertools.islice(files, GREP_BATCH_FILES))
+    second = list(itertools.islice(files, GREP_BATCH_FILES))
+    if not second:
+        names = dict((full, display) for display, full in first)
+        for full, matches in grep_files(list(names), regex, max_bytes, max_count, count_only, invert):
+            yield names[full], matches
+        return
+    
+    from concurrent.futures import FIRST_COMPLETED, wait
+    pool = _get_grep_pool()
+    batches = itertools.chain([first, second], iter(lambda: list(itertools.islice(files, GREP_BATCH_FILES)), []))
+    pending = {}
+    try:
+        while True:
+            while len(pending) < GREP_WORKERS * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    break
+                names = dict((full, display) for display, full in batch)
+                pending[pool.submit(grep_files, list(names), regex, max_bytes, max_count, count_only, invert)] = names
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                names = pending.pop(future)
+                for full, matches in future.result():
+                    yield names[full], matches
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _iter_grep(files, regex, pattern, flags, max_count, max_bytes):
+    """Yield grep results as they arrive: path:line:text, or -l / -c summaries"""
+    global _grep_pool
+    from concurrent.futures.process import BrokenProcessPool
+    
+    found = 0
+    # -l only needs one match per file, -c only needs counts
+    per_file = 1 if 'l' in flags else max_count
+    try:
+        for path, matches in _iter_grep_results(files, regex, per_file, max_bytes, 'c' in flags, 'v' in flags):
+            if not matches:
+                continue
+            if 'l' in flags:
+                found += 1
+                yield f"{Fore.MAGENTA}{path}{Style.RESET_ALL}\n"
+            elif 'c' in flags:
+                count = min(matches, max_count - found) if max_count else matches
+                found += count
+                yield f"{Fore.MAGENTA}{path}{Style.RESET_ALL}:{count}\n"
+            else:
+                if max_count:
+                    matches = matches[:max_count - found]
+                found += len(matches)
+                yield ''.join(f"{Fore.MAGENTA}{path}{Style.RESET_ALL}:{Fore.GREEN}{number}{Style.RESET_ALL}:{line}\n"
+                              for number, line in matches)
+            if max_count and found >= max_count:
+                yield f"{Fore.YELLOW}-- stopped after {max_count} matches --{Style.RESET_ALL}\n"
+                return
+        if not found:
+            yield f"{Fore.YELLOW}🔍 No matches found for '{pattern}'{Style.RESET_ALL}\n"
+    except BrokenProcessPool:
+        _grep_pool = None  # Start a fresh pool next time
+        yield error_text("grep: worker process died") + "\n"
+    except Exception as e:
+        yield error_text(f"grep: {e}") + "\n"
 
 
 def sysinfo(args):
     """Show OS, Python version, uptime"""
     try:
-        import sys
-        import psutil
+        from .system_monitor import get_host_facts, sampler
         
-        table = Table(title="🖥️ System Information")
-        table.add_column("Property", style="cyan")
-        table.add_column("Value", style="green")
+        host = get_host_facts()
+        info = KeyValues(title="🖥️ System Information")
         
-        # Basic system info
-        table.add_row("Operating System", platform.platform())
-        table.add_row("Architecture", platform.architecture()[0])
-        table.add_row("Processor", platform.processor() or "Unknown")
-        table.add_row("Python Version", sys.version.split()[0])
-        table.add_row("Current Directory", os.getcwd())
+        # Basic system info (gathered once per process)
+        info.add("Operating System", host['os'])
+        info.add("Architecture", host['architecture'])
+        info.add("Processor", host['processor'])
+        info.add("Python Version", host['python'])
+        info.add("Current Directory", current_session().cwd)
         
         # System stats
-        boot_time = psutil.boot_time()
-        uptime = time.time() - boot_time
+        uptime = time.time() - host['boot_time']
         uptime_str = f"{int(uptime // 86400)}d {int((uptime % 86400) // 3600)}h {int((uptime % 3600) // 60)}m"
-        table.add_row("Uptime", uptime_str)
+        info.add("Uptime", uptime_str)
         
-        memory = psutil.virtual_memory()
-        table.add_row("Total Memory", f"{memory.total // (1024**3)} GB")
-        table.add_row("Available Memory", f"{memory.available // (1024**3)} GB")
-        table.add_row("CPU Cores", str(psutil.cpu_count()))
+        # Memory and load come from the background sampler's latest sample
+        sample = sampler.latest()
+        info.add("Total Memory", f"{sample['mem_total'] // (1024**3)} GB")
+        info.add("Available Memory", f"{sample['mem_available'] // (1024**3)} GB")
+        info.add("CPU Usage", f"{sample['cpu']}%")
+        if sample['load']:
+            info.add("Load Average", " ".join(f"{value:.2f}" for value in sample['load']))
+        info.add("CPU Cores", str(host['cores']))
         
-        with console.capture() as capture:
-            console.print(table)
-        return capture.get()
+        # The rows only change when the sampler takes a new sample (or the
+        # cwd or uptime minute changes), so calls in between reuse the render
+        info.cache_key = 'sysinfo'
+        info.cache_version = tuple(info.pairs)
+        return info
         
     except Exception as e:
-        return f"{Fore.RED}❌ sysinfo: {e}{Style.RESET_ALL}"
+        return error_text(f"❌ sysinfo: {e}")
 
 
 def history_cmd(args):
-    """Show command history"""
-    log_command("history")
-    try:
-        if not os.path.exists('.terminal_history'):
-            return f"{Fore.YELLOW}📜 No command history found{Style.RESET_ALL}"
-        
-        table = Table(title="📜 Command History")
-        table.add_column("Time", style="cyan")
-        table.add_column("Command", style="green")
-        
-        with open('.terminal_history', 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        # Show last 20 commands by default
-        limit = 20
-        if args and args[0].isdigit():
-            limit = int(args[0])
-            
-        for line in lines[-limit:]:
-            if line.strip():
-                parts = line.strip().split('] ', 1)
-                if len(parts) == 2:
-                    timestamp = parts[0].replace('[', '')
-                    command = parts[1]
-                    table.add_row(timestamp, command)
-        
-        with console.capture() as capture:
-            console.print(table)
-        return capture.get()
-        
-    except Exception as e:
-        return f"{Fore.RED}❌ Error reading history: {e}{Style.RESET_ALL}"
+    """Show command history: history [N] [--grep PATTERN] [--since TIME]"""
+    import re
+    from .history import HistoryStore, get_history_writer, parse_since
+    
+    limit = 20
+    pattern = None
+    since = None
+    ignore_case = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--grep', '--since', '-n') and i + 1 < len(args):
+            value = args[i + 1]
+            if arg == '--grep':
+                pattern = value
+            elif arg == '--since':
+                since = parse_since(value)
+            elif value.isdigit():
+                limit = int(value)
+            else:
+                raise ValueError(f"history: invalid count: {value}")
+            i += 2
+            continue
+        if arg == '-i':
+            ignore_case = True
+        elif arg.isdigit():
+            limit = int(arg)
+        else:
+            raise ValueError(f"history: unknown argument '{arg}'")
+        i += 1
+    
+    grep = None
+    if pattern is not None:
+        try:
+            grep = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"history: invalid pattern: {e}")
+    
+    writer = get_history_writer()
+    writer.flush()  # Include commands still waiting in the queue
+    entries = HistoryStore(writer.path).tail(limit, grep=grep, since=since)
+    if not entries:
+        return f"{Fore.YELLOW}📜 No command history found{Style.RESET_ALL}"
+    return Table([Column("TIME", style="cyan"), Column("COMMAND", style="green")], entries, header=False)
 
 
 def help_cmd(args):
     """Show available commands"""
-    from .system_monitor import SYS_COMMANDS
-    is_web_mode = os.environ.get('TERMINAL_MODE') == 'web'
-    
+    from .render import render_cache
+    mode = current_session().mode
+    # The text only depends on the mode (and width), so build it once
+    return render_cache.get('help', mode, lambda: _build_help(mode == 'web'))
+
+
+def _build_help(is_web_mode):
     if is_web_mode:
         # Simple text format for web
         result = "AVAILABLE COMMANDS\n"
@@ -631,13 +1255,15 @@ def help_cmd(args):
         result += "SYSTEM MONITORING:\n"
         result += "  cpu        - Show CPU usage\n"
         result += "  mem        - Show memory usage\n"
-        result += "  ps         - List processes\n"
+        result += "  ps         - List processes (ps --sort cpu -n 10)\n"
+        result += "  top        - Show the busiest processes\n"
         result += "  sysinfo    - Show system information\n\n"
         
         result += "UTILITIES:\n"
         result += "  tree       - Show directory tree\n"
         result += "  search <pattern> - Search for files\n"
         result += "  history    - Show command history\n"
+        result += "  watch <command> [interval] - Re-run a command every few seconds\n"
         result += "  clear      - Clear screen\n"
         result += "  help       - Show this help\n"
         result += "  exit       - Exit terminal\n"
@@ -645,6 +1271,7 @@ def help_cmd(args):
         return result
     else:
         # Rich table for CLI
+        from rich.table import Table
         table = Table(title=">> AVAILABLE COMMANDS")
         table.add_column("COMMAND", style="cyan", no_wrap=True)
         table.add_column("DESCRIPTION", style="green")
@@ -675,7 +1302,8 @@ def help_cmd(args):
         table.add_row("[bold cyan]SYSTEM MONITORING[/bold cyan]", "", "")
         table.add_row("cpu", "Show CPU usage", "cpu")
         table.add_row("mem", "Show memory usage", "mem")
-        table.add_row("ps", "List processes", "ps")
+        table.add_row("ps", "List processes", "ps --sort rss -n 10")
+        table.add_row("top", "Show the busiest processes", "top")
         table.add_row("sysinfo", "Show system information", "sysinfo")
         
         # Utilities
@@ -683,13 +1311,12 @@ def help_cmd(args):
         table.add_row("tree", "Show directory tree", "tree")
         table.add_row("search", "Search for files", "search pattern")
         table.add_row("history", "Show command history", "history 10")
+        table.add_row("watch", "Re-run a command every few seconds", "watch \"ps --sort cpu -n 5\" 1")
         table.add_row("clear", "Clear screen", "clear")
         table.add_row("help", "Show this help", "help")
         table.add_row("exit", "Exit terminal", "exit")
         
-        with console.capture() as capture:
-            console.print(table)
-        return capture.get()
+        return render_rich(table)
 
 
 COMMANDS = {
@@ -708,6 +1335,12 @@ COMMANDS = {
     'execute': run,  # alias for run
     'tree': tree,
     'search': search,
+    'grep': grep,
+    'jobs': jobs_cmd,
+    'fg': fg,
+    'wait': wait_cmd,
+    'kill': kill_cmd,
+    'watch': watch_cmd,
     'sysinfo': sysinfo,
     'history': history_cmd,
     'clear': clear,
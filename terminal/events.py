@@ -0,0 +1,161 @@
+"""
+Server-push status events for the web UI.
+
+One collector thread reads the AI rate-limit status and the latest
+system metrics sample every ``TERMINAL_EVENTS_INTERVAL`` seconds
+(default 2) and fans the result out to every subscriber, so N open tabs
+cost one read per tick instead of N polls. The collector only runs
+while someone is subscribed. Each subscriber has a small queue; a slow
+client loses the oldest events rather than holding up the others, which
+is fine because every event is a full snapshot.
+
+``main.py`` serves the stream as Server-Sent Events on ``/events``.
+"""
+import json
+import os
+import queue
+import threading
+import time
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Event"""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in json.dumps(data).splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+def collect_status():
+    """Rate-limit status plus the current metrics sample"""
+    from .ai_parser import get_rate_limit_status
+    from .system_monitor import sampler
+    sample = sampler.latest()
+    return {
+        'time': time.time(),
+        'rate_limit': get_rate_limit_status(),
+        'metrics': {
+            'cpu': sample['cpu'],
+            'mem_percent': sample['mem_percent'],
+            'mem_used': sample['mem_used'],
+            'mem_total': sample['mem_total'],
+            'load': sample['load'],
+        },
+    }
+
+
+class Subscription:
+    """One subscriber's queue of (id, event, data)"""
+
+    def __init__(self, hub, max_pending):
+        self._hub = hub
+        self._queue = queue.Queue(maxsize=max_pending)
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()  # Drop the oldest snapshot
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        """Next event, or None if nothing arrived within ``timeout``"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    """Shared collector broadcasting status snapshots to subscribers"""
+
+    def __init__(self, interval=2.0, max_pending=8, collect=collect_status):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.collect = collect
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._last = None
+        self._ids = 0
+        self.stats = {'collections': 0, 'errors': 0, 'published': 0}
+
+    def subscribe(self):
+        """Register a subscriber; it gets the latest snapshot right away"""
+        subscription = Subscription(self, self.max_pending)
+        with self._lock:
+            self._subscribers.add(subscription)
+            if self._last is not None:
+                subscription.put(self._last)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='terminal-events', daemon=True)
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                self._wakeup.set()
+
+    def publish(self, event, data):
+        """Send an event to every current subscriber"""
+        with self._lock:
+            self._ids += 1
+            item = (self._ids, event, data)
+            if event == 'status':
+                self._last = item
+            subscribers = list(self._subscribers)
+            self.stats['published'] += 1
+        for subscription in subscribers:
+            subscription.put(item)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            try:
+                data = self.collect()
+                self.stats['collections'] += 1
+                self.publish('status', data)
+            except Exception:
+                self.stats['errors'] += 1  # Try again next tick
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stream(self, subscription, keepalive=15.0):
+        """Yield SSE text for a subscription until the consumer stops"""
+        try:
+            yield f"retry: {int(self.interval * 2000)}\n\n"
+            while True:
+                item = subscription.get(timeout=keepalive)
+                if item is None:
+                    yield ": keepalive\n\n"  # Lets the server notice closed connections
+                    continue
+                event_id, event, data = item
+                yield format_sse(event, data, event_id)
+        finally:
+            subscription.close()
+
+    def get_status(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+            running = self._thread is not None
+        return {'subscribers': subscribers, 'running': running, 'interval': self.interval, **self.stats}
+
+
+event_hub = EventHub(interval=float(os.environ.get('TERMINAL_EVENTS_INTERVAL', 2.0)))
+
+
+def get_events_status():
+    return event_hub.get_status()
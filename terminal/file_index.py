@@ -0,0 +1,304 @@
+"""
+Persistent filename index backing the search command.
+
+The index lives in a SQLite database (``TERMINAL_INDEX_PATH``, default
+``~/.python_terminal/file_index.db``). It is built with
+``search --rebuild-index [path]`` and kept fresh by a background thread
+that rescans only directories whose mtime changed.
+"""
+import fnmatch
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.python_terminal', 'file_index.db')
+REFRESH_INTERVAL = float(os.environ.get('TERMINAL_INDEX_INTERVAL', 60))
+# Directories written per transaction by a rebuild
+REBUILD_BATCH_DIRS = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (path TEXT PRIMARY KEY, built REAL, refreshed REAL, duration REAL);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL);
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+"""
+
+
+def get_index_path():
+    """Return the configured location of the index database"""
+    return os.environ.get('TERMINAL_INDEX_PATH', DEFAULT_INDEX_PATH)
+
+
+def is_glob(pattern):
+    """Return True if the pattern uses glob wildcards"""
+    return any(ch in pattern for ch in '*?[')
+
+
+def make_name_matcher(pattern, regex=False):
+    """Build a case-insensitive predicate for file names.
+
+    Glob patterns (``*.py``) match the whole name, ``regex=True`` searches
+    with a regular expression, anything else is a substring match.
+    """
+    if regex:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return lambda name: compiled.search(name) is not None
+    if is_glob(pattern):
+        compiled = re.compile(fnmatch.translate(pattern.lower()))
+        return lambda name: compiled.match(name.lower()) is not None
+    pattern = pattern.lower()
+    return lambda name: pattern in name.lower()
+
+
+def _scan_dir(path):
+    """Return (mtime, [(name, is_dir), ...]) for one directory"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    return os.stat(path).st_mtime, entries
+
+
+def _iter_subtree(root):
+    """Yield (path, mtime, entries) for every readable directory under ``root``"""
+    stack = [root]
+    while stack:
+        path = stack.pop()
+        try:
+            mtime, entries = _scan_dir(path)
+        except OSError:
+            continue
+        yield path, mtime, entries
+        stack.extend(os.path.join(path, name) for name, is_dir in entries if is_dir)
+
+
+class FileIndex:
+    """SQLite-backed filename index with incremental, mtime-based refresh"""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or get_index_path()
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        # One writer connection shared under a lock; queries open their own
+        # read connections so WAL lets them run alongside the refresher
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # Building and refreshing
+
+    def rebuild(self, root):
+        """Drop and re-index everything under ``root``.
+
+        The tree is walked without holding the lock and written in short
+        batches, so searches and the refresher are never blocked for the
+        whole rebuild. ``root`` is only registered once it is complete;
+        until then searches below it walk the tree.
+        """
+        root = os.path.abspath(root)
+        if not os.path.isdir(root):
+            raise ValueError(f"{root}: not a directory")
+        start = time.time()
+        with self._lock, self._conn:
+            self._forget_subtree(root)
+            self._conn.execute('DELETE FROM roots WHERE path = ? OR (path >= ? AND path < ?)', (root, *_subtree_range(root)))
+        counts = {'dirs': 0, 'entries': 0}
+        batch = []
+        for scanned in _iter_subtree(root):
+            batch.append(scanned)
+            if len(batch) >= REBUILD_BATCH_DIRS:
+                self._write_batch(batch, counts)
+                batch = []
+        self._write_batch(batch, counts)
+        with self._lock, self._conn:
+            now = time.time()
+            # Re-indexing part of an existing root keeps the outer root
+            if self.covering_root(root) in (None, root):
+                self._conn.execute('INSERT OR REPLACE INTO roots VALUES (?, ?, ?, ?)', (root, now, now, now - start))
+        counts['seconds'] = time.time() - start
+        return counts
+
+    def _write_batch(self, scanned, counts):
+        """Store scanned directories in one transaction"""
+        if scanned:
+            with self._lock, self._conn:
+                for path, mtime, entries in scanned:
+                    self._store_dir(path, mtime, entries, counts)
+
+    def refresh(self):
+        """Rescan directories whose mtime changed since they were indexed"""
+        counts = {'dirs': 0, 'entries': 0, 'checked': 0}
+        with self._lock:
+            roots = [row[0] for row in self._conn.execute('SELECT path FROM roots')]
+        for root in roots:
+            start = time.time()
+            with self._lock:
+                dirs = self._conn.execute(
+                    'SELECT path, mtime FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', (root, *_subtree_range(root))
+                ).fetchall()
+            for path, mtime in dirs:
+                counts['checked'] += 1
+                try:
+                    current = os.stat(path).st_mtime
+                except OSError:
+                    current = None
+                if current == mtime:
+                    continue
+                with self._lock, self._conn:
+                    if current is None:
+                        self._forget_subtree(path)
+                    else:
+                        self._update_dir(path, counts)
+            with self._lock, self._conn:
+                self._conn.execute('UPDATE roots SET refreshed = ?, duration = ? WHERE path = ?',
+                                   (time.time(), time.time() - start, root))
+        return counts
+
+    def _index_subtree(self, root, counts):
+        for path, mtime, entries in _iter_subtree(root):
+            self._store_dir(path, mtime, entries, counts)
+
+    def _store_dir(self, path, mtime, entries, counts):
+        self._conn.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?)', (path, mtime))
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+            [(os.path.join(path, name), path, name, int(is_dir)) for name, is_dir in entries]
+        )
+        counts['dirs'] += 1
+        counts['entries'] += len(entries)
+
+    def _update_dir(self, path, counts):
+        """Diff one changed directory against the index"""
+        try:
+            mtime, entries = _scan_dir(path)
+        except OSError:
+            self._forget_subtree(path)
+            return
+        current = dict(entries)
+        known = dict(self._conn.execute('SELECT name, is_dir FROM entries WHERE parent = ?', (path,)))
+        for name, was_dir in known.items():
+            if name not in current or bool(was_dir) != current[name]:
+                child = os.path.join(path, name)
+                self._conn.execute('DELETE FROM entries WHERE path = ?', (child,))
+                if was_dir:
+                    self._forget_subtree(child)
+        for name, is_dir in entries:
+            if name in known and bool(known[name]) == is_dir:
+                continue
+            child = os.path.join(path, name)
+            self._conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', (child, path, name, int(is_dir)))
+            counts['entries'] += 1
+            if is_dir:
+                self._index_subtree(child, counts)
+        self._conn.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?)', (path, mtime))
+        counts['dirs'] += 1
+
+    def _forget_subtree(self, path):
+        lo, hi = _subtree_range(path)
+        self._conn.execute('DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)', (path, lo, hi))
+        self._conn.execute('DELETE FROM entries WHERE parent = ? OR (parent >= ? AND parent < ?)', (path, lo, hi))
+
+    # Queries
+
+    def covering_root(self, path):
+        """Return the indexed root containing ``path``, or None"""
+        path = os.path.abspath(path)
+        with self._lock:
+            for (root,) in self._conn.execute('SELECT path FROM roots'):
+                if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                    return root
+        return None
+
+    def query(self, base, pattern, regex=False):
+        """Yield (path, is_dir) for indexed entries under ``base`` matching ``pattern``"""
+        base = os.path.abspath(base)
+        if regex:
+            compiled = re.compile(pattern, re.IGNORECASE)
+            clause, value = 'name REGEXP ?', pattern
+        elif is_glob(pattern):
+            clause, value = 'lower(name) GLOB ?', pattern.lower()
+        else:
+            clause, value = "name LIKE ? ESCAPE '\\'", '%' + _escape_like(pattern) + '%'
+        sql = (f'SELECT path, is_dir FROM entries WHERE (parent = ? OR (parent >= ? AND parent < ?)) '
+               f'AND {clause} ORDER BY path')
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if regex:
+                conn.create_function('REGEXP', 2, lambda _, name: compiled.search(name) is not None)
+            rows = conn.execute(sql, (base, *_subtree_range(base), value))
+            while True:
+                batch = rows.fetchmany(500)
+                if not batch:
+                    break
+                for path, is_dir in batch:
+                    yield path, bool(is_dir)
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Return index statistics"""
+        with self._lock:
+            roots = self._conn.execute('SELECT path, built, refreshed, duration FROM roots ORDER BY path').fetchall()
+            dirs = self._conn.execute('SELECT count(*) FROM dirs').fetchone()[0]
+            files = self._conn.execute('SELECT count(*) FROM entries WHERE is_dir = 0').fetchone()[0]
+        size = sum(os.path.getsize(p) for p in (self.db_path, self.db_path + '-wal') if os.path.exists(p))
+        return {
+            'db_path': self.db_path,
+            'db_size': size,
+            'roots': [{'path': r[0], 'built': r[1], 'refreshed': r[2], 'duration': r[3]} for r in roots],
+            'dirs': dirs,
+            'files': files,
+            'refresher_running': bool(_refresher and _refresher.is_alive()),
+        }
+
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _subtree_range(path):
+    """Return (lo, hi) so that lo <= p < hi selects every path below ``path``"""
+    prefix = path.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+_index = None
+_index_lock = threading.Lock()
+_refresher = None
+
+
+def get_index():
+    """Return the process-wide index, starting the background refresher"""
+    global _index, _refresher
+    with _index_lock:
+        if _index is None or _index.db_path != get_index_path():
+            _index = FileIndex()
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_refresh_loop, name='file-indexer', daemon=True)
+            _refresher.start()
+        return _index
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        try:
+            _index.refresh()
+        except Exception:
+            pass  # Keep the indexer alive; the next pass retries
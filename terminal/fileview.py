@@ -0,0 +1,216 @@
+"""
+Memory-mapped, bounded readers used by the cat and grep commands.
+
+Every reader yields decoded text in chunks, so output stays bounded in
+memory regardless of the file size. The grep scanners run in worker
+processes, so this module must stay cheap to import.
+"""
+import codecs
+import mmap
+import os
+
+CHUNK_SIZE = 64 * 1024
+SNIFF_SIZE = 8 * 1024
+# Hard cap on how much a single cat invocation may emit
+MAX_OUTPUT_BYTES = int(os.environ.get('TERMINAL_CAT_MAX_BYTES', 8 * 1024 * 1024))
+
+
+def is_binary(path):
+    """Cheaply detect binary files from their first block"""
+    with open(path, 'rb') as f:
+        block = f.read(SNIFF_SIZE)
+    return b'\x00' in block
+
+
+class MappedFile:
+    """Read-only memory map of a file that also handles empty files"""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+
+    def close(self):
+        if self.size:
+            self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def line_end(self, offset, lines):
+        """Return the byte offset just past ``lines`` lines starting at ``offset``"""
+        for _ in range(lines):
+            newline = self.map.find(b'\n', offset)
+            if newline == -1:
+                return self.size
+            offset = newline + 1
+        return offset
+
+    def line_count(self):
+        """Number of lines; a last line without a trailing newline counts too"""
+        if not self.size:
+            return 0
+        return _count_newlines(self.map, 0, self.size) + (self.map[self.size - 1:self.size] != b'\n')
+
+    def tail_start(self, lines):
+        """Scan backwards from EOF to find the offset of the last ``lines`` lines"""
+        end = self.size
+        # A trailing newline terminates the last line rather than starting a new one
+        if end and self.map[end - 1:end] == b'\n':
+            end -= 1
+        for _ in range(lines):
+            newline = self.map.rfind(b'\n', 0, end)
+            if newline == -1:
+                return 0
+            end = newline
+        return end + 1
+
+
+def iter_bytes(mapped, start, end, limit=MAX_OUTPUT_BYTES):
+    """Yield text decoded from ``mapped[start:end]`` in fixed-size chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    end = min(end, mapped.size)
+    stop = min(end, start + limit)
+    offset = start
+    while offset < stop:
+        chunk = mapped.map[offset:min(offset + CHUNK_SIZE, stop)]
+        offset += len(chunk)
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+    if stop < end:
+        yield (f"\n-- output truncated after {limit} bytes; "
+               f"use --bytes, --head, --tail or --page to view the rest --\n")
+
+
+def iter_lines(mapped, first_line, count, limit=MAX_OUTPUT_BYTES):
+    """Yield ``count`` lines starting at the 0-based ``first_line``"""
+    start = mapped.line_end(0, first_line)
+    yield from iter_bytes(mapped, start, mapped.line_end(start, count), limit)
+
+
+# Longest line grep reports; the rest of a huge (minified) line is elided
+MAX_LINE_BYTES = 1000
+
+
+def _count_newlines(buf, start, end, step=1024 * 1024):
+    """Count newlines in ``buf[start:end]`` without copying it all at once"""
+    total = 0
+    for offset in range(start, end, step):
+        total += buf[offset:min(offset + step, end)].count(b'\n')
+    return total
+
+
+def grep_file(path, regex, max_bytes=None, max_count=None, count_only=False, invert=False):
+    """Return [(line_number, line), ...] for lines matching a bytes ``regex``.
+
+    Returns None for binary files (NUL in the first block). Only the first
+    ``max_bytes`` bytes are scanned and at most ``max_count`` matching
+    lines are returned. ``count_only`` returns just the number of matching
+    lines, skipping line numbers and decoding. ``invert`` selects the lines
+    that do not match instead.
+    """
+    with MappedFile(path) as mapped:
+        data = mapped.map
+        if b'\x00' in data[:SNIFF_SIZE]:
+            return None
+        end = mapped.size if max_bytes is None else min(mapped.size, max_bytes)
+        if invert:
+            return _grep_inverted(data, regex, end, max_count, count_only)
+        if count_only:
+            return _count_matching_lines(data, regex, end, max_count)
+        matches = []
+        line_number = 1
+        counted = 0  # newlines before this offset are already in line_number
+        for line_start, line_end in _iter_matching_lines(data, regex, end):
+            line_number += _count_newlines(data, counted, line_start)
+            counted = line_start
+            matches.append((line_number, _decode_line(data, line_start, line_end)))
+            if max_count and len(matches) >= max_count:
+                break
+        return matches
+
+
+def _iter_matching_lines(data, regex, end):
+    """Yield (line_start, line_end) for each line in ``data[:end]`` with a match.
+
+    The whole buffer is searched at once, so a match that runs past the end
+    of its line (``foo\\sbar`` across a newline) is checked again against
+    that line alone, and the empty "line" after a trailing newline is not
+    a line at all.
+    """
+    pos = 0
+    while pos < end:
+        match = regex.search(data, pos, end)
+        if match is None:
+            return
+        start = match.start()
+        if start == end and data[end - 1:end] == b'\n':
+            return
+        line_start = data.rfind(b'\n', pos, start) + 1 or pos
+        line_end = data.find(b'\n', start, end)
+        if line_end == -1:
+            line_end = end
+        if match.end() <= line_end or regex.search(data, start, line_end) is not None:
+            yield line_start, line_end
+        # One result per line: continue after this line
+        pos = line_end + 1
+
+
+def _decode_line(data, start, end):
+    line = data[start:min(end, start + MAX_LINE_BYTES)]
+    if end - start > MAX_LINE_BYTES:
+        line += b'...'
+    return line.rstrip(b'\r').decode('utf-8', errors='replace')
+
+
+def _grep_inverted(data, regex, end, max_count, count_only):
+    """Lines in ``data[:end]`` that do not match, checked one line at a time"""
+    matches = []
+    count = 0
+    line_number = 0
+    pos = 0
+    while pos < end:
+        line_end = data.find(b'\n', pos, end)
+        if line_end == -1:
+            line_end = end
+        line_number += 1
+        if regex.search(data, pos, line_end) is None:
+            count += 1
+            if not count_only:
+                matches.append((line_number, _decode_line(data, pos, line_end)))
+            if max_count and count >= max_count:
+                break
+        pos = line_end + 1
+    return count if count_only else matches
+
+
+def _count_matching_lines(data, regex, end, max_count):
+    count = 0
+    for _ in _iter_matching_lines(data, regex, end):
+        count += 1
+        if max_count and count >= max_count:
+            break
+    return count
+
+
+def grep_files(paths, regex, max_bytes=None, max_count=None, count_only=False, invert=False):
+    """Scan a batch of files, returning [(path, matches or None), ...].
+
+    Runs in a worker process; unreadable files are reported as None like
+    binary ones.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, grep_file(path, regex, max_bytes, max_count, count_only, invert)))
+        except (OSError, ValueError):
+            results.append((path, None))
+    return results
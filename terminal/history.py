@@ -0,0 +1,335 @@
+"""
+Command history log.
+
+Commands are appended to one file at a fixed location
+(``TERMINAL_HISTORY_PATH``, default ``~/.python_terminal/history``) as
+``[YYYY-mm-dd HH:MM:SS] command`` lines. ``HistoryWriter`` queues lines in
+memory and writes them in batches: when ``TERMINAL_HISTORY_FLUSH_LINES``
+lines (default 64) are waiting or every ``TERMINAL_HISTORY_FLUSH_INTERVAL``
+seconds (default 1), and at exit. ``TERMINAL_HISTORY_FSYNC`` picks the
+durability policy:
+
+* ``never``: leave it to the OS
+* ``flush``: fsync after every batch (the default)
+* ``always``: write and fsync every command immediately
+
+The file is opened with ``O_APPEND`` and every batch is a single write
+under an exclusive ``flock``, so several processes (gunicorn workers, two
+terminals) can log to it without interleaving lines.
+
+When the file grows past ``TERMINAL_HISTORY_MAX_BYTES`` (default 10 MiB)
+it is rotated to a timestamped segment and gzip-compressed in the
+background; ``TERMINAL_HISTORY_KEEP`` segments (default 5) are kept.
+``HistoryStore`` reads newest-first by seeking backwards from the end of
+the live file, so ``history`` costs O(lines shown), not O(file size).
+"""
+import atexit
+import glob
+import gzip
+import os
+import re
+import shutil
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: O_APPEND alone
+    fcntl = None
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.python_terminal', 'history')
+
+FSYNC_POLICIES = ('never', 'flush', 'always')
+
+
+def get_history_path():
+    """Return the configured location of the history file"""
+    return os.environ.get('TERMINAL_HISTORY_PATH', DEFAULT_PATH)
+
+
+def format_entry(command, timestamp=None):
+    """One history line: ``[YYYY-mm-dd HH:MM:SS] command``"""
+    when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+    # Keep one command per line whatever was typed
+    return f"[{when}] {' '.join(command.splitlines())}\n"
+
+
+class HistoryWriter:
+    """Batched, multi-process safe appender for the history file"""
+
+    def __init__(self, path=None, flush_interval=1.0, flush_lines=64, fsync='flush',
+                 max_bytes=10 * 1024 * 1024, keep=5):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"history: unknown fsync policy '{fsync}' (use {', '.join(FSYNC_POLICIES)})")
+        self.path = path or get_history_path()
+        self.flush_interval = flush_interval
+        self.flush_lines = flush_lines
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        self.keep = keep
+        self._pending = []
+        self._lock = threading.Lock()  # Guards _pending
+        self._write_lock = threading.Lock()  # Serializes writes from this process
+        self._fd = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._closed = False
+        self.stats = {'logged': 0, 'flushes': 0, 'errors': 0, 'rotations': 0}
+
+    def log(self, command):
+        """Queue a command; it reaches the file with the next batch"""
+        line = format_entry(command)
+        with self._lock:
+            self._pending.append(line)
+            self.stats['logged'] += 1
+            due = len(self._pending) >= self.flush_lines or self.fsync == 'always' or self._closed
+            if not due and self._thread is None:
+                self._thread = threading.Thread(target=self._flush_loop, name='terminal-history', daemon=True)
+                self._thread.start()
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far in one append"""
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return
+            try:
+                self._append(''.join(lines).encode('utf-8', 'replace'))
+                self.stats['flushes'] += 1
+            except OSError:
+                # History must never break a command; drop the batch
+                self.stats['errors'] += 1
+                self._reset_fd()
+
+    def _append(self, data):
+        while True:
+            fd = self._open()
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                if not self._is_current(fd):
+                    continue  # Another process rotated the file while we waited
+                view = memoryview(data)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+                if self.fsync != 'never':
+                    os.fsync(fd)
+                if self.max_bytes and os.fstat(fd).st_size >= self.max_bytes:
+                    self._rotate()
+                return
+            finally:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _is_current(self, fd):
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except OSError:
+            return False
+
+    def _rotate(self):
+        """Move the full file aside (we hold its lock) and compress it in the background"""
+        now = time.time()
+        # Sortable and unique: path.YYYYmmdd-HHMMSS.nanoseconds-pid
+        segment = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{time.time_ns() % 10 ** 9:09d}-{os.getpid()}"
+        os.rename(self.path, segment)
+        self.stats['rotations'] += 1
+        threading.Thread(target=compress_segment, args=(segment, self.path, self.keep),
+                         name='terminal-history-gzip', daemon=True).start()
+
+    def _open(self):
+        """Return the cached fd, reopening if the file was moved or deleted"""
+        if self._fd is not None:
+            if self._is_current(self._fd):
+                return self._fd
+            self._reset_fd()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        return self._fd
+
+    def _reset_fd(self):
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Flush and stop the background thread; later logs are written directly"""
+        self._closed = True
+        self._wakeup.set()
+        self.flush()
+        with self._write_lock:
+            self._reset_fd()
+
+    def get_status(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {'path': self.path, 'pending': pending, 'fsync': self.fsync,
+                'flush_interval': self.flush_interval, 'flush_lines': self.flush_lines,
+                'max_bytes': self.max_bytes, 'keep': self.keep, **self.stats}
+
+
+def compress_segment(segment, path, keep):
+    """gzip a rotated segment, then drop all but the newest ``keep`` segments"""
+    try:
+        with open(segment, 'rb') as source:
+            if fcntl:
+                # A writer that raced the rotation may still hold the lock briefly
+                fcntl.flock(source.fileno(), fcntl.LOCK_SH)
+            with gzip.open(segment + '.gz.tmp', 'wb') as target:
+                shutil.copyfileobj(source, target)
+        os.replace(segment + '.gz.tmp', segment + '.gz')
+        os.remove(segment)
+    except OSError:
+        return  # Left uncompressed; readers handle plain segments too
+    for old in list_segments(path)[keep:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+
+def list_segments(path):
+    """Rotated segments of ``path``, newest first"""
+    segments = []
+    for candidate in glob.glob(glob.escape(path) + '.*'):
+        if candidate.endswith('.tmp'):
+            continue
+        if candidate.endswith('.gz') and os.path.exists(candidate[:-3]):
+            continue  # Compression finished but the plain copy is not removed yet
+        segments.append(candidate)
+    # Names carry a sortable timestamp: path.YYYYmmdd-HHMMSS.ns-pid[.gz]
+    return sorted(segments, reverse=True)
+
+
+def iter_reverse_lines(path, block_size=64 * 1024):
+    """Yield a file's lines last to first, reading blocks backwards from EOF"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b''
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + tail).split(b'\n')
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line.decode('utf-8', 'replace')
+        if tail:
+            yield tail.decode('utf-8', 'replace')
+
+
+def _iter_segment_reversed(segment):
+    if segment.endswith('.gz'):
+        # Compressed segments cannot seek; they are bounded by max_bytes
+        with gzip.open(segment, 'rt', encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+        yield from (line for line in reversed(lines) if line)
+    else:
+        yield from iter_reverse_lines(segment)
+
+
+ENTRY_PATTERN = re.compile(r'\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] ?(.*)')
+
+RELATIVE_TIME = re.compile(r'^(\d+(?:\.\d+)?)\s*([smhdw])$')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_since(value, now=None):
+    """Parse ``--since``: ``30m``/``2h``/``7d``, ``today``, ``YYYY-mm-dd[ HH:MM[:SS]]``.
+
+    Returns the cutoff as a ``YYYY-mm-dd HH:MM:SS`` string, which compares
+    correctly against history timestamps.
+    """
+    now = time.time() if now is None else now
+    text = value.strip().lower()
+    match = RELATIVE_TIME.match(text)
+    if match:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now - float(match.group(1)) * UNIT_SECONDS[match.group(2)]))
+    if text == 'today':
+        return time.strftime('%Y-%m-%d 00:00:00', time.localtime(now))
+    for layout in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d'):
+        try:
+            return time.strftime('%Y-%m-%d %H:%M:%S', time.strptime(value.strip(), layout))
+        except ValueError:
+            continue
+    raise ValueError(f"history: invalid time '{value}' (use e.g. 30m, 2h, 7d, today or 2024-01-31 09:00)")
+
+
+class HistoryStore:
+    """Newest-first queries over the live history file and its segments"""
+
+    def __init__(self, path=None):
+        self.path = path or get_history_path()
+
+    def iter_entries(self):
+        """Yield (timestamp, command) newest first across all segments"""
+        for source in [self.path] + list_segments(self.path):
+            try:
+                for line in _iter_segment_reversed(source):
+                    match = ENTRY_PATTERN.match(line)
+                    if match:
+                        yield match.group(1), match.group(2)
+            except FileNotFoundError:
+                continue  # Rotated or pruned while we were listing
+
+    def tail(self, limit=20, grep=None, since=None):
+        """The last ``limit`` entries (oldest first), optionally filtered.
+
+        ``grep`` is a compiled regex or a substring; ``since`` a cutoff
+        from ``parse_since``. Reading stops at ``limit`` matches or at the
+        first entry older than ``since``.
+        """
+        if isinstance(grep, str):
+            needle = grep
+            matches = lambda command: needle in command
+        elif grep is not None:
+            matches = lambda command: grep.search(command) is not None
+        else:
+            matches = None
+        found = []
+        if limit <= 0:
+            return found
+        for timestamp, command in self.iter_entries():
+            if since is not None and timestamp < since:
+                break
+            if matches is None or matches(command):
+                found.append((timestamp, command))
+                if len(found) >= limit:
+                    break
+        found.reverse()
+        return found
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_history_writer():
+    """Return the process-wide writer configured from the environment"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = HistoryWriter(
+                flush_interval=float(os.environ.get('TERMINAL_HISTORY_FLUSH_INTERVAL', 1.0)),
+                flush_lines=int(os.environ.get('TERMINAL_HISTORY_FLUSH_LINES', 64)),
+                fsync=os.environ.get('TERMINAL_HISTORY_FSYNC', 'flush'),
+                max_bytes=int(os.environ.get('TERMINAL_HISTORY_MAX_BYTES', 10 * 1024 * 1024)),
+                keep=int(os.environ.get('TERMINAL_HISTORY_KEEP', 5)),
+            )
+            atexit.register(_writer.close)
+    return _writer
@@ -0,0 +1,331 @@
+"""
+Jobs: commands that run in the background under an ID.
+
+A job pulls its command's output chunks on a worker thread and buffers
+them, so the caller does not have to hold a connection open: the web
+client polls ``/jobs/<id>`` with an offset or reattaches to
+``/jobs/<id>/stream``, and the shell runs ``cmd &`` as a job and collects
+it with ``fg``/``wait``. Output is capped at ``TERMINAL_JOB_OUTPUT_LIMIT``
+bytes (default 1 MiB); a job that goes past the cap is stopped. Only the
+last ``TERMINAL_JOB_RING_BYTES`` (default 256 KiB) are kept in memory,
+in a ring; offsets keep counting so readers can tell what was dropped.
+Commands that are meant to run until cancelled (``watch``) call
+``mark_streaming`` and are bounded by the ring alone; one that nobody has
+polled or streamed for ``TERMINAL_JOB_IDLE_TIMEOUT`` seconds (default
+300) is stopped, so abandoned browser tabs do not hold the workers.
+At most ``TERMINAL_JOB_WORKERS`` jobs (default 4) run at once, the rest
+wait as ``queued``.
+
+Code that starts something a job cannot stop by itself (a script in a
+worker process, a subprocess) registers a callback with ``on_cancel``.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from colorama import Fore
+from .status import Status, track
+
+_current_job = ContextVar('terminal_job', default=None)
+
+# Finished jobs kept around for polling, per manager
+MAX_FINISHED = 50
+
+
+def current_job():
+    """The job whose command is running in this thread, if any"""
+    return _current_job.get()
+
+
+def on_cancel(callback):
+    """Run ``callback`` if the current job is cancelled.
+
+    Returns a function that unregisters it; once that returns the
+    callback is guaranteed not to run. Outside a job this does nothing.
+    """
+    job = _current_job.get()
+    if job is None:
+        return lambda: None
+    return job.add_cancel_callback(callback)
+
+
+def mark_streaming():
+    """Exempt the current job from the output cap.
+
+    For commands that print until they are cancelled; the ring still
+    bounds what is kept. Outside a job this does nothing.
+    """
+    job = _current_job.get()
+    if job is not None:
+        job.streaming = True
+
+
+class Job:
+    """One background command and its buffered output"""
+
+    def __init__(self, job_id, command, session_id=None, output_limit=1024 * 1024, ring_bytes=256 * 1024,
+                 idle_timeout=300):
+        self.id = job_id
+        self.command = command
+        self.session_id = session_id
+        self.output_limit = output_limit
+        self.ring_bytes = ring_bytes
+        self.idle_timeout = idle_timeout  # Streaming jobs only; 0 disables
+        self.notify = False  # Announce completion at the shell prompt
+        self.streaming = False  # No output cap, only the ring
+        self.status = 'queued'  # queued, running, done, failed, cancelled
+        self.reason = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.last_read = self.created
+        self._chunks = deque()  # (chunk, size); the oldest are dropped past ring_bytes
+        self._base = 0  # Offset of the first chunk still held
+        self._held = 0
+        self._size = 0
+        self._cancelled = False
+        self._callbacks = []
+        self._cond = threading.Condition()
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def append(self, chunk, force=False):
+        """Buffer a chunk; returns False once the output cap is reached.
+
+        ``force`` appends past the cap (for the job's own notices).
+        """
+        size = len(chunk.encode('utf-8', 'replace'))
+        with self._cond:
+            room = self.output_limit - self._size
+            if not force and not self.streaming:
+                if room <= 0:
+                    return False
+                if size > room:
+                    chunk = chunk.encode('utf-8', 'replace')[:room].decode('utf-8', 'ignore')
+                    size = room
+            self._chunks.append((chunk, size))
+            self._size += size
+            self._held += size
+            while self._held > self.ring_bytes and len(self._chunks) > 1:
+                self._held -= self._chunks.popleft()[1]
+                self._base += 1
+            self._cond.notify_all()
+            return self.streaming or self._size < self.output_limit
+
+    def abandoned(self):
+        """Whether this is a streaming job nobody has read for ``idle_timeout``"""
+        return self.streaming and self.idle_timeout and time.time() - self.last_read > self.idle_timeout
+
+    @property
+    def offset(self):
+        """Offset just past the newest chunk"""
+        return self._base + len(self._chunks)
+
+    def read(self, offset=0):
+        """Return (output after chunk ``offset``, next offset).
+
+        Output that already left the ring is skipped; ``dropped(offset)``
+        tells how many chunks that was.
+        """
+        with self._cond:
+            self.last_read = time.time()
+            start = max(0, offset - self._base)
+            return ''.join(chunk for chunk, _ in itertools.islice(self._chunks, start, None)), self.offset
+
+    def dropped(self, offset=0):
+        """How many chunks after ``offset`` are no longer in the ring"""
+        with self._cond:
+            return max(0, self._base - offset)
+
+    def wait(self, offset=0, timeout=None):
+        """Block until there is output after ``offset`` or the job finishes"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.offset > offset or self.done, timeout)
+
+    def join(self, timeout=None):
+        """Wait for the job to finish; returns False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.done, timeout)
+
+    def follow(self, offset=0, poll=1.0):
+        """Yield output chunks from ``offset`` until the job finishes"""
+        while True:
+            self.wait(offset, poll)
+            text, offset = self.read(offset)
+            if text:
+                yield text
+            elif self.done:
+                return
+
+    def add_cancel_callback(self, callback):
+        with self._cond:
+            if self._cancelled:
+                callback()
+                return lambda: None
+            self._callbacks.append(callback)
+
+        def unregister():
+            with self._cond:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unregister
+
+    def cancel(self, reason='cancelled'):
+        """Ask the job to stop; returns False if it already finished"""
+        with self._cond:
+            if self.done or self._cancelled:
+                return False
+            self._cancelled = True
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+            return True
+
+    def _finish(self, status):
+        with self._cond:
+            self.status = status
+            self.finished = time.time()
+            self._callbacks = []
+            self._cond.notify_all()
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                'id': self.id,
+                'command': self.command,
+                'status': self.status,
+                'reason': self.reason,
+                'created': self.created,
+                'elapsed': round(self.elapsed(), 3),
+                'output_bytes': self._size,
+                'streaming': self.streaming,
+                'chunks': self.offset,
+                'dropped': self._base,
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool and keeps them for polling"""
+
+    def __init__(self, max_workers=4, output_limit=1024 * 1024, ring_bytes=256 * 1024, idle_timeout=300):
+        self.max_workers = max_workers
+        self.output_limit = output_limit
+        self.ring_bytes = ring_bytes
+        self.idle_timeout = idle_timeout
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def start(self, command, chunks, session_id=None):
+        """Run ``chunks`` (an iterator of output text) as a job for ``command``"""
+        with self._lock:
+            job = Job(str(next(self._ids)), command, session_id, self.output_limit, self.ring_bytes,
+                      self.idle_timeout)
+            self._jobs[job.id] = job
+            self._prune()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='terminal-job')
+            executor = self._executor
+        executor.submit(self._run, job, chunks)
+        return job
+
+    def _run(self, job, chunks):
+        token = _current_job.set(job)
+        status = Status()
+        try:
+            if job.cancelled:
+                return
+            job.status = 'running'
+            job.started = time.time()
+            with track() as status:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if not job.append(chunk):
+                        job.append(f"\n[output limit of {job.output_limit} bytes reached, job stopped]\n", force=True)
+                        job.cancel(reason='output limit')
+                    elif job.abandoned():
+                        job.append(f"\n[no reader for {job.idle_timeout:g}s, job stopped]\n", force=True)
+                        job.cancel(reason='idle')
+                    if job.cancelled:
+                        break
+        except Exception as e:
+            status.failed = True
+            job.append(f"{Fore.RED}❌ Error: {e}\n", force=True)
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()  # Stops whatever the command started
+            _current_job.reset(token)
+            job._finish('cancelled' if job.cancelled else 'failed' if status.failed else 'done')
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(str(job_id))
+
+    def list(self, session_id=None):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in jobs if session_id is None or job.session_id == session_id]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        return job is not None and job.cancel()
+
+    def cancel_session(self, session_id, reason='session expired'):
+        """Cancel every unfinished job of a session; returns how many"""
+        return sum(job.cancel(reason) for job in self.list(session_id))
+
+    def finished_notices(self, session_id):
+        """Pop the ``cmd &`` jobs of a session that finished since the last call"""
+        finished = []
+        for job in self.list(session_id):
+            if job.notify and job.done:
+                job.notify = False
+                finished.append(job)
+        return finished
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self._jobs[job.id]
+
+    def get_status(self):
+        jobs = self.list()
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {'jobs': len(jobs), 'max_workers': self.max_workers, 'output_limit': self.output_limit,
+                'ring_bytes': self.ring_bytes, 'idle_timeout': self.idle_timeout, **counts}
+
+
+job_manager = JobManager(
+    max_workers=int(os.environ.get('TERMINAL_JOB_WORKERS', 4)),
+    output_limit=int(os.environ.get('TERMINAL_JOB_OUTPUT_LIMIT', 1024 * 1024)),
+    ring_bytes=int(os.environ.get('TERMINAL_JOB_RING_BYTES', 256 * 1024)),
+    idle_timeout=float(os.environ.get('TERMINAL_JOB_IDLE_TIMEOUT', 300)),
+)
+
+
+def get_jobs_status():
+    return job_manager.get_status()
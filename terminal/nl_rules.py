@@ -0,0 +1,332 @@
+"""
+Declarative rule engine for the natural-language fallback patterns.
+
+Each rule lists the keywords it needs (matched as substrings of the
+lowercased phrase, like the original ``'x' in low`` checks), an optional
+precise guard and an action that extracts the commands. The table is
+compiled once: every token maps (memoized) to a bitmask of the keywords
+it contains, and each distinct phrase mask maps (memoized) to the rules
+it can satisfy. A phrase is split once and only tested against rules
+whose keywords it actually contains.
+"""
+# Cap on memoized tokens so arbitrary input can't grow the table forever
+MAX_TOKEN_CACHE = 10000
+
+
+class Phrase:
+    """A phrase tokenized once and shared by every rule"""
+
+    __slots__ = ('text', 'low', 'low_words', '_words')
+
+    def __init__(self, text):
+        self.text = text
+        self.low = text.lower().strip()
+        self.low_words = self.low.split()
+        self._words = None
+
+    @property
+    def words(self):
+        """Original-case tokens, split only when a rule needs them"""
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+
+class Rule:
+    """One pattern: required keywords, an optional guard and an action.
+
+    ``requires`` is a list of keyword alternatives that must all be present
+    (e.g. ``[('create', 'make'), ('file',)]``). ``on_fail`` decides what
+    happens when the guard matched but the action returned None:
+    ``'next'`` tries the following rule, ``'simple'`` jumps to the simple
+    single-step rules and ``'ai'`` stops so the phrase goes to the model.
+    """
+
+    def __init__(self, name, requires, action, guard=None, on_fail='ai', group='simple'):
+        self.name = name
+        self.requires = [tuple(options) for options in requires]
+        self.action = action
+        self.guard = guard
+        self.on_fail = on_fail
+        self.group = group
+
+
+class RuleEngine:
+    """Rules compiled into a keyword bitmask tokenizer and a memoized dispatch"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        keywords = sorted({kw for rule in self.rules for options in rule.requires for kw in options})
+        self.keywords = keywords
+        self.bits = {kw: 1 << i for i, kw in enumerate(keywords)}
+        # Each rule becomes a list of masks; every mask must share a bit with the phrase
+        self.masks = [[sum(self.bits[kw] for kw in options) for options in rule.requires]
+                      for rule in self.rules]
+        self.simple_start = next(i for i, rule in enumerate(self.rules) if rule.group == 'simple')
+        self._tokens = {}
+        self._dispatch = {}
+
+    def token_mask(self, token):
+        """Return the bitmask of keywords contained in one lowercased token"""
+        mask = self._tokens.get(token)
+        if mask is None:
+            mask = 0
+            for kw in self.keywords:
+                if kw in token:
+                    mask |= self.bits[kw]
+            if len(self._tokens) >= MAX_TOKEN_CACHE:
+                self._tokens.clear()
+            self._tokens[token] = mask
+        return mask
+
+    def phrase_mask(self, phrase):
+        """Return the bitmask of keywords found in a phrase.
+
+        Keywords contain no whitespace, so a keyword is a substring of the
+        phrase exactly when it is a substring of one of its tokens.
+        """
+        mask = 0
+        for token in phrase.low_words:
+            mask |= self.token_mask(token)
+        return mask
+
+    def candidates(self, mask):
+        """Return positions of rules whose keyword requirements are all met, in order"""
+        positions = self._dispatch.get(mask)
+        if positions is None:
+            positions = tuple(i for i, required in enumerate(self.masks)
+                              if all(mask & m for m in required))
+            self._dispatch[mask] = positions
+        return positions
+
+    def match(self, text):
+        """Return the commands for ``text``, or None if it should go to the AI model"""
+        phrase = Phrase(text)
+        start = 0
+        for position in self.candidates(self.phrase_mask(phrase)):
+            if position < start:
+                continue
+            rule = self.rules[position]
+            if rule.guard is not None and not rule.guard(phrase):
+                continue
+            commands = rule.action(phrase)
+            if commands is not None:
+                return commands
+            if rule.on_fail == 'ai':
+                return None
+            if rule.on_fail == 'simple':
+                start = self.simple_start
+        return None
+
+
+# Multi-step rules
+
+def create_file_and_move(p):
+    """Handle "create a new file X and move it into Y" pattern"""
+    words, low_words = p.words, p.low_words
+
+    # Find file name - look for word after "file"
+    file_name = None
+    if 'file' in low_words:
+        file_idx = low_words.index('file')
+        # Check if there's a name after "file" and before "and"
+        for i in range(file_idx + 1, len(words)):
+            if low_words[i] == 'and':
+                break
+            if not low_words[i] in ['a', 'new', 'called', 'named']:
+                file_name = words[i]
+                break
+
+    # Find destination folder - look for word after "into"
+    dest_folder = None
+    if 'into' in low_words:
+        into_idx = low_words.index('into')
+        if into_idx + 1 < len(words):
+            # Handle "into static folder" or "into static"
+            dest_folder = words[into_idx + 1]
+            # Remove "folder" if it's there
+            if dest_folder == 'folder' and into_idx + 2 < len(words):
+                dest_folder = words[into_idx + 2]
+            elif dest_folder.endswith('folder'):
+                dest_folder = dest_folder[:-6].strip()
+
+    if file_name and dest_folder:
+        return [f'touch {file_name}', f'mv {file_name} {dest_folder}/']
+    return None
+
+
+def make_folder_and_move(p):
+    """Handle "make a new folder X and move Y into it" pattern"""
+    words, low_words = p.words, p.low_words
+    commands = []
+
+    # Find folder name - look for word after "folder"
+    folder_name = None
+    if 'folder' in low_words:
+        folder_idx = low_words.index('folder')
+        # Check if there's a name after "folder" and before "and"
+        for i in range(folder_idx + 1, len(words)):
+            if low_words[i] == 'and':
+                break
+            if not low_words[i] in ['a', 'new', 'called', 'named']:
+                folder_name = words[i]
+                break
+
+    if folder_name:
+        commands.append(f'mkdir {folder_name}')
+
+        # Find file to move - look for word after "move"
+        if 'move' in low_words:
+            move_idx = low_words.index('move')
+            if move_idx + 1 < len(words):
+                commands.append(f'mv {words[move_idx + 1]} {folder_name}/')
+
+    return commands or None
+
+
+def multi_step_creation(p):
+    """Handle complex creation commands with multiple steps"""
+    commands = []
+    low = p.text.lower()
+
+    # Extract folder name
+    if 'called' in low or 'named' in low:
+        words, low_words = p.words, p.low_words
+
+        # Find folder name
+        folder_name = None
+        if 'called' in low_words:
+            folder_name = words[low_words.index('called') + 1]
+        elif 'named' in low_words:
+            folder_name = words[low_words.index('named') + 1]
+
+        if folder_name:
+            commands.append(f'mkdir {folder_name}')
+
+            # Look for additional operations
+            if 'move' in low and 'into' in low:
+                # Find what to move
+                move_idx = low_words.index('move')
+                if move_idx + 1 < len(words):
+                    commands.append(f'mv {words[move_idx + 1]} {folder_name}/')
+
+    return commands if commands else [p.text]  # Fallback to original text
+
+
+# Simple single-step rules
+
+def _starts_with_any(*prefixes):
+    return lambda p: p.low.startswith(prefixes)
+
+
+def new_folder_called(p):
+    if p.low.startswith(('make new folder called ', 'create new folder called ')):
+        prefix = 'make new folder called ' if 'make' in p.low else 'create new folder called '
+    else:
+        prefix = 'make a new folder called ' if 'make' in p.low else 'create a new folder called '
+    return [f'mkdir {p.text[len(prefix):].strip()}']
+
+
+def folder_called_anywhere(p):
+    parts = p.text.split('called')
+    if len(parts) > 1:
+        return [f'mkdir {parts[1].strip().split()[0]}']
+    return None
+
+
+def create_folder_name(p):
+    # Find the word after "folder"
+    for i, word in enumerate(p.words):
+        if word.lower() == 'folder' and i + 1 < len(p.words):
+            return [f'mkdir {p.words[i + 1]}']
+    return None
+
+
+def create_file_with_content(p):
+    text = p.text
+    words = p.low_words
+    try:
+        # Find filename
+        filename = 'newfile.txt'  # Default filename
+        if 'named' in words:
+            filename = p.words[words.index('named') + 1]
+        elif 'called' in words:
+            filename = p.words[words.index('called') + 1]
+
+        # Extract content after "write" or "code"
+        content = ""
+        lowered = text.lower()
+        if 'write code' in lowered:
+            content = text[lowered.find('write code') + len('write code'):].strip()
+        elif 'write' in lowered:
+            content = text[lowered.find('write') + len('write'):].strip()
+        if content.endswith(' in it'):
+            content = content[:-6].strip()
+
+        if content:
+            return [f'write {filename} "{content}"']
+        else:
+            return [f'touch {filename}']
+    except Exception:
+        return ['touch newfile.txt']
+
+
+def execute_file(p):
+    words = p.words
+    for verb in ('execute', 'run'):
+        if verb in words:
+            idx = words.index(verb)
+            if idx + 1 < len(words):
+                return [f'python {words[idx + 1]}']
+            return None
+    return None
+
+
+def move_into(p):
+    words = p.words
+    move_idx = [i for i, w in enumerate(words) if w.lower() == 'move']
+    into_idx = [i for i, w in enumerate(words) if w.lower() == 'into']
+    if not move_idx or not into_idx:
+        return None
+    move_idx, into_idx = move_idx[0], into_idx[0]
+    if move_idx < into_idx and into_idx + 1 < len(words):
+        return [f'mv {words[move_idx + 1]} {words[into_idx + 1]}/']
+    return None
+
+
+def constant(*commands):
+    return lambda p: list(commands)
+
+
+RULES = [
+    Rule('create_file_and_move', [('create', 'make'), ('file',), ('move',), ('into',)],
+         create_file_and_move, on_fail='next', group='multi'),
+    Rule('make_folder_and_move', [('make', 'create'), ('folder',), ('move',), ('into',)],
+         make_folder_and_move, on_fail='simple', group='multi'),
+    Rule('multi_step_creation', [('create',), ('folder',), ('and',)],
+         multi_step_creation, group='multi'),
+
+    Rule('new_folder_called', [('make', 'create'), ('folder',), ('called',)], new_folder_called,
+         guard=_starts_with_any('make new folder called ', 'create new folder called ',
+                                'make a new folder called ', 'create a new folder called ')),
+    Rule('create_folder_called', [('create',), ('folder',), ('called',)], folder_called_anywhere,
+         guard=lambda p: 'create a new folder' in p.low),
+    Rule('make_folder_called', [('make',), ('folder',), ('called',)], folder_called_anywhere,
+         guard=lambda p: 'make a new folder' in p.low),
+    Rule('new_folder', [('create', 'make'), ('folder',)], constant('mkdir new_folder'),
+         guard=lambda p: p.low in ('create a new folder', 'make a new folder')),
+    Rule('create_folder', [('create', 'make'), ('folder',)], create_folder_name,
+         guard=lambda p: ('create folder' in p.low or 'make folder' in p.low) and len(p.words) >= 3),
+    Rule('clear_screen', [('clear',), ('terminal', 'screen')], constant('clear')),
+    Rule('clear', [('clear', 'cls')], constant('clear'), guard=lambda p: p.low in ('clear', 'cls')),
+    Rule('create_file', [('create',), ('file',), ('write',)], create_file_with_content,
+         guard=lambda p: 'create a file' in p.low),
+    Rule('execute', [('execute', 'run')], execute_file),
+    Rule('move_into', [('move',), ('into',)], move_into),
+    Rule('show_python_files', [('show',), ('python',), ('file',)], constant('search *.py')),
+    Rule('show_all_files', [('show',), ('all',), ('file',)], constant('ls -l')),
+    Rule('list_python', [('list',), ('python',)], constant('search *.py')),
+    Rule('find_python', [('find',), ('python',)], constant('search *.py')),
+]
+
+engine = RuleEngine(RULES)
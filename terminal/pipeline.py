@@ -0,0 +1,388 @@
+"""
+Pipelines and redirection: ``cmd1 | cmd2 > file``.
+
+Stages exchange line iterators, never whole outputs, so
+``cat big.log | grep ERROR | head 20`` runs in constant memory and stops
+reading ``big.log`` as soon as ``head`` has its 20 lines. The first stage
+may be any command from ``COMMANDS``/``SYS_COMMANDS`` or a filter; later
+stages are filters (``grep``/``filter``, ``head``, ``tail``, ``wc``,
+``sort``), which also accept file arguments when used on their own.
+``grep`` with nothing piped in is the recursive content search command.
+"""
+import re
+from collections import deque
+from .commands import COMMANDS
+from .render import ANSI_ESCAPE, is_result, render
+from .session import resolve_path
+from .status import error_text
+from .system_monitor import SYS_COMMANDS
+
+OPERATORS = ('>>', '|', '>', '<')
+
+
+class Op(str):
+    """An unquoted operator token (``|``, ``>``, ``>>``, ``<``)"""
+
+
+def tokenize(line):
+    """Split a command line into words and Op tokens.
+
+    Quoting follows shlex (posix): quoted operators stay plain words, so
+    ``echo "a | b"`` has no pipe. Raises ValueError on unclosed quotes.
+    """
+    tokens = []
+    word = None  # None means no word in progress (distinguishes '' from nothing)
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if ch.isspace():
+            if word is not None:
+                tokens.append(word)
+                word = None
+            i += 1
+        elif ch == '\\':
+            word = (word or '') + line[i + 1:i + 2]
+            i += 2
+        elif ch in '\'"':
+            end = i + 1
+            text = []
+            while True:
+                if end >= len(line):
+                    raise ValueError("No closing quotation")
+                if line[end] == ch:
+                    break
+                if ch == '"' and line[end] == '\\' and line[end + 1:end + 2] in ('"', '\\'):
+                    end += 1
+                text.append(line[end])
+                end += 1
+            word = (word or '') + ''.join(text)
+            i = end + 1
+        else:
+            op = next((op for op in OPERATORS if line.startswith(op, i)), None)
+            if op:
+                if word is not None:
+                    tokens.append(word)
+                    word = None
+                tokens.append(Op(op))
+                i += len(op)
+            else:
+                word = (word or '') + ch
+                i += 1
+    if word is not None:
+        tokens.append(word)
+    return tokens
+
+
+class Pipeline:
+    """Parsed ``stage | stage ... [< input] [> output | >> output]``"""
+
+    def __init__(self, stages, stdin=None, stdout=None, append=False):
+        self.stages = stages  # [(name, args), ...]
+        self.stdin = stdin
+        self.stdout = stdout
+        self.append = append
+
+
+def parse(line):
+    """Return a Pipeline for ``line``, or None if it is a plain command.
+
+    Lines without operators are only pipelines when they start with a
+    filter (``head file.txt``); everything else keeps the normal dispatch.
+    Lines that do not start with a known command or filter are never
+    pipelines, so natural language such as ``show files > 1MB`` goes to
+    the AI instead of creating a file named ``1MB``.
+    """
+    tokens = tokenize(line)
+    if not tokens:
+        return None
+    first = tokens[0]
+    if not isinstance(first, Op) and first not in FILTERS and first not in COMMANDS and first not in SYS_COMMANDS:
+        return None
+    if not any(isinstance(t, Op) for t in tokens) and (tokens[0] not in FILTERS or tokens[0] in COMMANDS):
+        return None
+
+    pipeline = Pipeline([])
+    current = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if isinstance(token, Op) and token == '|':
+            if not current:
+                raise ValueError("syntax error near '|'")
+            pipeline.stages.append((current[0], current[1:]))
+            current = []
+        elif isinstance(token, Op):
+            target = tokens[i + 1] if i + 1 < len(tokens) else None
+            if target is None or isinstance(target, Op):
+                raise ValueError(f"syntax error: missing file name after '{token}'")
+            if token == '<':
+                pipeline.stdin = target
+            else:
+                pipeline.stdout, pipeline.append = target, token == '>>'
+            i += 1
+        else:
+            current.append(token)
+        i += 1
+    if not current:
+        raise ValueError("syntax error: missing command")
+    pipeline.stages.append((current[0], current[1:]))
+    return pipeline
+
+
+# Line streams
+
+def iter_lines(chunks):
+    """Re-split text chunks into lines, each ending with a newline"""
+    pending = ''
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        if '\n' not in pending:
+            continue
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending + '\n'
+
+
+def iter_file_lines(path):
+    """Yield the lines of a text file lazily"""
+    with open(resolve_path(path), 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            yield line if line.endswith('\n') else line + '\n'
+
+
+def command_lines(name, args):
+    """Run a COMMANDS/SYS_COMMANDS entry and yield its output as lines"""
+    handler = COMMANDS.get(name) or SYS_COMMANDS[name]
+    try:
+        output = handler(args)
+        if is_result(output):
+            # Piped and redirected output is plain text
+            output = render(output, 'text')
+        if isinstance(output, str):
+            if output:
+                yield from iter_lines([output])
+            return
+        yield from iter_lines(render(chunk, 'text') + '\n' if is_result(chunk) else chunk for chunk in output or ())
+    except Exception as e:
+        yield error_text(f'❌ Error: {e}') + '\n'
+
+
+def strip_ansi(lines):
+    for line in lines:
+        yield ANSI_ESCAPE.sub('', line) if '\x1b' in line else line
+
+
+# Filters: fn(args, lines) -> line iterator; ``lines`` is the piped input or None
+
+def _input(name, files, lines):
+    """Lines from the file arguments if given, else from the pipe"""
+    if files:
+        return (line for path in files for line in iter_file_lines(path))
+    if lines is None:
+        raise ValueError(f"{name}: missing input (give a file or pipe into it)")
+    return lines
+
+
+def _count_option(name, args, piped, default=10):
+    """Parse ``-n N``, ``--lines N`` or ``-N``; return (count, remaining args).
+
+    When reading from a pipe a bare number is the count too (``| head 20``).
+    """
+    if piped and len(args) == 1 and args[0].isdigit():
+        return int(args[0]), []
+    count = default
+    rest = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('-n', '--lines') and i + 1 < len(args):
+            value = args[i + 1]
+            i += 1
+        elif arg.startswith('-') and arg[1:].isdigit():
+            value = arg[1:]
+        else:
+            rest.append(arg)
+            i += 1
+            continue
+        if not value.isdigit():
+            raise ValueError(f"{name}: invalid line count: {value}")
+        count = int(value)
+        i += 1
+    return count, rest
+
+
+def grep_filter(args, lines=None):
+    """grep PATTERN [FILE...]: keep lines matching a regular expression"""
+    flags = set()
+    rest = []
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1 and not rest:
+            flags.update(arg[1:])
+        else:
+            rest.append(arg)
+    if not rest:
+        raise ValueError("grep: missing pattern")
+    pattern, files = rest[0], rest[1:]
+    unknown = flags - set('ivnFc')
+    if unknown:
+        raise ValueError(f"grep: unknown option -{''.join(sorted(unknown))}")
+
+    ignore_case, invert = 'i' in flags, 'v' in flags
+    if ('F' in flags or re.escape(pattern) == pattern) and not ignore_case:
+        # Literal patterns skip the regex engine entirely
+        matches = lambda line: pattern in line
+    else:
+        if 'F' in flags:
+            pattern = re.escape(pattern)
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+        except re.error as e:
+            raise ValueError(f"grep: invalid pattern: {e}")
+        matches = lambda line: compiled.search(line) is not None
+    return _iter_grep(_input('grep', files, lines), matches, invert, 'n' in flags, 'c' in flags)
+
+
+def _iter_grep(lines, matches, invert, numbered, count_only):
+    count = 0
+    for number, line in enumerate(lines, 1):
+        if matches(line) != invert:
+            count += 1
+            if not count_only:
+                yield f"{number}:{line}" if numbered else line
+    if count_only:
+        yield f"{count}\n"
+
+
+def head_filter(args, lines=None):
+    """head [-n N] [FILE...]: first N lines (10 by default)"""
+    count, files = _count_option('head', args, lines is not None)
+    return _iter_head(_input('head', files, lines), count)
+
+
+def _iter_head(lines, count):
+    if count <= 0:
+        return
+    for number, line in enumerate(lines, 1):
+        yield line
+        if number >= count:
+            # Stop pulling from upstream as soon as we have enough
+            return
+
+
+def tail_filter(args, lines=None):
+    """tail [-n N] [FILE...]: last N lines (10 by default)"""
+    count, files = _count_option('tail', args, lines is not None)
+    return _iter_tail(_input('tail', files, lines), count)
+
+
+def _iter_tail(lines, count):
+    # Only the last ``count`` lines are ever held in memory
+    yield from deque(lines, maxlen=count) if count > 0 else ()
+
+
+def wc_filter(args, lines=None):
+    """wc [-l] [-w] [-c] [FILE...]: count lines, words and characters"""
+    flags = {arg for arg in args if arg in ('-l', '-w', '-c')}
+    files = [arg for arg in args if arg not in flags]
+    return _iter_wc(_input('wc', files, lines), flags or {'-l', '-w', '-c'})
+
+
+def _iter_wc(lines, flags):
+    counts = {'-l': 0, '-w': 0, '-c': 0}
+    for line in lines:
+        counts['-l'] += 1
+        counts['-w'] += len(line.split())
+        counts['-c'] += len(line)
+    yield ' '.join(f"{counts[flag]:>7}" for flag in ('-l', '-w', '-c') if flag in flags) + '\n'
+
+
+def sort_filter(args, lines=None):
+    """sort [-r] [-n] [-u] [FILE...]: sort lines"""
+    flags = set()
+    files = []
+    for arg in args:
+        if arg.startswith('-') and len(arg) > 1:
+            flags.update(arg[1:])
+        else:
+            files.append(arg)
+    unknown = flags - set('rnu')
+    if unknown:
+        raise ValueError(f"sort: unknown option -{''.join(sorted(unknown))}")
+    return _iter_sort(_input('sort', files, lines), flags)
+
+
+def _numeric_key(line):
+    match = re.match(r'\s*(-?\d+(?:\.\d+)?)', line)
+    return (0, float(match.group(1)), line) if match else (1, 0.0, line)
+
+
+def _iter_sort(lines, flags):
+    # Sorting needs every line; this is the one filter that buffers its input
+    result = sorted(set(lines) if 'u' in flags else lines,
+                    key=_numeric_key if 'n' in flags else None, reverse='r' in flags)
+    yield from result
+
+
+FILTERS = {
+    'grep': grep_filter,
+    'filter': grep_filter,
+    'head': head_filter,
+    'tail': tail_filter,
+    'wc': wc_filter,
+    'sort': sort_filter,
+}
+
+
+def run(pipeline):
+    """Run a parsed pipeline, yielding its output chunks.
+
+    Every stage generator is closed when the consumer stops, so upstream
+    commands (and any subprocess they started) stop too.
+    """
+    streams = []
+    try:
+        lines = iter_file_lines(pipeline.stdin) if pipeline.stdin else None
+        if lines is not None:
+            streams.append(lines)
+        last = len(pipeline.stages) - 1
+        for position, (name, args) in enumerate(pipeline.stages):
+            # A filter that is also a command (grep) reads files itself when nothing is piped in
+            if name in FILTERS and (lines is not None or name not in COMMANDS):
+                try:
+                    lines = FILTERS[name](args, lines)
+                except ValueError as e:
+                    yield error_text(f'❌ Error: {e}') + '\n'
+                    return
+            elif name in COMMANDS or name in SYS_COMMANDS:
+                if position > 0:
+                    yield error_text(f'❌ Error: {name} does not read piped input') + '\n'
+                    return
+                lines = command_lines(name, args)
+            else:
+                yield error_text(f'❓ Unknown command: {name}') + '\n'
+                return
+            streams.append(lines)
+            if position < last or pipeline.stdout:
+                # Colors are for the terminal, not for other commands or files
+                lines = strip_ansi(lines)
+                streams.append(lines)
+
+        if pipeline.stdout:
+            yield _write(lines, pipeline.stdout, pipeline.append)
+        else:
+            yield from lines
+    except (OSError, ValueError) as e:
+        yield error_text(f'❌ Error: {e}') + '\n'
+    finally:
+        for stream in reversed(streams):
+            stream.close()
+
+
+def _write(lines, filename, append):
+    with open(resolve_path(filename), 'a' if append else 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    return f"Content {'appended' if append else 'written'} to {filename}\n"
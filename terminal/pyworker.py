@@ -0,0 +1,138 @@
+"""
+Pre-warmed Python worker used by the python/run commands.
+
+Started by ``terminal.script_pool`` as ``python pyworker.py <socket fd>``.
+The worker waits for jobs on a Unix socket; each job arrives together
+with the write ends of the caller's stdout/stderr pipes. For every job the
+worker forks: the child applies the resource limits, switches to the
+job's cwd and environment and runs the script in a fresh ``__main__``
+namespace with runpy. Forking an interpreter that has already booted
+starts a job in about a millisecond, and nothing a script does can leak
+into the next job because the worker itself never runs user code.
+
+Only the standard library is used: this file runs outside the terminal
+package.
+"""
+# Everything a job needs is imported here, once, so forked children start warm
+import json
+import os
+import resource
+import runpy
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+
+
+def run_job(job):
+    """Run one script in the forked child; never returns"""
+    code = 1
+    try:
+        if job.get('memory'):
+            resource.setrlimit(resource.RLIMIT_AS, (job['memory'], job['memory']))
+        if job.get('cpu'):
+            resource.setrlimit(resource.RLIMIT_CPU, (job['cpu'], job['cpu'] + 1))
+        os.chdir(job['cwd'])
+        os.environ.clear()
+        os.environ.update(job['env'])
+        sys.argv = [job['path']] + job['args']
+        sys.path[0] = os.path.dirname(job['path'])
+        # Line buffering so output streams back as the script prints it
+        sys.stdout = open(1, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+        sys.stderr = open(2, 'w', buffering=1, encoding='utf-8', errors='replace', closefd=False)
+        try:
+            runpy.run_path(job['path'], run_name='__main__')
+            code = 0
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+        except BaseException:
+            traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def wait_child(pid, timeout, sock):
+    """Wait for a job, killing it on timeout or when the caller cancels it"""
+    deadline = None if not timeout else time.monotonic() + timeout
+    # A pidfd becomes readable when the child exits (Linux 5.3+); elsewhere poll
+    try:
+        pidfd = os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        pidfd = None
+    delay = 0.001
+    timed_out = cancelled = False
+    try:
+        while True:
+            done, status = os.waitpid(pid, os.WNOHANG)
+            if done:
+                return {'exit': os.waitstatus_to_exitcode(status), 'timed_out': timed_out, 'cancelled': cancelled}
+            if deadline is not None and time.monotonic() >= deadline and not timed_out:
+                timed_out = True
+                os.kill(pid, signal.SIGKILL)
+            wait = None if pidfd is not None else delay
+            if deadline is not None and not timed_out:
+                remaining = max(0.0, deadline - time.monotonic())
+                wait = remaining if wait is None else min(wait, remaining)
+            ready = select.select([sock] if pidfd is None else [sock, pidfd], [], [], wait)[0]
+            if sock in ready:
+                message = sock.recv(65536)
+                if not message:
+                    # The terminal went away; don't leave the script running
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    sys.exit(0)
+                if json.loads(message).get('cancel') and not cancelled:
+                    cancelled = True
+                    os.kill(pid, signal.SIGKILL)
+            # Poll quickly for short scripts, then back off
+            delay = min(delay * 2, 0.05)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+def main(fd):
+    sock = socket.socket(fileno=fd)
+    parent = os.getppid()
+    # Ctrl+C is handled by the terminal, which cancels jobs explicitly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while True:
+        if not select.select([sock], [], [], 1.0)[0]:
+            if os.getppid() != parent:
+                return  # Orphaned: the terminal exited
+            continue
+        message, fds, _, _ = socket.recv_fds(sock, 1 << 20, 2)
+        if not message:
+            return
+        job = json.loads(message)
+        if 'path' not in job or len(fds) != 2:
+            for f in fds:
+                os.close(f)
+            continue  # A late cancel for a job that already finished
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            devnull = os.open(os.devnull, os.O_RDONLY)
+            os.dup2(devnull, 0)
+            os.dup2(fds[0], 1)
+            os.dup2(fds[1], 2)
+            for f in (devnull, *fds):
+                os.close(f)
+            run_job(job)
+        for f in fds:
+            os.close(f)
+        sock.send(json.dumps(wait_child(pid, job.get('timeout'), sock)).encode('utf-8'))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]))
@@ -0,0 +1,163 @@
+"""
+Token-bucket rate limiter for the AI model, shared across processes.
+
+The bucket lives in a small SQLite database (``TERMINAL_RATE_LIMIT_PATH``,
+default ``~/.python_terminal/rate_limit.db``), so every gunicorn worker
+draws from the same budget. Requests over the limit may wait in a bounded
+queue: a queued request reserves a future token (the bucket goes
+negative) and sleeps until it is due, so bursts are smoothed instead of
+rejected.
+"""
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.python_terminal', 'rate_limit.db')
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL);"
+
+
+def get_rate_limit_path():
+    """Return the configured location of the shared limiter database"""
+    return os.environ.get('TERMINAL_RATE_LIMIT_PATH', DEFAULT_PATH)
+
+
+class TokenBucketLimiter:
+    """``max_requests`` per ``time_window`` seconds, refilled continuously.
+
+    ``burst`` is the bucket capacity (defaults to ``max_requests``).
+    ``max_queue`` is how many requests may wait for a token at once and
+    ``max_wait`` the longest a request may wait; beyond either it is
+    rejected. Use ``path=':memory:'`` for a per-process bucket.
+    """
+
+    def __init__(self, max_requests=12, time_window=60, burst=None, max_queue=0, max_wait=0.0,
+                 path=None, name='gemini'):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.rate = max_requests / time_window
+        self.capacity = burst or max_requests
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.path = path or get_rate_limit_path()
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Autocommit mode so transactions are explicit (BEGIN IMMEDIATE)
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute(SCHEMA)
+        return self._conn
+
+    def _tokens(self, row, now):
+        if row is None:
+            return float(self.capacity)
+        tokens, updated = row
+        return min(float(self.capacity), tokens + max(0.0, now - updated) * self.rate)
+
+    def _transact(self, update):
+        """Apply ``update(tokens) -> (new_tokens, result)`` atomically across processes"""
+        with self._lock:
+            conn = self._connect()
+            # IMMEDIATE takes the database write lock up front, serializing workers
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = conn.execute('SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)).fetchone()
+                tokens, result = update(self._tokens(row, now))
+                conn.execute('INSERT OR REPLACE INTO buckets VALUES (?, ?, ?)', (self.name, tokens, now))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            return result
+
+    def _peek(self):
+        with self._lock:
+            row = self._connect().execute('SELECT tokens, updated FROM buckets WHERE name = ?', (self.name,)).fetchone()
+        return self._tokens(row, time.time())
+
+    # Taking tokens
+
+    def reserve(self, max_wait=None):
+        """Take a token and return how many seconds to wait before using it.
+
+        Returns 0 when a token is available now and None when the request
+        is rejected (queue full, or the wait would exceed ``max_wait``).
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        def update(tokens):
+            if tokens >= 1:
+                return tokens - 1, 0.0
+            delay = (1 - tokens) / self.rate
+            if math.ceil(1 - tokens) > self.max_queue or delay > max_wait:
+                return tokens, None
+            return tokens - 1, delay
+
+        return self._transact(update)
+
+    def refund(self):
+        """Return an unused token, e.g. when a queued request was cancelled"""
+        self._transact(lambda tokens: (min(float(self.capacity), tokens + 1), None))
+
+    def acquire(self, max_wait=None):
+        """Block until a token is ours; returns False if the request was rejected"""
+        delay = self.reserve(max_wait)
+        if delay is None:
+            return False
+        if delay:
+            time.sleep(delay)
+        return True
+
+    async def acquire_async(self, max_wait=None):
+        """Like ``acquire`` but never blocks the event loop.
+
+        The SQLite transactions (which may wait on other processes for the
+        database lock) run on the default executor.
+        """
+        loop = asyncio.get_running_loop()
+        delay = await loop.run_in_executor(None, self.reserve, max_wait)
+        if delay is None:
+            return False
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                await loop.run_in_executor(None, self.refund)
+                raise
+        return True
+
+    def can_make_request(self):
+        """Check if a token is available right now"""
+        return self._peek() >= 1
+
+    def reset(self):
+        """Refill the bucket completely"""
+        self._transact(lambda tokens: (float(self.capacity), None))
+
+    def get_status(self):
+        """Get the shared limiter status"""
+        tokens = self._peek()
+        remaining = max(0, int(tokens))
+        return {
+            'requests_made': self.capacity - remaining,
+            'requests_remaining': remaining,
+            'max_requests': self.max_requests,
+            'time_window': self.time_window,
+            'can_make_request': tokens >= 1,
+            'time_until_reset': 0 if tokens >= 1 else (1 - tokens) / self.rate,
+            'tokens': round(tokens, 3),
+            'capacity': self.capacity,
+            'queued': max(0, math.ceil(-tokens)),
+            'max_queue': self.max_queue,
+            'max_wait': self.max_wait,
+            'shared': self.path != ':memory:',
+        }
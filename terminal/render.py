@@ -0,0 +1,331 @@
+"""
+Structured command output.
+
+Commands may return a ``Table``, ``KeyValues`` or ``Tree`` instead of a
+preformatted string. The shell renders it once, for the mode of the
+session running the command:
+
+* ``cli``: colors and rich boxes for the terminal
+* ``web``/``text``: plain aligned text, no escape codes at all
+* ``to_json``: the raw structure, for ``/execute`` with ``"format": "json"``
+
+Web sessions therefore never generate ANSI codes for structured output,
+and ``sanitize`` only runs its (precompiled) regex over text that
+actually contains an escape character.
+
+Output that rarely changes (``help``) is memoized in ``render_cache`` by
+key, mode and terminal width; a result opts in by setting ``cache_key``.
+Live output (``sysinfo``) also sets ``cache_version``: its one entry is
+reused while the version stays the same and replaced when it changes.
+"""
+import re
+import threading
+from collections import OrderedDict
+from colorama import Fore, Style
+
+# ANSI escape sequences; stripped from text that leaves the terminal
+ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+
+# rich style names used by commands -> colorama codes for plain CLI output
+COLORS = {
+    'cyan': Fore.CYAN,
+    'green': Fore.GREEN,
+    'yellow': Fore.YELLOW,
+    'magenta': Fore.MAGENTA,
+    'blue': Fore.BLUE,
+    'red': Fore.RED,
+}
+
+# rich is imported on first use to keep CLI startup fast
+_console = None
+
+
+def get_console():
+    """Return the shared rich console, importing rich on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def render_rich(renderable):
+    """Render a rich object (table, tree, ...) to a string"""
+    console = get_console()
+    with console.capture() as capture:
+        console.print(renderable)
+    return capture.get()
+
+
+def sanitize(text):
+    """Strip ANSI escape codes; text without any is returned untouched"""
+    return ANSI_ESCAPE.sub('', text) if '\x1b' in text else text
+
+
+# The start of an escape sequence whose final byte has not arrived yet
+_PARTIAL_ESCAPE = re.compile(r'\x1B(?:\[[0-?]*[ -/]*)?')
+_MAX_PARTIAL = 32
+
+
+def sanitize_stream(chunks):
+    """Strip ANSI escape codes from a stream of text chunks.
+
+    Chunks are not always whole lines (``cat`` yields fixed-size blocks),
+    so an escape sequence cut off at the end of one chunk is held back
+    and completed by the next.
+    """
+    pending = ''
+    for chunk in chunks:
+        text = pending + chunk
+        pending = ''
+        start = text.rfind('\x1b', -_MAX_PARTIAL)
+        if start != -1 and _PARTIAL_ESCAPE.fullmatch(text, start):
+            text, pending = text[:start], text[start:]
+        if text:
+            yield sanitize(text)
+    # An unfinished sequence at the very end is dropped
+
+
+class Column:
+    """A table column: header, rich style name and justification"""
+
+    def __init__(self, header, style=None, justify='left'):
+        self.header = header
+        self.style = style
+        self.justify = justify
+
+
+class Table:
+    """Rows of cells under column headers.
+
+    Titled tables are drawn as rich boxes in the CLI; untitled ones as
+    aligned columns (with ``header=False``, just the cells).
+    """
+
+    def __init__(self, columns, rows=None, title=None, footer=None, header=True):
+        self.columns = [c if isinstance(c, Column) else Column(c) for c in columns]
+        self.rows = [list(row) for row in rows or ()]
+        self.title = title
+        self.footer = footer
+        self.header = header
+        self.cache_key = None
+        self.cache_version = None
+
+    def add_row(self, *cells):
+        self.rows.append([str(cell) for cell in cells])
+
+    def to_dict(self):
+        return {
+            'type': 'table',
+            'title': self.title,
+            'columns': [c.header for c in self.columns],
+            'rows': self.rows,
+            'footer': self.footer,
+        }
+
+
+class KeyValues:
+    """Ordered ``key: value`` pairs, such as ``sysinfo``"""
+
+    def __init__(self, pairs=None, title=None):
+        self.pairs = list(pairs or ())
+        self.title = title
+        self.cache_key = None
+        self.cache_version = None
+
+    def add(self, key, value):
+        self.pairs.append((key, str(value)))
+
+    def to_dict(self):
+        return {'type': 'key_values', 'title': self.title, 'items': [{'key': k, 'value': v} for k, v in self.pairs]}
+
+
+class Tree:
+    """A labelled node with child nodes"""
+
+    def __init__(self, label):
+        self.label = label
+        self.children = []
+        self.cache_key = None
+        self.cache_version = None
+
+    def add(self, label):
+        node = Tree(label)
+        self.children.append(node)
+        return node
+
+    def to_dict(self):
+        return {'type': 'tree', 'label': self.label, 'children': [child.to_dict() for child in self.children]}
+
+
+RESULT_TYPES = (Table, KeyValues, Tree)
+
+
+def is_result(value):
+    return isinstance(value, RESULT_TYPES)
+
+
+def to_json(result):
+    """The JSON-serializable structure of a result"""
+    return result.to_dict()
+
+
+class RenderCache:
+    """Rendered text memoized by (key, mode, terminal width), LRU bounded"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, mode, build, version=None):
+        """Return the cached text for ``key``, calling ``build()`` on a miss.
+
+        An entry cached under a different ``version`` is a miss, and the
+        new render replaces it instead of taking another slot.
+        """
+        # Rich output wraps to the terminal, so CLI renders depend on its width
+        cache_key = (key, mode, get_console().width if mode == 'cli' else None)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        text = build()
+        with self._lock:
+            self._entries[cache_key] = (version, text)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return text
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_status(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+render_cache = RenderCache()
+
+
+def render(result, mode='cli'):
+    """Render a result as text for ``mode`` ('cli', 'web' or 'text')"""
+    if result.cache_key is not None:
+        return render_cache.get(result.cache_key, mode, lambda: _render(result, mode), result.cache_version)
+    return _render(result, mode)
+
+
+def _render(result, mode):
+    cli = mode == 'cli'
+    if isinstance(result, Table):
+        return _table_cli(result) if cli else _table_text(result)
+    if isinstance(result, KeyValues):
+        return _key_values_cli(result) if cli else _key_values_text(result)
+    if isinstance(result, Tree):
+        return _tree_cli(result) if cli else '\n'.join(_tree_lines(result))
+    raise TypeError(f"cannot render {type(result).__name__}")
+
+
+def _align(cell, width, justify):
+    return cell.rjust(width) if justify == 'right' else cell.ljust(width)
+
+
+def _widths(table):
+    widths = [len(c.header) if table.header else 0 for c in table.columns]
+    for row in table.rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(cell))
+    return widths
+
+
+def _table_text(table):
+    widths = _widths(table)
+    last = len(widths) - 1
+    lines = []
+    if table.title:
+        lines += [table.title, '']
+    if table.header:
+        header = '  '.join(_align(c.header, w, c.justify) for c, w in zip(table.columns, widths)).rstrip()
+        lines += [header, '=' * len(header)] if table.title else [header]
+    for row in table.rows:
+        lines.append('  '.join(cell if i == last and c.justify != 'right' else _align(cell, w, c.justify)
+                               for i, (c, w, cell) in enumerate(zip(table.columns, widths, row))).rstrip())
+    if table.footer:
+        lines.append(table.footer)
+    return '\n'.join(lines)
+
+
+def _table_cli(table):
+    if table.title:
+        from rich.table import Table as RichTable
+        rich_table = RichTable(title=table.title, show_header=table.header)
+        for column in table.columns:
+            rich_table.add_column(column.header, style=column.style, justify=column.justify)
+        for row in table.rows:
+            rich_table.add_row(*row)
+        return render_rich(rich_table).rstrip('\n') + (f"\n{table.footer}" if table.footer else '')
+    widths = _widths(table)
+    last = len(widths) - 1
+    lines = []
+    if table.header:
+        lines.append(Style.BRIGHT + '  '.join(_align(c.header, w, c.justify)
+                                              for c, w in zip(table.columns, widths)).rstrip() + Style.RESET_ALL)
+    for row in table.rows:
+        cells = []
+        for i, (column, width, cell) in enumerate(zip(table.columns, widths, row)):
+            text = cell if i == last and column.justify != 'right' else _align(cell, width, column.justify)
+            color = COLORS.get(column.style)
+            cells.append(f"{color}{text}{Style.RESET_ALL}" if color else text)
+        lines.append('  '.join(cells))
+    if table.footer:
+        lines.append(f"{Fore.YELLOW}{table.footer}{Style.RESET_ALL}")
+    return '\n'.join(lines)
+
+
+def _key_values_text(key_values):
+    width = max((len(key) for key, _ in key_values.pairs), default=0)
+    lines = [key_values.title, ''] if key_values.title else []
+    lines.extend(f"{key + ':':<{width + 1}} {value}" for key, value in key_values.pairs)
+    return '\n'.join(lines)
+
+
+def _key_values_cli(key_values):
+    from rich.table import Table as RichTable
+    rich_table = RichTable(title=key_values.title)
+    rich_table.add_column("Property", style="cyan")
+    rich_table.add_column("Value", style="green")
+    for key, value in key_values.pairs:
+        rich_table.add_row(key, value)
+    return render_rich(rich_table).rstrip('\n')
+
+
+def _tree_lines(node):
+    yield node.label
+    yield from _tree_children(node, '')
+
+
+def _tree_children(node, prefix):
+    for i, child in enumerate(node.children):
+        last = i == len(node.children) - 1
+        yield f"{prefix}{'└── ' if last else '├── '}{child.label}"
+        yield from _tree_children(child, prefix + ('    ' if last else '│   '))
+
+
+def _tree_cli(node):
+    from rich.tree import Tree as RichTree
+
+    def build(source, target):
+        for child in source.children:
+            build(child, target.add(child.label))
+
+    rich_tree = RichTree(node.label)
+    build(node, rich_tree)
+    return render_rich(rich_tree).rstrip('\n')
@@ -0,0 +1,334 @@
+"""
+Pool of pre-warmed Python workers for the python/run commands.
+
+Spawning a new interpreter for every script costs tens of milliseconds
+before the first line of user code runs. Instead a few ``pyworker.py``
+processes are started once and kept idle; each job is handed to one over
+a Unix socket together with the write ends of two pipes, and the worker
+forks a child that runs the script with its stdout/stderr on those pipes.
+Every job gets a fresh namespace, the session's cwd and environment, and
+the configured limits:
+
+* ``TERMINAL_PY_WORKERS``: idle workers kept warm (default 2)
+* ``TERMINAL_PY_TIMEOUT``: wall-clock limit per script in seconds (default 30, 0 for none)
+* ``TERMINAL_PY_MEMORY_MB``: address-space limit per script (default 512, 0 for none)
+* ``TERMINAL_PY_CPU_SECONDS``: CPU-time limit per script (default 0, none)
+* ``TERMINAL_PY_STDERR_BYTES``: how much of the end of stderr is kept (default 64 KiB)
+
+The pool needs ``os.fork`` and ``socket.send_fds`` (Unix, Python 3.9+);
+elsewhere ``pool_supported()`` is false and python_exec spawns a fresh
+interpreter per script as before.
+"""
+import codecs
+import json
+import os
+import selectors
+import socket
+import subprocess
+import sys
+import threading
+import time
+from .jobs import on_cancel
+from .status import fail
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pyworker.py')
+
+# How long a cancelled or timed-out job may take to report back
+GRACE_SECONDS = 5
+
+# Stdout without a newline is passed on once this much has accumulated
+MAX_PENDING_CHARS = 64 * 1024
+
+# Stderr is reported after the script exits; only its end (the traceback) is kept
+STDERR_TAIL_BYTES = int(os.environ.get('TERMINAL_PY_STDERR_BYTES', 64 * 1024))
+
+
+def pool_supported():
+    """True if scripts can run in forked workers on this platform"""
+    return hasattr(os, 'fork') and hasattr(socket, 'send_fds') and hasattr(socket, 'AF_UNIX')
+
+
+class StderrTail:
+    """The last ``limit`` bytes of a script's stderr"""
+
+    def __init__(self, limit=STDERR_TAIL_BYTES):
+        self.limit = limit
+        self.dropped = 0
+        self._buffer = bytearray()
+
+    def __bool__(self):
+        return bool(self._buffer)
+
+    def add(self, data):
+        self._buffer += data
+        excess = len(self._buffer) - self.limit
+        if excess > 0:
+            del self._buffer[:excess]
+            self.dropped += excess
+
+    def text(self):
+        text = self._buffer.decode('utf-8', 'replace')
+        if self.dropped:
+            text = f"… {self.dropped} earlier bytes of stderr truncated …\n" + text
+        return text
+
+
+class ScriptWorker:
+    """One idle ``pyworker.py`` process and our end of its socket"""
+
+    def __init__(self):
+        kind = getattr(socket, 'SOCK_SEQPACKET', socket.SOCK_DGRAM)
+        self.sock, theirs = socket.socketpair(socket.AF_UNIX, kind)
+        try:
+            self.process = subprocess.Popen(
+                [sys.executable, WORKER_SCRIPT, str(theirs.fileno())],
+                pass_fds=[theirs.fileno()],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                # Keep terminal signals (Ctrl+C) away from the workers
+                start_new_session=True,
+            )
+        except Exception:
+            self.sock.close()
+            raise
+        finally:
+            theirs.close()
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        self.sock.close()  # The worker exits when its socket closes
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class ScriptPool:
+    """Run Python scripts in pre-warmed worker processes.
+
+    ``size`` workers are kept idle; when all are busy an extra one is
+    started for the job and kept only if the pool is below ``size``.
+    """
+
+    def __init__(self, size=2, timeout=30, memory=512, cpu=0):
+        self.size = size
+        self.timeout = timeout
+        self.memory = memory
+        self.cpu = cpu
+        self._idle = []
+        self._busy = 0
+        self._lock = threading.Lock()
+        self.stats = {'jobs': 0, 'timeouts': 0, 'cancelled': 0, 'workers_started': 0}
+
+    def start(self):
+        """Warm the pool up to ``size`` idle workers"""
+        with self._lock:
+            missing = self.size - len(self._idle)
+        for _ in range(max(0, missing)):
+            worker = self._spawn()
+            with self._lock:
+                self._idle.append(worker)
+
+    def _spawn(self):
+        worker = ScriptWorker()
+        with self._lock:
+            self.stats['workers_started'] += 1
+        return worker
+
+    def acquire(self):
+        """Take an idle worker, starting one if none is ready"""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    self._busy += 1
+                    return worker
+                worker.close()
+        worker = self._spawn()
+        with self._lock:
+            self._busy += 1
+        return worker
+
+    def release(self, worker, healthy=True):
+        """Return a worker to the pool, or drop it if broken or surplus"""
+        with self._lock:
+            self._busy -= 1
+            keep = healthy and worker.alive() and len(self._idle) < self.size
+            if keep:
+                self._idle.append(worker)
+        if not keep:
+            worker.close()
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def run(self, path, args=(), cwd=None, env=None, timeout=None):
+        """Run a script, yielding stdout line by line and then any stderr.
+
+        Stderr is reported once at the end as ``Error: ...``, the same
+        as the subprocess fallback. Raises ValueError on timeout. Closing
+        the generator early kills the script.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        job = {
+            'path': os.path.abspath(path),
+            'args': list(args),
+            'cwd': cwd or os.getcwd(),
+            'env': dict(os.environ if env is None else env),
+            'timeout': timeout or None,
+            'memory': self.memory * 1024 * 1024 if self.memory else None,
+            'cpu': self.cpu or None,
+        }
+        return self._iter_job(job)
+
+    def _iter_job(self, job):
+        worker = self.acquire()
+        out_r, out_w = os.pipe()
+        err_r, err_w = os.pipe()
+        try:
+            socket.send_fds(worker.sock, [json.dumps(job).encode('utf-8')], [out_w, err_w])
+        except OSError as e:
+            for fd in (out_r, err_r):
+                os.close(fd)
+            self.release(worker, healthy=False)
+            raise ValueError(f"python: could not start script: {e}")
+        finally:
+            # Only the script holds the write ends now, so EOF means it finished
+            os.close(out_w)
+            os.close(err_w)
+        with self._lock:
+            self.stats['jobs'] += 1
+
+        timeout = job['timeout']
+        status = None
+        # A background job can be cancelled while the script is silent
+        unregister = on_cancel(lambda: self._send_cancel(worker))
+        try:
+            stderr, produced = yield from self._iter_output(out_r, err_r, timeout)
+            status = self._read_status(worker, timeout)
+            if status is None:
+                raise ValueError("python: worker stopped unexpectedly")
+            if status['cancelled']:
+                return
+            if stderr:
+                yield "Error: " + stderr
+            if status.get('exit'):
+                fail()
+            if status['timed_out']:
+                with self._lock:
+                    self.stats['timeouts'] += 1
+                raise ValueError(f"python: script timed out after {timeout:g}s")
+            if not stderr and not produced:
+                yield "Program executed successfully"
+        finally:
+            unregister()
+            os.close(out_r)
+            os.close(err_r)
+            if status is None:
+                status = self._cancel(worker)
+            self.release(worker, healthy=status is not None)
+
+    def _iter_output(self, out_r, err_r, timeout):
+        """Yield stdout lines (or long partial lines) as they arrive; return (stderr text, whether stdout had output)"""
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        pending = ''
+        stderr = StderrTail()
+        produced = False
+        # Backstop in case a grandchild keeps the pipes open after a timeout
+        deadline = time.monotonic() + timeout + GRACE_SECONDS if timeout else None
+        with selectors.DefaultSelector() as selector:
+            selector.register(out_r, selectors.EVENT_READ)
+            selector.register(err_r, selectors.EVENT_READ)
+            while selector.get_map():
+                wait = None if deadline is None else deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    break
+                for key, _ in selector.select(wait):
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        selector.unregister(key.fd)
+                    elif key.fd == err_r:
+                        stderr.add(data)
+                    else:
+                        pending += decoder.decode(data)
+                        if '\n' in pending:
+                            *lines, pending = pending.split('\n')
+                            produced = True
+                            for line in lines:
+                                yield line + '\n'
+                        if len(pending) >= MAX_PENDING_CHARS:
+                            # A script printing without newlines must still reach the job's output cap
+                            produced = True
+                            yield pending
+                            pending = ''
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            produced = True
+            yield pending
+        return stderr.text(), produced
+
+    def _read_status(self, worker, timeout):
+        worker.sock.settimeout(GRACE_SECONDS + (timeout or 0))
+        try:
+            message = worker.sock.recv(4096)
+        except OSError:
+            return None
+        finally:
+            worker.sock.settimeout(None)
+        return json.loads(message) if message else None
+
+    def _cancel(self, worker):
+        """Kill the running script; return its status, or None if the worker is unusable"""
+        if not self._send_cancel(worker):
+            return None
+        return self._read_status(worker, 0)
+
+    def _send_cancel(self, worker):
+        with self._lock:
+            self.stats['cancelled'] += 1
+        try:
+            worker.sock.send(json.dumps({'cancel': True}).encode('utf-8'))
+            return True
+        except OSError:
+            return False
+
+    def get_status(self):
+        with self._lock:
+            return {
+                'idle': len(self._idle),
+                'busy': self._busy,
+                'size': self.size,
+                'timeout': self.timeout,
+                'memory_mb': self.memory,
+                'cpu_seconds': self.cpu,
+                **self.stats,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_script_pool():
+    """Return the shared pool configured from the environment"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptPool(
+                size=int(os.environ.get('TERMINAL_PY_WORKERS', 2)),
+                timeout=float(os.environ.get('TERMINAL_PY_TIMEOUT', 30)),
+                memory=int(os.environ.get('TERMINAL_PY_MEMORY_MB', 512)),
+                cpu=int(os.environ.get('TERMINAL_PY_CPU_SECONDS', 0)),
+            )
+    return _pool
+
+
+def get_script_pool_status():
+    return get_script_pool().get_status()
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Session:
+    """Per-user shell state: working directory, history and environment.
+
+    Commands never call ``os.chdir``; they resolve paths against the
+    active session's ``cwd`` so many sessions can share one process.
+    ``mode`` ('cli' or 'web') decides how structured output is rendered.
+    """
+
+    def __init__(self, cwd=None, env=None, session_id=None, mode='cli'):
+        self.id = session_id or uuid.uuid4().hex
+        self.mode = mode
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.env = dict(os.environ) if env is None else dict(env)
+        self.history = []
+        self.created = time.time()
+        self.last_used = self.created
+
+    def resolve(self, path):
+        """Resolve a user supplied path against the session cwd"""
+        path = os.path.expanduser(path)
+        return os.path.normpath(os.path.join(self.cwd, path))
+
+    def chdir(self, path):
+        """Change the session cwd, raising like os.chdir on failure"""
+        target = self.resolve(path)
+        if not os.path.exists(target):
+            raise FileNotFoundError(f"No such file or directory: '{path}'")
+        if not os.path.isdir(target):
+            raise NotADirectoryError(f"Not a directory: '{path}'")
+        if not os.access(target, os.X_OK):
+            raise PermissionError(f"Permission denied: '{path}'")
+        self.cwd = target
+        return target
+
+    @contextmanager
+    def activate(self):
+        """Make this session the current one for the duration of a command"""
+        token = _current_session.set(self)
+        self.last_used = time.time()
+        try:
+            yield self
+        finally:
+            _current_session.reset(token)
+
+
+class SessionManager:
+    """Thread-safe registry of per-session objects with idle expiry.
+
+    ``on_expire(session_id)`` is called for every session that is dropped,
+    so whatever it left running (background jobs) can be stopped.
+    """
+
+    def __init__(self, factory, idle_timeout=3600, max_sessions=1000, on_expire=None):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.on_expire = on_expire
+        self._items = {}
+        self._last_used = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """Return the object for ``session_id``, creating it on first use"""
+        session_id = session_id or 'default'
+        expired = []
+        with self._lock:
+            now = time.time()
+            item = self._items.get(session_id)
+            if item is None:
+                expired = self._expire(now)
+                item = self.factory(session_id)
+                self._items[session_id] = item
+            self._last_used[session_id] = now
+        if self.on_expire:
+            for sid in expired:
+                self.on_expire(sid)
+        return item
+
+    def _expire(self, now):
+        idle = [sid for sid, used in self._last_used.items() if now - used > self.idle_timeout]
+        # Evict the least recently used sessions if we are still over capacity
+        overflow = len(self._items) - len(idle) - self.max_sessions + 1
+        if overflow > 0:
+            active = sorted((used, sid) for sid, used in self._last_used.items() if sid not in idle)
+            idle.extend(sid for _, sid in active[:overflow])
+        for sid in idle:
+            self._items.pop(sid, None)
+            self._last_used.pop(sid, None)
+        return idle
+
+    def __len__(self):
+        return len(self._items)
+
+
+# Fallback session used when commands run outside an activated session
+_default_session = Session()
+_current_session = ContextVar('terminal_session', default=None)
+
+
+def current_session():
+    """Return the active session, or the process-wide default session"""
+    return _current_session.get() or _default_session
+
+
+def resolve_path(path):
+    """Resolve a path against the active session's cwd"""
+    return current_session().resolve(path)
@@ -1,15 +1,90 @@
 import os
 import shlex
 import io
+import threading
+import time
 from cmd import Cmd
 from colorama import init, Fore, Style
 from .commands import COMMANDS
 from .system_monitor import SYS_COMMANDS
 from .ai_parser import parse_nl
+from . import pipeline
+from .render import is_result, render
+from .session import Session
+from .status import error_text, fail, track
+from .history import get_history_path
 
 # Initialize colorama
 init(autoreset=True)
 
+
+def split_command_chain(line):
+    """Split a ``;``/``&&``-chained line into [(command, connector), ...].
+
+    ``connector`` is the operator before the command (None for the first).
+    Quotes and backslash escapes are respected, so ``echo "a; b"`` stays
+    one command. Empty commands are dropped.
+    """
+    chain = []
+    current = []
+    connector = None
+    quote = None
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if ch == '\\' and quote != "'" and i + 1 < len(line):
+            current.append(line[i:i + 2])
+            i += 2
+            continue
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        elif ch == ';' or line.startswith('&&', i):
+            command = ''.join(current).strip()
+            if command:
+                chain.append((command, connector))
+            connector = '&&' if ch == '&' else ';'
+            current = []
+            i += 2 if ch == '&' else 1
+            continue
+        current.append(ch)
+        i += 1
+    command = ''.join(current).strip()
+    if command:
+        chain.append((command, connector))
+    return chain
+
+
+def split_background(line):
+    """Return (command, True) if ``line`` ends with an unquoted ``&``.
+
+    ``a && b`` and ``echo "x &"`` are left alone.
+    """
+    stripped = line.rstrip()
+    if not stripped.endswith('&') or stripped.endswith('&&'):
+        return line, False
+    quote = None
+    i = 0
+    while i < len(stripped) - 1:
+        ch = stripped[i]
+        if ch == '\\' and quote != "'":
+            i += 2
+            continue
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"':
+            quote = ch
+        i += 1
+    if quote or i >= len(stripped):
+        # Inside quotes, or the & itself was escaped
+        return line, False
+    return stripped[:-1].rstrip(), True
+
+
+
 class Shell(Cmd):
     intro = f"""{Fore.GREEN}
 ╔════════════════════════════════════════════════════════════════════════════╗
@@ -36,13 +111,15 @@ class Shell(Cmd):
 {Fore.CYAN}>> SYSTEM INITIALIZED{Style.RESET_ALL}
 {Fore.YELLOW}>> TYPE 'help' FOR COMMAND LIST{Style.RESET_ALL}
 {Fore.MAGENTA}>> AI MODE: try "show me all files"{Style.RESET_ALL}
-{Fore.GREEN}>> LOGGING: .terminal_history{Style.RESET_ALL}
+{Fore.GREEN}>> LOGGING: {get_history_path()}{Style.RESET_ALL}
 
 """
     prompt = f'{Fore.GREEN}[{Fore.CYAN}TERM{Fore.GREEN}]{Fore.YELLOW}> {Style.RESET_ALL}'
 
-    def __init__(self):
+    def __init__(self, session=None):
         super().__init__()
+        self.session = session or Session()
+        self._lock = threading.Lock()
         try:
             import readline
             readline.set_completer(self.complete)
@@ -52,9 +129,11 @@ class Shell(Cmd):
 
     # Help methods for individual commands - these make the help system work properly
     def help_ls(self):
-        self.stdout.write("ls [-l] [path] - List directory contents\n")
-        self.stdout.write("  -l: Show detailed listing with file sizes and dates\n")
-        self.stdout.write("  Examples: ls, ls -l, ls /home\n")
+        self.stdout.write("ls [-alrStU] [--sort name|size|mtime|none] [--limit N] [--offset N] [--json] [path] - List directory contents\n")
+        self.stdout.write("  -l: Show detailed listing with file sizes and dates, -a: include hidden files\n")
+        self.stdout.write("  -S/-t/-U: sort by size/modification time/unsorted, -r: reverse order\n")
+        self.stdout.write("  --limit/--offset: page through large directories, --json: machine-readable output\n")
+        self.stdout.write("  Examples: ls, ls -l, ls /home, ls -lt --limit 20\n")
 
     def help_pwd(self):
         print("pwd - Print current working directory")
@@ -74,8 +153,10 @@ class Shell(Cmd):
         print("  Examples: rm file.txt, rm -rf folder")
 
     def help_cat(self):
-        print("cat <file> - Display file contents")
-        print("  Examples: cat readme.txt, cat /path/to/file")
+        print("cat [options] <file> - Display file contents")
+        print("  --head N / -n N: first N lines, --tail N: last N lines")
+        print("  --bytes START:END: byte range, --page N [--page-size L]: page of L lines")
+        print("  Examples: cat readme.txt, cat --tail 20 app.log, cat --bytes 0:4096 data.csv")
 
     def help_touch(self):
         print("touch <file> - Create empty file")
@@ -86,7 +167,7 @@ class Shell(Cmd):
         print("  Examples: mv old.txt new.txt, mv file.txt folder/")
 
     def help_echo(self):
-        self.stdout.write("echo <text> [> file] - Print text or write to file\n")
+        self.stdout.write("echo <text> [> file | >> file] - Print text or write it to a file\n")
         self.stdout.write("  Examples: echo 'Hello World', echo 'text' > file.txt\n")
 
     def help_write(self):
@@ -94,35 +175,99 @@ class Shell(Cmd):
         print("  Examples: write test.txt 'Hello World'")
 
     def help_tree(self):
-        print("tree - Display directory structure as tree")
-        print("  Shows files and folders in a visual tree format")
+        print("tree [path] [-L depth] [-a] [--exclude glob] [--max N] - Display directory structure as tree")
+        print("  Shows files and folders in a visual tree format (3 levels deep by default)")
+        print("  Examples: tree, tree src -L 2, tree --exclude node_modules")
 
     def help_search(self):
-        print("search <pattern> - Search for files matching pattern")
-        print("  Examples: search '*.py', search 'test*'")
+        print("search <pattern> [path] - Search for files matching pattern")
+        print("  Plain text matches substrings, '*.py' style patterns are globs, --regex for regular expressions")
+        print("  search --rebuild-index [path]: build the persistent file index used by later searches")
+        print("  search --index-stats: show file index statistics, --no-index: always walk the tree")
+        print("  Walk limits: -L/--depth N, --no-hidden, --exclude glob, --max N (stop after N matches)")
+        print("  Examples: search '*.py', search 'test*', search --regex '^test_.*\\.py$'")
+
+    def help_grep(self):
+        self.stdout.write("grep [-i] [-F] [-v] [-n] [-l] [-c] [-m N] [--max-bytes N] <pattern> [path...] - Search file contents\n")
+        self.stdout.write("  -v selects lines that do not match; results always show line numbers (-n is accepted)\n")
+        self.stdout.write("  Scans directories recursively (hidden files need -a) on a process pool, skipping binary files\n")
+        self.stdout.write("  -m N stops after N matches, --max-bytes N only reads the first N bytes of each file\n")
+        self.stdout.write("  Walk limits: -L/--depth N, --exclude glob\n")
+        self.stdout.write("  In a pipeline it filters the piped lines instead: cat app.log | grep -i error | head 20\n")
+        self.stdout.write("  Examples: grep TODO, grep -i 'def main' src, grep -l import . --exclude node_modules\n")
+        self.stdout.write("  'filter' is the pipeline-only alias: cat app.log | filter ERROR\n")
+
+    def help_head(self):
+        self.stdout.write("head [-n N] [file...] - Print the first N lines (10 by default)\n")
+        self.stdout.write("  Examples: head -n 5 notes.txt, cat app.log | head 20\n")
+
+    def help_tail(self):
+        self.stdout.write("tail [-n N] [file...] - Print the last N lines (10 by default)\n")
+        self.stdout.write("  Examples: tail -n 5 notes.txt, ps | tail 3\n")
+
+    def help_wc(self):
+        self.stdout.write("wc [-l] [-w] [-c] [file...] - Count lines, words and characters\n")
+        self.stdout.write("  Examples: wc notes.txt, cat app.log | grep ERROR | wc -l\n")
+
+    def help_sort(self):
+        self.stdout.write("sort [-r] [-n] [-u] [file...] - Sort lines (reverse, numeric, unique)\n")
+        self.stdout.write("  Examples: sort names.txt, ps | sort -rn\n")
+
+    def help_pipes(self):
+        self.stdout.write("Pipelines and redirection:\n")
+        self.stdout.write("  cmd | filter ...   pass output line by line to grep, head, tail, wc or sort\n")
+        self.stdout.write("  cmd > file         write output to a file, cmd >> file appends\n")
+        self.stdout.write("  filter < file      read a filter's input from a file\n")
+        self.stdout.write("  Example: cat big.log | filter ERROR | head 20 > errors.txt\n")
 
     def help_cpu(self):
-        print("cpu - Show current CPU usage percentage")
+        print("cpu [--per-core] [--window seconds] - Show current CPU usage percentage")
+        print("  Examples: cpu, cpu --per-core, cpu --window 60")
 
     def help_mem(self):
-        print("mem - Show current memory usage")
+        print("mem [--window seconds] - Show current memory usage")
+        print("  Examples: mem, mem --window 60")
 
     def help_ps(self):
-        print("ps - List currently running processes")
+        self.stdout.write("ps [-o COLS] [--sort COL] [-r] [-n N] [--name TEXT] [--user NAME] - List running processes\n")
+        self.stdout.write("  Columns: pid, user, cpu, mem, rss, threads, status, name, cmd (default pid,user,cpu,mem,rss,name)\n")
+        self.stdout.write("  Shows the first 200 processes unless -n is given; -n 0 shows all. %CPU is measured\n")
+        self.stdout.write("  between snapshots, which are reused for a couple of seconds (TERMINAL_PS_TTL)\n")
+        self.stdout.write("  Examples: ps --sort rss -n 10, ps --name python -o pid,cpu,cmd, ps --user root\n")
+
+    def help_top(self):
+        self.stdout.write("top [options] - CPU, memory and load summary plus the 15 busiest processes\n")
+        self.stdout.write("  Takes the same options as ps, sorted by cpu by default. Example: top --sort mem -n 5\n")
+
+    def help_watch(self):
+        self.stdout.write("watch [-n SECONDS] [-c COUNT] <command> [interval] - Re-run a command on a schedule\n")
+        self.stdout.write("  Runs every 2 seconds by default until Ctrl+C (or COUNT runs); pipes work when quoted\n")
+        self.stdout.write("  Examples: watch cpu 1, watch \"ps --sort cpu -n 5\", watch -c 3 \"ls | wc -l\" 5\n")
 
     def help_sysinfo(self):
         print("sysinfo - Display comprehensive system information")
 
     def help_history(self):
-        print("history [count] - Show command history")
-        print("  Examples: history, history 10")
+        self.stdout.write("history [N] [--grep PATTERN [-i]] [--since TIME] - Show the last N commands (20 by default)\n")
+        self.stdout.write("  --since takes 30m, 2h, 7d, today or a date/time such as '2024-01-31 09:00'\n")
+        self.stdout.write("  Examples: history, history 50, history --grep '^cd ', history --since 1h\n")
 
     def help_clear(self):
         self.stdout.write("clear - Clear the terminal screen\n")
 
     def help_python(self):
-        print("python <script> - Execute Python script")
-        print("  Examples: python script.py, python test.py")
+        print("python [--timeout N] <script> [args...] - Execute Python script")
+        print("  Examples: python script.py, python --timeout 5 test.py input.txt")
+
+    def help_jobs(self):
+        self.stdout.write("<command> & - Run a command in the background as a job\n")
+        self.stdout.write("jobs [-r] - List jobs with their state and elapsed time (-r: unfinished only)\n")
+        self.stdout.write("  fg [%N]: stream a job's output until it finishes (Ctrl+C cancels it)\n")
+        self.stdout.write("  wait [%N...]: wait for jobs (all unfinished by default) and show their output\n")
+        self.stdout.write("  kill %N: cancel a job\n")
+        self.stdout.write("  Examples: search '*.log' / &, jobs, fg %1, kill %1\n")
+
+    help_fg = help_wait = help_kill = help_jobs
 
     def help_run(self):
         print("run <script> - Execute Python script (alias for python)")
@@ -138,8 +283,49 @@ class Shell(Cmd):
             log_command("exit")
             return True
         
+        try:
+            for chunk in self.iter_command(line):
+                self.stdout.write(chunk)
+                self.stdout.flush()
+        except KeyboardInterrupt:
+            self.stdout.write(f"\n{Fore.YELLOW}⏹️ Interrupted.{Style.RESET_ALL}\n")
+        self.report_finished_jobs()
+
+    def report_finished_jobs(self):
+        """Announce background (``cmd &``) jobs that finished, like a POSIX shell"""
+        from .jobs import job_manager
+        for job in job_manager.finished_notices(self.session.id):
+            color = Fore.GREEN if job.status == 'done' else Fore.RED
+            self.stdout.write(f"{color}[{job.id}] {job.status.capitalize():<10}{Style.RESET_ALL} {job.command}\n")
+
+    def iter_command(self, line: str):
+        """Execute a command line, yielding output chunks as they are produced"""
+        from .commands import log_command
+        
+        # A trailing & runs the command as a background job
+        command, background = split_background(line)
+        if background:
+            try:
+                job = self.start_job(command, notify=True)
+            except ValueError as e:
+                yield error_text(f'❌ Error: {e}') + '\n'
+                return
+            yield f"{Fore.CYAN}[{job.id}] started: {job.command}{Style.RESET_ALL}\n"
+            return
+        
         # Log the original command
         log_command(line)
+        self.session.history.append(line)
+        
+        # Pipelines and redirection (cmd | filter > file) stream line by line
+        try:
+            parsed = pipeline.parse(line)
+        except ValueError as e:
+            yield error_text(f'❌ Error: {e}') + '\n'
+            return
+        if parsed is not None:
+            yield from pipeline.run(parsed)
+            return
         
         # Try parsing as direct command first
         parts = shlex.split(line)
@@ -147,45 +333,67 @@ class Shell(Cmd):
         cmd_args = parts[1:]
         
         # Execute known commands directly
-        if cmd_name in COMMANDS:
-            try:
-                output = COMMANDS[cmd_name](cmd_args)
-                if output:
-                    self.stdout.write(output + '\n')
-            except Exception as e:
-                self.stdout.write(f'{Fore.RED}❌ Error: {e}{Style.RESET_ALL}\n')
-            return
-        elif cmd_name in SYS_COMMANDS:
-            try:
-                output = SYS_COMMANDS[cmd_name]()
-                if output:
-                    self.stdout.write(output + '\n')
-            except Exception as e:
-                self.stdout.write(f'{Fore.RED}❌ Error: {e}{Style.RESET_ALL}\n')
+        if cmd_name in COMMANDS or cmd_name in SYS_COMMANDS:
+            yield from self.iter_single_command(cmd_name, cmd_args, f'{Fore.RED}❌ Error: {{}}{Style.RESET_ALL}')
             return
         
         # If not a known command, try AI parsing
         try:
-            self.stdout.write(f"{Fore.YELLOW}🤖 AI Thinking... {Style.RESET_ALL}")
-            self.stdout.flush()
+            yield f"{Fore.YELLOW}🤖 AI Thinking... {Style.RESET_ALL}"
             commands = parse_nl(line)
             
             if commands:
-                self.stdout.write(f"\r{Fore.CYAN}🧠 AI interpreted: {' && '.join(commands)}{Style.RESET_ALL}\n")
+                yield f"\r{Fore.CYAN}🧠 AI interpreted: {' && '.join(commands)}{Style.RESET_ALL}\n"
                 for i, cmd in enumerate(commands):
-                    self.stdout.write(f"{Fore.BLUE}⚡ Executing ({i+1}/{len(commands)}): {cmd}{Style.RESET_ALL}\n")
-                    self.execute_single_command(cmd)
+                    yield f"{Fore.BLUE}⚡ Executing ({i+1}/{len(commands)}): {cmd}{Style.RESET_ALL}\n"
+                    yield from self.iter_ai_command(cmd)
             else:
-                self.stdout.write(f"\r{Fore.RED}❓ Unknown command: {cmd_name}{Style.RESET_ALL}\n")
+                yield '\r' + error_text(f"❓ Unknown command: {cmd_name}") + '\n'
         except KeyboardInterrupt:
-            self.stdout.write(f"\r{Fore.YELLOW}⏹️ AI parsing cancelled.{Style.RESET_ALL}\n")
+            yield f"\r{Fore.YELLOW}⏹️ AI parsing cancelled.{Style.RESET_ALL}\n"
         except Exception as e:
-            self.stdout.write(f"\r{Fore.RED}🔥 AI parsing error: {e}{Style.RESET_ALL}\n")
-            self.stdout.write(f"{Fore.RED}❓ Unknown command: {cmd_name}{Style.RESET_ALL}\n")
+            yield '\r' + error_text(f"🔥 AI parsing error: {e}") + '\n'
+            yield error_text(f"❓ Unknown command: {cmd_name}") + '\n'
+
+    def iter_single_command(self, cmd_name, cmd_args, error_format):
+        """Run one known command, yielding its output whether it returns a string or a generator"""
+        handler = COMMANDS.get(cmd_name) or SYS_COMMANDS[cmd_name]
+        ends_with_newline = True
+        try:
+            output = handler(cmd_args)
+            if is_result(output):
+                output = render(output, self.session.mode)
+            if isinstance(output, str):
+                if output:
+                    yield output + '\n'
+                return
+            for chunk in output or ():
+                if is_result(chunk):
+                    chunk = render(chunk, self.session.mode) + '\n'
+                if chunk:
+                    ends_with_newline = chunk.endswith('\n')
+                    yield chunk
+        except Exception as e:
+            fail()
+            if not ends_with_newline:
+                yield '\n'
+            ends_with_newline = True
+            yield error_format.format(e) + '\n'
+        if not ends_with_newline:
+            yield '\n'
     
     def execute_single_command(self, cmd_str: str):
         """Execute a single command without AI parsing to avoid recursion"""
+        for chunk in self.iter_ai_command(cmd_str):
+            self.stdout.write(chunk)
+
+    def iter_ai_command(self, cmd_str: str):
+        """Yield the output of an AI-suggested command, without further AI parsing"""
         try:
+            parsed = pipeline.parse(cmd_str.strip())
+            if parsed is not None:
+                yield from pipeline.run(parsed)
+                return
             parts = shlex.split(cmd_str.strip())
             if not parts:
                 return
@@ -194,23 +402,15 @@ class Shell(Cmd):
             cmd_args = parts[1:]
             
             if cmd_name in COMMANDS:
-                try:
-                    output = COMMANDS[cmd_name](cmd_args)
-                    if output:
-                        self.stdout.write(output + '\n')
-                except Exception as e:
-                    self.stdout.write(f'{Fore.RED}❌ Error in {cmd_name}: {e}{Style.RESET_ALL}\n')
+                yield from self.iter_single_command(cmd_name, cmd_args, f'{Fore.RED}❌ Error in {cmd_name}: {{}}{Style.RESET_ALL}')
             elif cmd_name in SYS_COMMANDS:
-                try:
-                    output = SYS_COMMANDS[cmd_name]()
-                    if output:
-                        self.stdout.write(output + '\n')
-                except Exception as e:
-                    self.stdout.write(f'Error in {cmd_name}: {e}\n')
+                yield from self.iter_single_command(cmd_name, cmd_args, f'Error in {cmd_name}: {{}}')
             else:
-                self.stdout.write(f'Unknown command: {cmd_name}\n')
+                fail()
+                yield f'Unknown command: {cmd_name}\n'
         except Exception as e:
-            self.stdout.write(f'Command execution error: {e}\n')
+            fail()
+            yield f'Command execution error: {e}\n'
     
     # Autocomplete for commands and file paths
     def complete(self, text, state):
@@ -219,23 +419,129 @@ class Shell(Cmd):
         line = buffer.strip().split()
         # Completing command names
         if len(line) <= 1:
-            options = list(COMMANDS.keys()) + list(SYS_COMMANDS.keys()) + ['exit']
+            options = list(COMMANDS.keys()) + list(SYS_COMMANDS.keys()) + list(pipeline.FILTERS) + ['exit']
             matches = [c for c in options if c.startswith(text)]
         else:
-            # Complete file system paths
+            # Complete file system paths relative to the session cwd
             import glob
-            pattern = text + '*'
+            pattern = self.session.resolve(text) + '*'
             matches = glob.glob(pattern)
+            if not os.path.isabs(os.path.expanduser(text)):
+                matches = [os.path.relpath(m, self.session.cwd) for m in matches]
         try:
             return matches[state]
         except IndexError:
             return None
 
+    def onecmd(self, line):
+        # Commands resolve paths through the active session, never os.chdir
+        with self.session.activate():
+            return super().onecmd(line)
+
     def run(self):
         self.cmdloop()
 
-    def run_command(self, cmd_str: str) -> str:
+    def stream_command(self, cmd_str: str):
+        """Execute a command and yield output chunks as they are produced"""
+        line = cmd_str.strip()
+        command = self.parseline(line)[0]
+        with self._lock:
+            if not line or line == 'exit' or hasattr(self, 'do_' + (command or '')):
+                # Built-in cmd.Cmd handlers (help, ...) only write to stdout
+                output = self.run_command(line, locked=True)
+                if output:
+                    yield output + '\n'
+                return
+            yield from self._iter_in_session(self.iter_command(line))
+
+    def run_structured(self, cmd_str: str):
+        """Run a command for a JSON client.
+
+        Returns the command's structured result (``Table``, ``KeyValues``,
+        ``Tree``) unrendered when it produces one, else its text output.
+        """
+        line = cmd_str.strip()
+        parts = shlex.split(line) if line else []
+        if not parts or split_background(line)[1] or pipeline.parse(line) is not None \
+                or (parts[0] not in COMMANDS and parts[0] not in SYS_COMMANDS):
+            return self.run_command(line)
+        from .commands import log_command
+        with self._lock, self.session.activate():
+            log_command(line)
+            self.session.history.append(line)
+            output = (COMMANDS.get(parts[0]) or SYS_COMMANDS[parts[0]])(parts[1:])
+            if is_result(output):
+                return output
+            if isinstance(output, str):
+                return output
+            return ''.join(render(chunk, self.session.mode) + '\n' if is_result(chunk) else chunk
+                           for chunk in output or ()).rstrip('\n')
+
+    def _iter_in_session(self, chunks):
+        try:
+            while True:
+                # Activate the session only while producing each chunk so the
+                # context never leaks across yields to the caller
+                with self.session.activate():
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            with self.session.activate():
+                chunks.close()
+
+    def start_job(self, cmd_str: str, notify: bool = False):
+        """Run a command in the background and return its Job.
+
+        Jobs do not take the shell lock, so the session stays usable
+        while they run; their output is buffered for polling. With
+        ``notify`` the shell announces the job when it finishes.
+        """
+        from .jobs import job_manager
+        line = cmd_str.strip()
+        command = self.parseline(line)[0]
+        if not line or line == 'exit' or hasattr(self, 'do_' + (command or '')):
+            raise ValueError(f"'{line}' cannot run as a job")
+        job = job_manager.start(line, self._iter_in_session(self.iter_command(line)), session_id=self.session.id)
+        job.notify = notify
+        return job
+
+    def run_batch(self, chain, stop_on_error: bool = False):
+        """Run [(command, connector), ...] in order under one lock.
+
+        Returns one dict per command with its raw output, status ('ok',
+        'error' or 'skipped') and duration. A command after ``&&`` is
+        skipped when the previous one failed, like a POSIX shell;
+        ``stop_on_error`` skips everything after the first failure.
+        """
+        results = []
+        ok = True
+        failed = False
+        with self._lock:
+            for command, connector in chain:
+                if (connector == '&&' and not ok) or (stop_on_error and failed):
+                    results.append({'command': command, 'output': '', 'status': 'skipped', 'duration_ms': 0.0})
+                    continue
+                start = time.perf_counter()
+                with track() as status:
+                    output = self.run_command(command, locked=True)
+                ok = not status.failed
+                failed = failed or not ok
+                results.append({
+                    'command': command,
+                    'output': output,
+                    'status': 'ok' if ok else 'error',
+                    'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+                })
+        return results
+
+    def run_command(self, cmd_str: str, locked: bool = False) -> str:
         buffer = io.StringIO()
+        # A shell instance belongs to one session; serialize its requests
+        if not locked:
+            with self._lock:
+                return self.run_command(cmd_str, locked=True)
         old_stdout = self.stdout
         self.stdout = buffer
         try:
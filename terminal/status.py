@@ -0,0 +1,50 @@
+"""
+Whether the command being run failed.
+
+Failure is recorded as it happens instead of being guessed from the
+output afterwards: the shell marks a command failed when it raises, is
+unknown or cannot be parsed, and commands that print an error and carry
+on (``rm`` with several operands, ``grep`` on a bad option) call
+``fail()`` or return ``error_text(...)``. ``Shell.run_batch`` reads it
+for ``&&`` and ``stop_on_error``, and jobs for their final state.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from colorama import Fore, Style
+
+_status = ContextVar('terminal_status', default=None)
+
+
+class Status:
+    """Outcome of the commands run under ``track()``"""
+
+    def __init__(self):
+        self.failed = False
+
+
+def fail():
+    """Mark the running command as failed; outside ``track()`` this does nothing"""
+    status = _status.get()
+    if status is not None:
+        status.failed = True
+
+
+def error_text(message):
+    """Mark the running command as failed and return ``message`` in red"""
+    fail()
+    return f"{Fore.RED}{message}{Style.RESET_ALL}"
+
+
+@contextmanager
+def track():
+    """Collect the status of everything run inside the block.
+
+    Generators consumed inside the block report into it too, since they
+    run in the context of whoever iterates them.
+    """
+    status = Status()
+    token = _status.set(status)
+    try:
+        yield status
+    finally:
+        _status.reset(token)
@@ -1,30 +1,415 @@
-import psutil
+import heapq
+import os
+import threading
+import time
+from collections import deque
 
 
-def cpu():
+class MetricsSampler:
+    """Background sampler keeping a rolling window of system metrics.
+
+    A daemon thread samples CPU (overall and per-core), memory and load
+    average every ``interval`` seconds into a ring buffer, so commands can
+    answer from the latest sample instead of blocking on psutil.
+    """
+
+    def __init__(self, interval=1.0, history=300):
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the sampler thread if it is not already running"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            import psutil  # Imported on first use to keep CLI startup fast
+            self._stop.clear()
+            # Prime psutil's counters so the first real sample has a baseline
+            psutil.cpu_percent(interval=None)
+            psutil.cpu_percent(interval=None, percpu=True)
+            self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the sampler thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 2)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample_once()
+            except Exception:
+                pass  # Never let a bad sample kill the sampler
+
+    def sample_once(self):
+        """Take one sample and append it to the ring buffer"""
+        import psutil
+        per_core = psutil.cpu_percent(interval=None, percpu=True)
+        memory = psutil.virtual_memory()
+        try:
+            load = os.getloadavg()
+        except (AttributeError, OSError):
+            load = None
+        sample = {
+            'time': time.time(),
+            'cpu': psutil.cpu_percent(interval=None),
+            'per_core': per_core,
+            'mem_percent': memory.percent,
+            'mem_total': memory.total,
+            'mem_used': memory.used,
+            'mem_available': memory.available,
+            'load': load,
+        }
+        with self._lock:
+            self.samples.append(sample)
+        self._ready.set()
+        return sample
+
+    def latest(self):
+        """Return the most recent sample, starting the sampler if needed"""
+        self.start()
+        if not self._ready.wait(self.interval * 2):
+            return self.sample_once()
+        with self._lock:
+            return self.samples[-1]
+
+    def window(self, seconds):
+        """Return samples taken within the last ``seconds`` seconds"""
+        self.latest()
+        cutoff = time.time() - seconds
+        with self._lock:
+            return [s for s in self.samples if s['time'] >= cutoff]
+
+    def stats(self, key, seconds):
+        """Return min/avg/max of ``key`` over the last ``seconds`` seconds"""
+        values = [s[key] for s in self.window(seconds)]
+        if not values:
+            return None
+        return {
+            'min': min(values),
+            'avg': sum(values) / len(values),
+            'max': max(values),
+            'count': len(values),
+        }
+
+
+# Global sampler instance, cadence configurable through the environment
+sampler = MetricsSampler(
+    interval=float(os.environ.get('TERMINAL_SAMPLE_INTERVAL', 1.0)),
+    history=int(os.environ.get('TERMINAL_SAMPLE_HISTORY', 300)),
+)
+
+
+_host_facts = None
+_host_facts_lock = threading.Lock()
+
+
+def get_host_facts():
+    """Facts that cannot change while we run, gathered once.
+
+    ``platform.architecture()`` and ``platform.processor()`` shell out,
+    so ``sysinfo`` reads them from here instead of on every call.
+    """
+    global _host_facts
+    with _host_facts_lock:
+        if _host_facts is None:
+            import platform
+            import sys
+            import psutil
+            _host_facts = {
+                'os': platform.platform(),
+                'architecture': platform.architecture()[0],
+                'processor': platform.processor() or "Unknown",
+                'python': sys.version.split()[0],
+                'cores': psutil.cpu_count() or os.cpu_count() or 1,
+                'boot_time': psutil.boot_time(),
+            }
+        return _host_facts
+
+
+def warm_host_facts():
+    """Gather the host facts on a background thread (at startup)"""
+    threading.Thread(target=get_host_facts, name='host-facts', daemon=True).start()
+
+
+def parse_window(args):
+    """Extract the ``--window N`` option from command arguments"""
+    args = list(args or [])
+    if '--window' in args:
+        idx = args.index('--window')
+        if idx + 1 >= len(args):
+            raise ValueError("--window: missing number of seconds")
+        try:
+            return float(args[idx + 1])
+        except ValueError:
+            raise ValueError(f"--window: invalid number of seconds '{args[idx + 1]}'")
+    return None
+
+
+def format_window(label, stats, seconds):
+    """Format min/avg/max stats for a metric window"""
+    if not stats:
+        return f"{label}: no samples in the last {seconds:g}s"
+    return (f"{label} (last {seconds:g}s, {stats['count']} samples): "
+            f"min {stats['min']:.1f}% / avg {stats['avg']:.1f}% / max {stats['max']:.1f}%")
+
+
+def cpu(args=None):
     """Return CPU usage percentage."""
-    return f"CPU Usage: {psutil.cpu_percent(interval=1)}%"
+    seconds = parse_window(args)
+    if seconds is not None:
+        return format_window("CPU Usage", sampler.stats('cpu', seconds), seconds)
+    sample = sampler.latest()
+    output = f"CPU Usage: {sample['cpu']}%"
+    if args and ('--per-core' in args or '-c' in args):
+        cores = [f"  Core {i}: {pct}%" for i, pct in enumerate(sample['per_core'])]
+        output += '\n' + '\n'.join(cores)
+    return output
 
 
-def mem():
+def mem(args=None):
     """Return memory usage percentage."""
-    mem = psutil.virtual_memory()
-    return f"Memory Usage: {mem.percent}%"
+    seconds = parse_window(args)
+    if seconds is not None:
+        return format_window("Memory Usage", sampler.stats('mem_percent', seconds), seconds)
+    return f"Memory Usage: {sampler.latest()['mem_percent']}%"
 
 
-def ps():
-    """Return list of running processes."""
-    output = []
-    for proc in psutil.process_iter(['pid', 'name']):
-        try:
+# Newlines, tabs and other control characters in argv would break table rows
+_CONTROL_CHARS = dict.fromkeys([*range(32), 127], ' ')
+
+
+def _clean_cmdline(argv, width):
+    line = ' '.join(argv).translate(_CONTROL_CHARS)
+    return line if len(line) <= width else line[:width - 1] + '…'
+
+
+class ProcessTable:
+    """Cached process snapshots shared by ``ps`` and ``top``.
+
+    One walk of the process list serves every caller for ``ttl`` seconds.
+    %CPU is the CPU time each process used between two snapshots divided
+    by the wall time between them, so nothing blocks to sample; a process
+    seen for the first time gets its lifetime average, like ``ps``.
+    Command lines are only read for the rows actually shown, and cached
+    per process; control characters become spaces and they are cut to
+    ``cmd_width`` characters, so one process is always one short row.
+    """
+
+    ATTRS = ['pid', 'name', 'username', 'cpu_times', 'memory_info', 'num_threads', 'create_time', 'status']
+
+    def __init__(self, ttl=2.0, cmd_width=256):
+        self.ttl = ttl
+        self.cmd_width = cmd_width
+        self._lock = threading.Lock()
+        self._rows = []
+        self._taken = 0.0
+        self._cpu = {}  # (pid, create_time) -> (cpu seconds, snapshot time)
+        self._cmdlines = {}
+        self._mem_total = None
+        self.refreshes = 0
+
+    def snapshot(self):
+        """Return the process rows, refreshing them if older than ``ttl``"""
+        with self._lock:
+            if not self._rows or time.monotonic() - self._taken >= self.ttl:
+                self._refresh()
+            return self._rows
+
+    def _refresh(self):
+        import psutil
+        if self._mem_total is None:
+            self._mem_total = psutil.virtual_memory().total
+        now = time.monotonic()
+        wall_now = time.time()
+        rows = []
+        cpu = {}
+        for proc in psutil.process_iter(self.ATTRS):
             info = proc.info
-            output.append(f"{info['pid']}	{info['name']}")
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            times = info['cpu_times']
+            key = (info['pid'], info['create_time'])
+            used = times.user + times.system if times else 0.0
+            previous = self._cpu.get(key)
+            if previous and now > previous[1]:
+                percent = (used - previous[0]) / (now - previous[1]) * 100
+            elif info['create_time']:
+                percent = used / max(wall_now - info['create_time'], 1e-6) * 100
+            else:
+                percent = 0.0
+            cpu[key] = (used, now)
+            rss = info['memory_info'].rss if info['memory_info'] else 0
+            rows.append({
+                'pid': info['pid'],
+                'name': info['name'] or '',
+                'user': info['username'] or '?',
+                'cpu': max(percent, 0.0),
+                'rss': rss,
+                'mem': rss / self._mem_total * 100 if self._mem_total else 0.0,
+                'threads': info['num_threads'] or 0,
+                'status': info['status'] or '?',
+                'key': key,
+                'proc': proc,
+            })
+        # Forget processes that exited
+        self._cpu = cpu
+        self._cmdlines = {key: value for key, value in self._cmdlines.items() if key in cpu}
+        self._rows = rows
+        self._taken = now
+        self.refreshes += 1
+
+    def cmdline(self, row):
+        """The command line of a row's process (cached; name if unreadable)"""
+        key = row['key']
+        if key not in self._cmdlines:
+            try:
+                self._cmdlines[key] = _clean_cmdline(row['proc'].cmdline(), self.cmd_width) or f"[{row['name']}]"
+            except Exception:
+                self._cmdlines[key] = f"[{row['name']}]"
+        return self._cmdlines[key]
+
+    def query(self, sort=None, reverse=False, limit=None, name=None, user=None):
+        """Return (matching rows sorted and cut to ``limit``, number matched)"""
+        rows = self.snapshot()
+        if name:
+            needle = name.lower()
+            rows = [row for row in rows if needle in row['name'].lower()]
+        if user:
+            rows = [row for row in rows if row['user'] == user or row['user'].endswith('\\' + user)]
+        matched = len(rows)
+        if sort:
+            # Metrics read best largest-first; names and ids smallest-first
+            descending = (sort in PS_DESCENDING) != reverse
+            key = lambda row: row[sort]
+            if limit and limit < matched:
+                pick = heapq.nlargest if descending else heapq.nsmallest
+                rows = pick(limit, rows, key=key)
+            else:
+                rows = sorted(rows, key=key, reverse=descending)
+        elif reverse:
+            rows = rows[::-1]
+        if limit:
+            rows = rows[:limit]
+        return rows, matched
+
+
+# column -> (header, justification); cmd is unbounded so it always goes last
+PS_COLUMNS = {
+    'pid': ('PID', 'right'),
+    'user': ('USER', 'left'),
+    'cpu': ('%CPU', 'right'),
+    'mem': ('%MEM', 'right'),
+    'rss': ('RSS', 'right'),
+    'threads': ('THR', 'right'),
+    'status': ('STAT', 'left'),
+    'name': ('NAME', 'left'),
+    'cmd': ('COMMAND', 'left'),
+}
+PS_DESCENDING = {'cpu', 'mem', 'rss', 'threads'}
+PS_DEFAULT_COLUMNS = ['pid', 'user', 'cpu', 'mem', 'rss', 'name']
+TOP_COLUMNS = ['pid', 'user', 'cpu', 'mem', 'rss', 'threads', 'name']
+
+process_table = ProcessTable(ttl=float(os.environ.get('TERMINAL_PS_TTL', 2.0)),
+                             cmd_width=int(os.environ.get('TERMINAL_PS_CMD_WIDTH', 256)))
+PS_LIMIT = int(os.environ.get('TERMINAL_PS_LIMIT', 200))
+
+
+def _format_rss(rss):
+    for unit in ('K', 'M', 'G'):
+        rss /= 1024
+        if rss < 1024 or unit == 'G':
+            return f"{rss:.0f}{unit}" if rss >= 10 else f"{rss:.1f}{unit}"
+
+
+def _format_cell(column, row):
+    if column == 'cmd':
+        return process_table.cmdline(row)
+    value = row[column]
+    if column in ('cpu', 'mem'):
+        return f"{value:.1f}"
+    if column == 'rss':
+        return _format_rss(value)
+    return str(value)
+
+
+def parse_ps_args(args, columns, sort=None, limit=PS_LIMIT):
+    """Parse ps/top options into query keyword arguments plus columns"""
+    options = {'sort': sort, 'reverse': False, 'limit': limit, 'name': None, 'user': None}
+    args = list(args or [])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        value = args[i + 1] if i + 1 < len(args) else None
+        if arg in ('-r', '--reverse'):
+            options['reverse'] = True
+            i += 1
             continue
-    return '\n'.join(output)
+        if arg not in ('-o', '--columns', '--sort', '-n', '--top', '--name', '--user', '-u'):
+            raise ValueError(f"unknown option '{arg}'")
+        if value is None:
+            raise ValueError(f"{arg}: missing value")
+        if arg in ('-o', '--columns'):
+            columns = [c.strip() for c in value.split(',') if c.strip()]
+            unknown = [c for c in columns if c not in PS_COLUMNS]
+            if unknown or not columns:
+                raise ValueError(f"unknown column '{','.join(unknown)}' (choose from {', '.join(PS_COLUMNS)})")
+        elif arg == '--sort':
+            if value not in PS_COLUMNS or value == 'cmd':
+                raise ValueError(f"cannot sort by '{value}'")
+            options['sort'] = value
+        elif arg in ('-n', '--top'):
+            if not value.isdigit():
+                raise ValueError(f"{arg}: invalid count '{value}'")
+            options['limit'] = int(value)  # 0 shows every process
+        elif arg == '--name':
+            options['name'] = value
+        else:
+            options['user'] = value
+        i += 2
+    if columns and 'cmd' in columns and columns[-1] != 'cmd':
+        # The unbounded column has to come last
+        columns = [c for c in columns if c != 'cmd'] + ['cmd']
+    return columns, options
+
+
+def _process_table(columns, rows, matched):
+    from .render import Column, Table
+    footer = f"... {matched - len(rows)} more processes (use -n 0 for all)" if matched > len(rows) else None
+    return Table([Column(PS_COLUMNS[c][0], justify=PS_COLUMNS[c][1]) for c in columns],
+                 [[_format_cell(c, row) for c in columns] for row in rows], footer=footer)
+
+
+def ps(args=None):
+    """ps [-o cols] [--sort col] [-r] [-n N] [--name text] [--user name]"""
+    columns, options = parse_ps_args(args, PS_DEFAULT_COLUMNS)
+    rows, matched = process_table.query(**options)
+    return _process_table(columns, rows, matched)
+
+
+def top(args=None):
+    """One-shot ``top``: summary line plus the busiest processes"""
+    columns, options = parse_ps_args(args, TOP_COLUMNS, sort='cpu', limit=15)
+    rows, matched = process_table.query(**options)
+    return _iter_top(columns, rows, matched)
+
+
+def _iter_top(columns, rows, matched):
+    sample = sampler.latest()
+    load = ' '.join(f"{value:.2f}" for value in sample['load']) if sample['load'] else 'n/a'
+    yield (f"Tasks: {len(process_table.snapshot())}  CPU: {sample['cpu']:.1f}%  "
+           f"Mem: {sample['mem_percent']:.1f}%  Load: {load}\n")
+    yield _process_table(columns, rows, matched)
+
 
 SYS_COMMANDS = {
     'cpu': cpu,
     'mem': mem,
     'ps': ps,
+    'top': top,
 }
@@ -0,0 +1,95 @@
+"""
+Parallel directory walker shared by search and tree.
+
+Directories are read with ``os.scandir`` (reusing the cached
+``DirEntry.is_dir()`` instead of a separate stat per entry) and every
+subdirectory is scanned as its own task on a thread pool.
+"""
+import fnmatch
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DEFAULT_WORKERS = int(os.environ.get('TERMINAL_WALK_WORKERS', min(32, (os.cpu_count() or 1) * 4)))
+
+
+class WalkEntry:
+    """A file or directory found by the walker"""
+
+    __slots__ = ('path', 'name', 'parent', 'is_dir', 'depth')
+
+    def __init__(self, path, name, parent, is_dir, depth):
+        self.path = path
+        self.name = name
+        self.parent = parent
+        self.is_dir = is_dir
+        self.depth = depth
+
+    def __repr__(self):
+        return f"WalkEntry({self.path!r}, is_dir={self.is_dir})"
+
+
+def _scan(path):
+    """Read one directory, returning [(name, is_dir, descend), ...]"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+                # Never descend through symlinks, like os.walk's default
+                descend = is_dir and not entry.is_symlink()
+            except OSError:
+                is_dir = descend = False
+            entries.append((entry.name, is_dir, descend))
+    return entries
+
+
+def walk(root, max_depth=None, include_hidden=True, exclude=(), match=None,
+         max_results=None, workers=None, on_error=None):
+    """Yield WalkEntry objects for everything under ``root``.
+
+    ``max_depth`` limits how deep to go (entries directly in ``root`` have
+    depth 1), ``exclude`` is a list of glob patterns for names to skip
+    (excluded directories are not descended), ``match`` filters which
+    entries are yielded and ``max_results`` stops the walk once that many
+    entries were yielded. Directories are yielded in completion order;
+    callers that need a stable order should sort.
+    """
+    excluded = re.compile('|'.join(fnmatch.translate(p) for p in exclude)) if exclude else None
+    executor = ThreadPoolExecutor(max_workers=workers or DEFAULT_WORKERS)
+    pending = {}
+    found = 0
+
+    def submit(path, depth):
+        pending[executor.submit(_scan, path)] = (path, depth)
+
+    try:
+        submit(root, 1)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                parent, depth = pending.pop(future)
+                try:
+                    entries = future.result()
+                except OSError as e:
+                    if on_error:
+                        on_error(parent, e)
+                    continue
+                for name, is_dir, descend in entries:
+                    if not include_hidden and name.startswith('.'):
+                        continue
+                    if excluded and excluded.match(name):
+                        continue
+                    path = os.path.join(parent, name)
+                    if descend and (max_depth is None or depth < max_depth):
+                        submit(path, depth + 1)
+                    entry = WalkEntry(path, name, parent, is_dir, depth)
+                    if match is None or match(entry):
+                        yield entry
+                        found += 1
+                        if max_results and found >= max_results:
+                            return
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
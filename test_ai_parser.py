@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+
+# Test the cached Gemini model using a local stub instead of the network
+import sys
+import os
+import time
+import json
+import asyncio
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(__file__))
+
+from terminal import ai_parser
+from terminal.rate_limit import TokenBucketLimiter
+
+# Keep the tests' API budget in memory instead of the shared database
+ai_parser.rate_limiter = TokenBucketLimiter(max_queue=12, max_wait=10, path=':memory:')
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class StubModel:
+    """Stands in for genai.GenerativeModel without any network access"""
+
+    def __init__(self, reply="Here you go:\nls -l\nsearch *.py\n# done"):
+        self.reply = reply
+        self.prompts = []
+
+    def generate_content(self, prompt, generation_config=None, stream=False):
+        self.prompts.append(prompt)
+        return StubResponse(self.reply)
+
+
+class FakeModelServer:
+    """Local HTTP server speaking the HTTPModel protocol, with a configurable delay"""
+
+    def __init__(self, reply="ls -l", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.requests = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers['Content-Length']))
+                server.requests += 1
+                time.sleep(server.delay)
+                body = json.dumps({'text': server.reply}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_stub_model_translation():
+    stub = StubModel()
+    ai_parser.set_model(stub)
+    ai_parser.translation_cache.clear()
+    try:
+        assert ai_parser.try_ai_parsing("list everything") == ['ls -l', 'search *.py']
+        assert stub.prompts[0].startswith(ai_parser.PROMPT_PREAMBLE)
+        assert stub.prompts[0].endswith("User instruction: list everything\nCommands:")
+    finally:
+        ai_parser.set_model(None)
+
+
+def test_gemini_client_configured_once():
+    import google.generativeai as genai
+    calls = {'configure': 0, 'model': 0}
+    original = genai.configure, genai.GenerativeModel
+    genai.configure = lambda **kwargs: calls.__setitem__('configure', calls['configure'] + 1)
+    genai.GenerativeModel = lambda *a, **kw: calls.__setitem__('model', calls['model'] + 1) or StubModel()
+    os.environ['GEMINI_API_KEY'] = 'test-key'
+    try:
+        first = ai_parser.get_model()
+        assert ai_parser.get_model() is first
+        assert calls == {'configure': 1, 'model': 1}
+    finally:
+        genai.configure, genai.GenerativeModel = original
+        del os.environ['GEMINI_API_KEY']
+        ai_parser._model = None
+
+
+def test_per_request_overhead_without_network():
+    # Every request reuses one configured client and model: nothing is rebuilt per call
+    import google.generativeai as genai
+    stub = StubModel("pwd")
+    calls = {'configure': 0, 'model': 0}
+    original = genai.configure, genai.GenerativeModel
+    genai.configure = lambda **kwargs: calls.__setitem__('configure', calls['configure'] + 1)
+    genai.GenerativeModel = lambda *a, **kw: calls.__setitem__('model', calls['model'] + 1) or stub
+    limiter = ai_parser.rate_limiter
+    ai_parser.rate_limiter = TokenBucketLimiter(max_requests=10_000, path=':memory:')
+    ai_parser.translation_cache.clear()
+    os.environ['GEMINI_API_KEY'] = 'test-key'
+    try:
+        for i in range(200):
+            assert ai_parser.try_ai_parsing(f"frobnicate the widget number {i}") == ['pwd']
+        assert calls == {'configure': 1, 'model': 1} and len(stub.prompts) == 200
+    finally:
+        genai.configure, genai.GenerativeModel = original
+        del os.environ['GEMINI_API_KEY']
+        ai_parser._model = None
+        ai_parser.rate_limiter = limiter
+        ai_parser.translation_cache.clear()
+
+
+def test_translation_cache_hits_skip_model_and_rate_limiter():
+    stub = StubModel("ls -l")
+    ai_parser.set_model(stub)
+    ai_parser.translation_cache.clear()
+    ai_parser.rate_limiter.reset()
+    try:
+        assert ai_parser.try_ai_parsing("What files are here?") == ['ls -l']
+        assert ai_parser.try_ai_parsing("  what   files are HERE ") == ['ls -l']
+        assert len(stub.prompts) == 1
+        assert ai_parser.rate_limiter.get_status()['requests_made'] == 1
+        stats = ai_parser.get_ai_stats()['cache']
+        assert (stats['hits'], stats['misses']) == (1, 1)
+    finally:
+        ai_parser.rate_limiter.reset()
+        ai_parser.set_model(None)
+
+
+def test_translation_cache_lru_ttl_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'cache.json')
+        cache = ai_parser.TranslationCache(max_entries=2, ttl=60, path=path)
+        cache.put("a", ['ls'])
+        cache.put("b", ['pwd'])
+        cache.get("a")
+        cache.put("c", ['cpu'])
+        assert cache.get("b") is None
+        assert ai_parser.TranslationCache(max_entries=2, path=path).get("a") == ['ls']
+
+        expired = ai_parser.TranslationCache(ttl=-1)
+        expired.put("a", ['ls'])
+        assert expired.get("a") is None
+
+
+def test_rule_engine_matches_fallback_patterns():
+    cases = {
+        "show all python files": ['search *.py'],
+        "show all files": ['ls -l'],
+        "clear the screen": ['clear'],
+        "create a new file notes.txt and move it into static folder": ['touch notes.txt', 'mv notes.txt static/'],
+        "make a new folder docs and move readme.md into it": ['mkdir docs', 'mv readme.md docs/'],
+        "create a new folder called src and move main.py into it": ['mkdir src', 'mv main.py src/'],
+        "create a file named a.py and write print(1) in it": ['write a.py "print(1)"'],
+        "please run app.py": ['python app.py'],
+    }
+    for text, expected in cases.items():
+        assert ai_parser.parse_nl(text) == expected, text
+    # Unmatched phrases are left for the model
+    assert ai_parser.engine.match("what files are here") is None
+    assert ai_parser.engine.match("run") is None
+
+
+def test_rule_engine_benchmark():
+    from utils.nl_benchmark import load_phrases, run_benchmark, synthetic_corpus
+    assert "show all python files" in load_phrases()
+    result = run_benchmark(synthetic_corpus(500), repeat=1)
+    assert result['phrases'] == 500 and 0 < result['matched'] < 500
+
+
+def test_concurrent_identical_translations_share_one_call():
+    server = FakeModelServer("ls -l\nsearch *.py", delay=0.3)
+    os.environ['TERMINAL_AI_URL'] = server.url
+    ai_parser.translation_cache.clear()
+    ai_parser.rate_limiter.reset()
+    results = []
+    try:
+        threads = [threading.Thread(target=lambda: results.append(ai_parser.try_ai_parsing("list my files")))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [['ls -l', 'search *.py']] * 8
+        assert server.requests == 1
+        assert ai_parser.single_flight.get_status()['in_flight'] == 0
+    finally:
+        del os.environ['TERMINAL_AI_URL']
+        ai_parser.rate_limiter.reset()
+        server.close()
+
+
+def test_translation_timeout_cancels_call():
+    server = FakeModelServer("pwd", delay=1.0)
+    os.environ['TERMINAL_AI_URL'] = server.url
+    ai_parser.translation_cache.clear()
+    try:
+        start = time.perf_counter()
+        assert ai_parser.aio.run(ai_parser.translate_async("where am i", timeout=0.1)) == []
+        assert time.perf_counter() - start < 0.5
+        # The only waiter gave up, so the shared call was dropped
+        assert ai_parser.single_flight.get_status()['in_flight'] == 0
+    finally:
+        del os.environ['TERMINAL_AI_URL']
+        ai_parser.rate_limiter.reset()
+        server.close()
+
+
+def test_token_bucket_shared_between_limiters():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rate_limit.db')
+        # Two limiters on one database behave like two worker processes
+        first = TokenBucketLimiter(max_requests=3, time_window=60, path=path)
+        second = TokenBucketLimiter(max_requests=3, time_window=60, path=path)
+        assert first.acquire() and second.acquire() and first.acquire()
+        assert not second.acquire()
+        status = first.get_status()
+        assert status['requests_remaining'] == 0 and status['shared']
+
+
+def test_token_bucket_bounded_wait_queue():
+    # 10 requests/second, bucket of 1, at most 2 waiting for up to 0.5s
+    limiter = TokenBucketLimiter(max_requests=10, time_window=1, burst=1, max_queue=2, max_wait=0.5, path=':memory:')
+    assert limiter.reserve() == 0
+    first, second = limiter.reserve(), limiter.reserve()
+    assert 0 < first < second <= 0.25
+    assert limiter.get_status()['queued'] == 2
+    assert limiter.reserve() is None  # Queue is full
+    limiter.refund()
+    limiter.refund()
+    assert limiter.reserve(max_wait=0) is None  # Would have to wait
+    start = time.perf_counter()
+    assert limiter.acquire()
+    assert 0.05 < time.perf_counter() - start < 0.3
+
+
+def test_token_bucket_async_keeps_sqlite_off_the_event_loop():
+    limiter = TokenBucketLimiter(max_requests=10, time_window=1, burst=1, max_queue=1, max_wait=5, path=':memory:')
+    threads = []
+    transact = limiter._transact
+    limiter._transact = lambda update: threads.append(threading.current_thread()) or transact(update)
+
+    async def scenario():
+        assert await limiter.acquire_async()
+        waiting = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.02)
+        waiting.cancel()  # Cancelled while queued: its token is refunded
+        try:
+            await waiting
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    # reserve, reserve, refund - none of them on the loop's thread
+    assert len(threads) == 3 and threading.current_thread() not in threads
+    assert limiter.reserve(max_wait=0) is None and limiter.get_status()['queued'] == 0
+
+
+if __name__ == "__main__":
+    test_stub_model_translation()
+    test_gemini_client_configured_once()
+    test_per_request_overhead_without_network()
+    test_translation_cache_hits_skip_model_and_rate_limiter()
+    test_translation_cache_lru_ttl_and_persistence()
+    test_rule_engine_matches_fallback_patterns()
+    test_rule_engine_benchmark()
+    test_concurrent_identical_translations_share_one_call()
+    test_translation_timeout_cancels_call()
+    test_token_bucket_shared_between_limiters()
+    test_token_bucket_bounded_wait_queue()
+    test_token_bucket_async_keeps_sqlite_off_the_event_loop()
+    print("All AI parser tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Test batched command execution used by /execute/batch
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell, split_command_chain
+from terminal.session import Session
+
+
+def test_split_command_chain():
+    assert split_command_chain("pwd; ls && cat 'a; b' && echo \"x && y\"") == [
+        ('pwd', None), ('ls', ';'), ("cat 'a; b'", '&&'), ('echo "x && y"', '&&'),
+    ]
+    assert split_command_chain(" ;; pwd ; ") == [('pwd', ';')]
+    assert split_command_chain("echo a\\;b") == [('echo a\\;b', None)]
+
+
+def test_batch_statuses_and_short_circuit():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        results = shell.run_batch(split_command_chain("mkdir sub; cd sub; pwd; cd missing && pwd; pwd"))
+        assert [r['status'] for r in results] == ['ok', 'ok', 'ok', 'error', 'skipped', 'ok']
+        assert os.path.join(tmp, 'sub') in results[2]['output']
+        assert all(r['duration_ms'] >= 0 for r in results)
+        assert shell.session.cwd == os.path.join(tmp, 'sub')
+
+
+def test_batch_stop_on_error():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        chain = [(command, ';') for command in ['cat nope.txt', 'pwd']]
+        results = shell.run_batch(chain, stop_on_error=True)
+        assert [r['status'] for r in results] == ['error', 'skipped']
+
+
+def test_batch_status_does_not_depend_on_colors():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'bad.py'), 'w') as f:
+            f.write("raise SystemExit(3)\n")
+        for mode in ('cli', 'web'):
+            shell = Shell(Session(cwd=tmp, mode=mode))
+            # ls reports errors as plain "Error: ..." text
+            results = shell.run_batch(split_command_chain('ls missing && pwd'))
+            assert [(r['status'], r['command']) for r in results] == [('error', 'ls missing'), ('skipped', 'pwd')]
+            results = shell.run_batch(split_command_chain('python bad.py && pwd; jobs; nosuchcommand_xyz --flag'))
+            assert [r['status'] for r in results] == ['error', 'skipped', 'ok', 'error']
+
+
+if __name__ == "__main__":
+    test_split_command_chain()
+    test_batch_statuses_and_short_circuit()
+    test_batch_stop_on_error()
+    test_batch_status_does_not_depend_on_colors()
+    print("All batch tests passed")
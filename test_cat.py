@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+# Test the memory-mapped cat modes (head, tail, byte ranges, pages)
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session
+from terminal import fileview
+
+
+def make_shell(tmp):
+    with open(os.path.join(tmp, 'log.txt'), 'w') as f:
+        f.write(''.join(f"line {i}\n" for i in range(1, 1001)))
+    with open(os.path.join(tmp, 'blob.bin'), 'wb') as f:
+        f.write(b'\x7fELF\x00\x01' * 100)
+    open(os.path.join(tmp, 'empty.txt'), 'w').close()
+    return Shell(Session(cwd=tmp))
+
+
+def test_head_tail_and_ranges():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = make_shell(tmp)
+        assert shell.run_command('cat --head 2 log.txt') == 'line 1\nline 2'
+        assert shell.run_command('cat -n 1 log.txt') == 'line 1'
+        assert shell.run_command('cat --tail 2 log.txt') == 'line 999\nline 1000'
+        assert shell.run_command('cat --bytes 0:6 log.txt') == 'line 1'
+        assert shell.run_command('cat --bytes 7: log.txt').startswith('line 2\n')
+        assert shell.run_command('cat empty.txt') == ''
+        assert shell.run_command('cat --tail 5 empty.txt') == ''
+
+
+def test_paged_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = make_shell(tmp)
+        page = shell.run_command('cat --page 2 --page-size 10 log.txt')
+        assert page.startswith('line 11\n')
+        assert 'line 20\n' in page
+        assert 'next: cat --page 3' in page
+        assert 'next:' not in shell.run_command('cat --page 100 --page-size 10 log.txt')
+        assert 'cat: page 101 is past the end (1000 lines)' in shell.run_command('cat --page 101 --page-size 10 log.txt')
+        assert 'page 2 is past the end (0 lines)' in shell.run_command('cat --page 2 empty.txt')
+        assert shell.run_command('cat --page 1 empty.txt') == ''
+
+
+def test_binary_refused_and_output_bounded():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = make_shell(tmp)
+        assert 'binary file' in shell.run_command('cat blob.bin')
+        with fileview.MappedFile(os.path.join(tmp, 'log.txt')) as mapped:
+            chunks = list(fileview.iter_bytes(mapped, 0, mapped.size, limit=100))
+        assert sum(len(c) for c in chunks[:-1]) == 100
+        assert 'output truncated' in chunks[-1]
+
+
+if __name__ == "__main__":
+    test_head_tail_and_ranges()
+    test_paged_mode()
+    test_binary_refused_and_output_bounded()
+    print("All cat tests passed")
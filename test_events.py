@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# Test the /events broadcaster and the watch command
+import sys
+import os
+import json
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.events import EventHub, collect_status, format_sse
+from terminal.jobs import job_manager
+from terminal.shell import Shell
+from terminal.session import Session
+from terminal.pipeline import ANSI_ESCAPE
+
+
+def test_one_collector_feeds_every_subscriber():
+    calls = []
+    hub = EventHub(interval=0.05, collect=lambda: calls.append(1) or {'n': len(calls)})
+    first, second = hub.subscribe(), hub.subscribe()
+    a = [first.get(1) for _ in range(3)]
+    b = [second.get(1) for _ in range(3)]
+    assert [item[2]['n'] for item in a] == [item[2]['n'] for item in b] == [1, 2, 3]
+    # Late subscribers get the latest snapshot straight away
+    late = hub.subscribe()
+    assert late.get(0)[1] == 'status'
+    for subscription in (first, second, late):
+        subscription.close()
+    time.sleep(0.2)
+    assert not hub.get_status()['running']
+    collected = len(calls)
+    time.sleep(0.2)
+    assert len(calls) == collected  # Nobody listening, nothing collected
+
+
+def test_slow_subscriber_keeps_latest_events():
+    hub = EventHub(interval=60, max_pending=2, collect=lambda: {})
+    subscription = hub.subscribe()
+    for n in range(5):
+        hub.publish('status', {'n': n})
+    items = [subscription.get(0) for _ in range(3)]
+    assert [item[2].get('n') for item in items[:2]] == [3, 4] and items[2] is None
+    subscription.close()
+
+
+def test_sse_stream_format():
+    assert format_sse('status', {'a': 1}, 7) == 'id: 7\nevent: status\ndata: {"a": 1}\n\n'
+    hub = EventHub(interval=60, collect=collect_status)
+    stream = hub.stream(hub.subscribe())
+    assert next(stream).startswith('retry: ')
+    event = next(stream).splitlines()
+    data = json.loads(event[2][len('data: '):])
+    assert event[1] == 'event: status' and {'rate_limit', 'metrics'} <= set(data)
+    stream.close()
+    assert hub.get_status()['subscribers'] == 0
+
+
+def test_watch_command():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        output = ANSI_ESCAPE.sub('', shell.run_command('watch -c 2 pwd 0.1'))
+        assert output.count('Every 0.1s: pwd') == 2 and output.count(tmp) == 2
+        output = ANSI_ESCAPE.sub('', shell.run_command('watch -c 1 "ls | wc -l"'))
+        assert output.splitlines()[-1].strip() == '0'
+        assert 'cannot watch' in shell.run_command('watch watch pwd')
+        assert 'unknown command' in shell.run_command('watch nosuchthing')
+
+
+def test_watch_job_stops_when_cancelled():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        job = shell.start_job('watch pwd 30')
+        job.wait(0, 5)
+        start = time.time()
+        job.cancel()
+        assert job.join(5) and time.time() - start < 2
+        assert job.status == 'cancelled' and 'Every 30s: pwd' in job.read(0)[0]
+
+
+def test_watch_job_outlives_the_output_limit():
+    saved = job_manager.output_limit, job_manager.ring_bytes
+    job_manager.output_limit, job_manager.ring_bytes = 100, 200
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            job = Shell(Session(cwd=tmp, mode='web')).start_job('watch pwd 0.1')
+            deadline = time.time() + 5
+            while job.to_dict()['output_bytes'] < 500 and time.time() < deadline:
+                time.sleep(0.05)
+            assert job.to_dict()['output_bytes'] >= 500 and job.status == 'running'
+            # Only the ring is kept: the latest frames
+            assert 'Every 0.1s: pwd' in job.read(0)[0] and len(job.read(0)[0]) < 500
+            job.cancel()
+            assert job.join(5) and job.reason == 'cancelled'
+    finally:
+        job_manager.output_limit, job_manager.ring_bytes = saved
+
+
+if __name__ == "__main__":
+    test_one_collector_feeds_every_subscriber()
+    test_slow_subscriber_keeps_latest_events()
+    test_sse_stream_format()
+    test_watch_command()
+    test_watch_job_stops_when_cancelled()
+    test_watch_job_outlives_the_output_limit()
+    print("All event tests passed")
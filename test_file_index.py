@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Test the persistent filename index and glob/regex search
+import sys
+import os
+import tempfile
+import threading
+sys.path.append(os.path.dirname(__file__))
+
+from terminal import file_index
+from terminal.file_index import FileIndex, make_name_matcher
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def make_tree(tmp):
+    os.makedirs(os.path.join(tmp, 'src', 'pkg'))
+    for name in ['src/main.py', 'src/pkg/util.py', 'src/readme.md', 'notes.txt']:
+        open(os.path.join(tmp, name), 'w').close()
+
+
+def test_name_matcher_modes():
+    assert make_name_matcher('*.py')('Main.PY')
+    assert not make_name_matcher('*.py')('main.pyc')
+    assert make_name_matcher('ain')('main.py')
+    assert make_name_matcher(r'^u.*\.py$', regex=True)('util.py')
+
+
+def test_index_query_and_incremental_refresh():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        index = FileIndex(os.path.join(tmp, 'index.db'))
+        counts = index.rebuild(tmp)
+        assert counts['dirs'] == 3
+        found = sorted(os.path.relpath(p, tmp) for p, _ in index.query(tmp, '*.py'))
+        assert found == ['src/main.py', 'src/pkg/util.py']
+
+        os.remove(os.path.join(tmp, 'src', 'pkg', 'util.py'))
+        os.makedirs(os.path.join(tmp, 'src', 'new'))
+        open(os.path.join(tmp, 'src', 'new', 'extra.py'), 'w').close()
+        index.refresh()
+        found = sorted(os.path.relpath(p, tmp) for p, _ in index.query(tmp, '*.py'))
+        assert found == ['src/main.py', 'src/new/extra.py']
+        assert index.stats()['roots'][0]['path'] == tmp
+        index.close()
+
+
+def test_search_command_uses_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        saved = os.environ.get('TERMINAL_INDEX_PATH')
+        os.environ['TERMINAL_INDEX_PATH'] = os.path.join(tmp, 'index.db')
+        try:
+            shell = Shell(Session(cwd=tmp))
+            walked = shell.run_command('search *.py')
+            assert 'Indexed' in shell.run_command('search --rebuild-index')
+            indexed = shell.run_command('search *.py')
+            assert sorted(walked.splitlines()) == sorted(indexed.splitlines())
+            assert 'Found 2 matches' in indexed
+            assert 'Found 1 matches' in shell.run_command('search --regex ^read')
+            assert 'File index' in shell.run_command('search --index-stats')
+            assert 'not a directory' in shell.run_command('search --rebuild-index notes.txt')
+        finally:
+            if saved is None:
+                del os.environ['TERMINAL_INDEX_PATH']
+            else:
+                os.environ['TERMINAL_INDEX_PATH'] = saved
+
+
+def test_rebuild_writes_in_batches_without_holding_the_lock():
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'tree')
+        for i in range(6):
+            os.makedirs(os.path.join(root, f'd{i}'))
+            open(os.path.join(root, f'd{i}', 'f.txt'), 'w').close()
+        index = FileIndex(os.path.join(tmp, 'index.db'))
+        walking = []
+        scan_dir = file_index._scan_dir
+
+        def scan_and_check(path):
+            # Another thread can take the lock while the tree is being walked
+            acquired = []
+
+            def take_lock():
+                if index._lock.acquire(timeout=1):
+                    acquired.append(True)
+                    index._lock.release()
+
+            thread = threading.Thread(target=take_lock)
+            thread.start()
+            thread.join()
+            walking.append(bool(acquired))
+            return scan_dir(path)
+
+        saved = file_index.REBUILD_BATCH_DIRS
+        file_index._scan_dir, file_index.REBUILD_BATCH_DIRS = scan_and_check, 2
+        try:
+            counts = index.rebuild(root)
+        finally:
+            file_index._scan_dir, file_index.REBUILD_BATCH_DIRS = scan_dir, saved
+        assert all(walking) and counts['dirs'] == 7 and counts['entries'] == 12
+        assert len(list(index.query(root, '*.txt'))) == 6
+        try:
+            index.rebuild(os.path.join(root, 'missing'))
+            assert False, "expected an error for a missing directory"
+        except ValueError as e:
+            assert 'not a directory' in str(e)
+        assert [root['path'] for root in index.stats()['roots']] == [root]
+        index.close()
+
+
+if __name__ == "__main__":
+    test_name_matcher_modes()
+    test_index_query_and_incremental_refresh()
+    test_search_command_uses_index()
+    test_rebuild_writes_in_batches_without_holding_the_lock()
+    print("All file index tests passed")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# Test the parallel content search command
+import sys
+import os
+import re
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session
+from terminal.pipeline import ANSI_ESCAPE
+from terminal.fileview import grep_file
+
+
+def make_tree(root, files=80):
+    for i in range(files):
+        folder = os.path.join(root, 'src', f'pkg{i % 4}')
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f'mod{i}.py'), 'w') as f:
+            f.write(f"import os\n\ndef handler_{i}():\n    # TODO: handle {i}\n    return {i}\n")
+    with open(os.path.join(root, 'src', 'blob.bin'), 'wb') as f:
+        f.write(b'TODO\x00binary')
+    os.makedirs(os.path.join(root, 'src', '.cache'))
+    with open(os.path.join(root, 'src', '.cache', 'hidden.py'), 'w') as f:
+        f.write("# TODO hidden\n")
+
+
+def run(shell, command):
+    return ANSI_ESCAPE.sub('', shell.run_command(command))
+
+
+def test_grep_file_line_numbers_and_limits():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'log.txt')
+        with open(path, 'w') as f:
+            f.write("alpha\nbeta ERROR one\ngamma\nERROR two ERROR\nERROR three")
+        regex = re.compile(rb'ERROR', re.MULTILINE)
+        assert grep_file(path, regex) == [(2, 'beta ERROR one'), (4, 'ERROR two ERROR'), (5, 'ERROR three')]
+        assert grep_file(path, regex, max_count=1) == [(2, 'beta ERROR one')]
+        assert grep_file(path, regex, max_bytes=20) == [(2, 'beta ERROR one')]
+        assert grep_file(path, regex, count_only=True) == 3
+        with open(path, 'wb') as f:
+            f.write(b'ERROR\x00')
+        assert grep_file(path, regex) is None
+
+
+def test_grep_searches_tree_in_parallel():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        shell = Shell(Session(cwd=tmp))
+        lines = run(shell, 'grep TODO src').splitlines()
+        # 80 files is enough to go through the process pool
+        assert len(lines) == 80
+        assert os.path.join('src', 'pkg1', 'mod1.py') + ':4:    # TODO: handle 1' in lines
+        assert not any('blob.bin' in line or 'hidden' in line for line in lines)
+        assert len(run(shell, 'grep -a TODO src').splitlines()) == 81
+        assert run(shell, 'grep -c "handler_7\\b" src/pkg3') == os.path.join('src', 'pkg3', 'mod7.py') + ':1'
+        assert run(shell, 'grep -l -i "DEF HANDLER_12\\(" src') == os.path.join('src', 'pkg0', 'mod12.py')
+
+
+def test_grep_limits_and_pipes():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp, files=10)
+        shell = Shell(Session(cwd=tmp))
+        limited = run(shell, 'grep -m 3 import src').splitlines()
+        assert len(limited) == 4 and limited[-1] == '-- stopped after 3 matches --'
+        assert run(shell, 'grep -F "return 5" src | wc -l') == '1'
+        assert run(shell, 'grep missing_text src') == "🔍 No matches found for 'missing_text'"
+        assert 'No such file' in run(shell, 'grep TODO nope.py')
+        assert 'invalid pattern' in run(shell, 'grep "(" src')
+
+
+def test_grep_invert_and_line_number_options():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'notes.txt'), 'w') as f:
+            f.write("TODO one\ndone\nTODO two\n\nlast")
+        shell = Shell(Session(cwd=tmp))
+        assert run(shell, 'grep -v TODO notes.txt').splitlines() == ['notes.txt:2:done', 'notes.txt:4:', 'notes.txt:5:last']
+        assert run(shell, 'grep -vc TODO notes.txt') == 'notes.txt:3'
+        assert run(shell, 'grep -n TODO notes.txt').splitlines() == ['notes.txt:1:TODO one', 'notes.txt:3:TODO two']
+        assert run(shell, 'grep -v -m 1 -i todo notes.txt') == 'notes.txt:2:done\n-- stopped after 1 matches --'
+        assert run(shell, 'grep -- -x notes.txt') == "🔍 No matches found for '-x'"
+        assert "invalid option -- 'z'" in run(shell, 'grep -z TODO notes.txt')
+        assert "invalid option '--nope'" in run(shell, 'grep --nope TODO notes.txt')
+        # Piped input still goes through the line filter
+        assert run(shell, 'cat notes.txt | grep -vn TODO').splitlines() == ['2:done', '4:', '5:last']
+
+
+def test_grep_matches_stay_within_one_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'a.txt'), 'w') as f:
+            f.write("foo\nbar\nfoo bar\n")
+        with open(os.path.join(tmp, 'b.txt'), 'w') as f:
+            f.write("one\n\ntwo\n")
+        shell = Shell(Session(cwd=tmp))
+        assert run(shell, r'grep "foo\sbar" a.txt') == 'a.txt:3:foo bar'
+        assert run(shell, r'grep -c "foo\sbar" a.txt') == 'a.txt:1'
+        # The end of a file with a trailing newline is not an empty line 4
+        assert run(shell, 'grep "^$" b.txt') == 'b.txt:2:'
+        assert run(shell, 'grep -c "^$" b.txt') == 'b.txt:1'
+        # A long spanning match does not hide a shorter one inside its line
+        path = os.path.join(tmp, 'a.txt')
+        assert grep_file(path, re.compile(rb'o[^x]*r', re.MULTILINE)) == [(3, 'foo bar')]
+        assert grep_file(path, re.compile(rb'f[^x]*o', re.MULTILINE)) == [(1, 'foo'), (3, 'foo bar')]
+
+
+if __name__ == "__main__":
+    test_grep_file_line_numbers_and_limits()
+    test_grep_searches_tree_in_parallel()
+    test_grep_limits_and_pipes()
+    test_grep_invert_and_line_number_options()
+    test_grep_matches_stay_within_one_line()
+    print("All grep tests passed")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+# Test the batched history writer
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from terminal import history
+from terminal.history import HistoryStore, HistoryWriter, iter_reverse_lines, list_segments, parse_since
+from terminal.pipeline import ANSI_ESCAPE
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def read_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_batches_by_size_and_interval():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sub', 'history')
+        writer = HistoryWriter(path=path, flush_interval=0.2, flush_lines=3, fsync='never')
+        writer.log('ls')
+        writer.log('pwd')
+        assert not os.path.exists(path)  # Still queued
+        writer.log('cd src')
+        assert [line.split('] ', 1)[1] for line in read_lines(path)] == ['ls', 'pwd', 'cd src']
+        writer.log('tree\nrm -rf /')
+        time.sleep(0.5)
+        assert read_lines(path)[-1].endswith('] tree rm -rf /')
+        assert writer.get_status()['flushes'] == 2
+        writer.close()
+
+
+def test_fsync_always_writes_immediately_and_survives_rotation():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history')
+        writer = HistoryWriter(path=path, fsync='always')
+        writer.log('one')
+        assert len(read_lines(path)) == 1
+        os.rename(path, path + '.1')
+        writer.log('two')
+        assert [line.split('] ', 1)[1] for line in read_lines(path)] == ['two']
+        writer.close()
+        try:
+            HistoryWriter(path=path, fsync='sometimes')
+            assert False, "expected an invalid policy error"
+        except ValueError:
+            pass
+
+
+def test_processes_append_without_interleaving():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history')
+        code = ("import sys; sys.path.insert(0, sys.argv[1])\n"
+                "from terminal.history import HistoryWriter\n"
+                "w = HistoryWriter(path=sys.argv[2], flush_lines=7, fsync='never')\n"
+                "for i in range(500): w.log(f'proc {sys.argv[3]} command {i} ' + 'x' * 200)\n"
+                "w.close()\n")
+        root = os.path.dirname(os.path.abspath(__file__))
+        procs = [subprocess.Popen([sys.executable, '-c', code, root, path, str(n)]) for n in range(4)]
+        assert all(p.wait() == 0 for p in procs)
+        lines = read_lines(path)
+        assert len(lines) == 2000
+        assert all(line.endswith(' ' + 'x' * 200) and '] proc ' in line for line in lines)
+
+
+def test_shell_logs_each_command_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = history._writer
+        history._writer = HistoryWriter(path=os.path.join(tmp, 'history'), fsync='never')
+        try:
+            shell = Shell(Session(cwd=tmp))
+            for command in ('pwd', 'mkdir sub', 'cd sub', 'ls'):
+                shell.run_command(command)
+            history._writer.flush()
+            logged = [line.split('] ', 1)[1] for line in read_lines(history._writer.path)]
+            assert logged == ['pwd', 'mkdir sub', 'cd sub', 'ls']
+        finally:
+            history._writer.close()
+            history._writer = saved
+
+
+def test_reverse_reader_and_store_queries():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history')
+        with open(path, 'w') as f:
+            for day in range(1, 29):
+                for i in range(100):
+                    f.write(f"[2024-02-{day:02d} 10:{i // 60:02d}:{i % 60:02d}] cmd {day}-{i}\n")
+        assert list(iter_reverse_lines(path, block_size=7))[:2] == ['[2024-02-28 10:01:39] cmd 28-99',
+                                                                    '[2024-02-28 10:01:38] cmd 28-98']
+        store = HistoryStore(path)
+        assert [c for _, c in store.tail(3)] == ['cmd 28-97', 'cmd 28-98', 'cmd 28-99']
+        assert [c for _, c in store.tail(2, grep='27-5')] == ['cmd 27-58', 'cmd 27-59']
+        since = store.tail(1000, since=parse_since('2024-02-28 10:01:30'))
+        assert [c for _, c in since] == [f'cmd 28-{i}' for i in range(90, 100)]
+
+
+def test_parse_since():
+    now = time.mktime((2024, 3, 10, 12, 0, 0, 0, 0, -1))
+    assert parse_since('2h', now) == '2024-03-10 10:00:00'
+    assert parse_since('today', now) == '2024-03-10 00:00:00'
+    assert parse_since('2024-03-01', now) == '2024-03-01 00:00:00'
+    assert parse_since('2024-03-01 08:30', now) == '2024-03-01 08:30:00'
+    try:
+        parse_since('last tuesday', now)
+        assert False, "expected a parse error"
+    except ValueError:
+        pass
+
+
+def test_rotation_compresses_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history')
+        writer = HistoryWriter(path=path, flush_lines=1, fsync='never', max_bytes=2000, keep=2)
+        for i in range(200):
+            writer.log(f'command number {i}')
+        writer.close()
+        deadline = time.time() + 10
+        while any(not segment.endswith('.gz') for segment in list_segments(path)) and time.time() < deadline:
+            time.sleep(0.05)
+        segments = list_segments(path)
+        assert writer.get_status()['rotations'] >= 3
+        assert len(segments) <= 2 and all(segment.endswith('.gz') for segment in segments)
+        # Queries continue into the compressed segments
+        commands = [c for _, c in HistoryStore(path).tail(60)]
+        assert commands == [f'command number {i}' for i in range(140, 200)]
+
+
+def test_history_command_options():
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = history._writer
+        history._writer = HistoryWriter(path=os.path.join(tmp, 'history'), fsync='never')
+        try:
+            shell = Shell(Session(cwd=tmp))
+            for command in ('pwd', 'mkdir a', 'cd a', 'pwd'):
+                shell.run_command(command)
+            run = lambda command: [line.split('  ', 1)[1] for line in ANSI_ESCAPE.sub('', shell.run_command(command)).splitlines()]
+            assert run('history 3') == ['cd a', 'pwd', 'history 3']
+            assert run('history --grep "^(cd|mkdir)"') == ['mkdir a', 'cd a']
+            assert run('history --grep ^PWD -i') == ['pwd', 'pwd']
+            assert len(run('history --since 1h')) == 8
+            assert 'invalid time' in shell.run_command('history --since soon')
+        finally:
+            history._writer.close()
+            history._writer = saved
+
+
+if __name__ == "__main__":
+    test_batches_by_size_and_interval()
+    test_fsync_always_writes_immediately_and_survives_rotation()
+    test_processes_append_without_interleaving()
+    test_shell_logs_each_command_once()
+    test_reverse_reader_and_store_queries()
+    test_parse_since()
+    test_rotation_compresses_segments()
+    test_history_command_options()
+    print("All history tests passed")
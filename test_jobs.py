@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+# Test background jobs used by the /jobs endpoints
+import sys
+import os
+import tempfile
+import time
+from colorama import Fore, Style
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell, split_background
+from terminal.session import Session, SessionManager
+from terminal.jobs import Job, JobManager, job_manager, mark_streaming
+from terminal.pipeline import ANSI_ESCAPE
+
+
+def write(folder, name, code):
+    with open(os.path.join(folder, name), 'w') as f:
+        f.write(code)
+
+
+def test_job_output_can_be_polled_while_session_is_free():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'ticks.py', "import time\nfor i in range(3):\n    print('tick', i, flush=True)\n    time.sleep(0.2)\n")
+        shell = Shell(Session(cwd=tmp))
+        job = shell.start_job('python ticks.py')
+        # The shell is not blocked while the job runs
+        assert tmp in shell.run_command('pwd')
+        job.wait(0, 5)
+        first, offset = job.read(0)
+        assert first.startswith('tick 0\n')
+        assert first + ''.join(job.follow(offset)) == 'tick 0\ntick 1\ntick 2\n'
+        assert job.status == 'done' and job.elapsed() >= 0.4
+        assert job in job_manager.list(shell.session.id)
+
+
+def test_cancel_stops_a_silent_script():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'sleepy.py', "import time\ntime.sleep(30)\nprint('late')\n")
+        shell = Shell(Session(cwd=tmp))
+        job = shell.start_job('python sleepy.py')
+        while job.status == 'queued':
+            time.sleep(0.01)
+        time.sleep(0.2)
+        start = time.time()
+        assert job_manager.cancel(job.id)
+        job.join(5)
+        assert job.status == 'cancelled' and time.time() - start < 2
+        assert job.read(0)[0] == ''
+        assert not job.cancel()
+
+
+def test_output_limit_and_errors():
+    manager = JobManager(max_workers=1, output_limit=10)
+    job = manager.start('spam', iter(['0123456', '789abc', 'never']))
+    job.join(5)
+    output = job.read(0)[0]
+    assert output.startswith('0123456789\n[output limit of 10 bytes reached')
+    assert (job.status, job.reason) == ('cancelled', 'output limit')
+    # Red text alone is not a failure; the command has to report one
+    job = JobManager(max_workers=1).start('red', iter([f"{Fore.RED}looks like an error{Style.RESET_ALL}\n"]))
+    assert job.join(5) and job.status == 'done'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        job = shell.start_job('cat missing.txt')
+        job.join(5)
+        assert job.status == 'failed'
+        job = shell.start_job('ls missing')
+        assert job.join(5) and job.status == 'failed'
+        write(tmp, 'bad.py', "raise SystemExit(3)\n")
+        job = shell.start_job('python bad.py')
+        assert job.join(5) and job.status == 'failed'
+        try:
+            shell.start_job('help')
+            assert False, "built-ins cannot run as jobs"
+        except ValueError:
+            pass
+
+
+def test_output_limit_stops_a_script_without_newlines():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'flood.py', "import sys\nwhile True:\n    sys.stdout.write('x' * 65536)\n")
+        shell = Shell(Session(cwd=tmp))
+        saved = job_manager.output_limit
+        job_manager.output_limit = 256 * 1024
+        try:
+            job = shell.start_job('python --timeout 20 flood.py')
+        finally:
+            job_manager.output_limit = saved
+        assert job.join(10)
+        assert (job.status, job.reason) == ('cancelled', 'output limit')
+        assert job.to_dict()['output_bytes'] < 256 * 1024 + 200
+
+
+def ticker():
+    mark_streaming()
+    while True:
+        yield 'tick\n'
+        time.sleep(0.05)
+
+
+def test_abandoned_streaming_jobs_are_stopped():
+    manager = JobManager(max_workers=2, idle_timeout=0.3)
+    unread = manager.start('watch', ticker())
+    watched = manager.start('watch', ticker())
+    deadline = time.time() + 0.8
+    while time.time() < deadline:
+        watched.read(watched.offset)  # A client polling the job
+        time.sleep(0.05)
+    assert unread.join(5) and (unread.status, unread.reason) == ('cancelled', 'idle')
+    assert watched.status == 'running'
+    watched.cancel()
+    assert watched.join(5)
+
+    # Expiring a session cancels what it left running
+    manager = JobManager(max_workers=2, idle_timeout=0)
+    sessions = SessionManager(lambda session_id: session_id, max_sessions=1, on_expire=manager.cancel_session)
+    sessions.get('one')
+    job = manager.start('watch', ticker(), session_id='one')
+    sessions.get('two')
+    assert job.join(5) and (job.status, job.reason) == ('cancelled', 'session expired')
+
+
+def test_fg_in_the_background_skips_its_own_job():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'quick.py', "import time\ntime.sleep(0.3)\nprint('quick done')\n")
+        shell = Shell(Session(cwd=tmp))
+        lonely = shell.start_job('fg')
+        assert lonely.join(5) and lonely.status == 'failed'
+        assert 'fg: no current job' in lonely.read(0)[0]
+        quick = shell.start_job('python quick.py')
+        follower = shell.start_job('fg')
+        assert follower.join(5) and follower.status == 'done'
+        assert follower.read(0)[0] == 'quick done\n'
+        # Job ids are sequential, so this names the job that runs it
+        own = str(int(follower.id) + 1)
+        itself = shell.start_job(f'fg %{own}')
+        assert itself.id == own and itself.join(5) and itself.status == 'failed'
+        assert 'is the job running this command' in itself.read(0)[0]
+        assert quick.status == 'done'
+
+
+def test_split_background():
+    assert split_background('search x &') == ('search x', True)
+    assert split_background('tree / & ') == ('tree /', True)
+    assert split_background('pwd && ls') == ('pwd && ls', False)
+    assert split_background('echo "x &"') == ('echo "x &"', False)
+    assert split_background('echo a\\&') == ('echo a\\&', False)
+
+
+def test_ring_buffer_keeps_latest_output():
+    job = Job('1', 'spam', output_limit=10 ** 6, ring_bytes=10)
+    for i in range(10):
+        job.append(f"{i}{i}{i}\n")
+    text, offset = job.read(0)
+    assert text == "888\n999\n" and offset == 10
+    assert job.dropped(0) == 8 and job.dropped(9) == 0
+    assert job.read(9) == ("999\n", 10)
+
+
+def test_shell_job_control():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'slow.py', "import time\nprint('working', flush=True)\ntime.sleep(30)\n")
+        write(tmp, 'quick.py', "import time\ntime.sleep(0.3)\nprint('quick done')\n")
+        shell = Shell(Session(cwd=tmp))
+        run = lambda command: ANSI_ESCAPE.sub('', shell.run_command(command))
+        started = run('python slow.py &')
+        assert started.startswith('[') and started.endswith('started: python slow.py')
+        slow = started[1:started.index(']')]
+        quick = run('python quick.py &')[1:].split(']')[0]
+        listing = run('jobs')
+        assert f"[{slow}] Running" in listing or f"[{slow}] Queued" in listing
+        assert 'python quick.py' in listing
+        assert run(f'fg %{quick}') == 'quick done'
+        assert run(f'kill %{slow}') == f"[{slow}] cancelling: python slow.py"
+        assert run(f'wait %{slow}') == f"working\n[{slow}] cancelled"
+        assert 'no such job' in run('fg %999999')
+        # Jobs nobody collected are announced once at a later prompt
+        job = shell.start_job('python quick.py', notify=True)
+        job.join(5)
+        first, second = run('pwd'), run('pwd')
+        assert f"[{job.id}] Done       python quick.py" in first
+        assert '[' not in second
+
+
+if __name__ == "__main__":
+    test_job_output_can_be_polled_while_session_is_free()
+    test_cancel_stops_a_silent_script()
+    test_output_limit_and_errors()
+    test_output_limit_stops_a_script_without_newlines()
+    test_abandoned_streaming_jobs_are_stopped()
+    test_fg_in_the_background_skips_its_own_job()
+    test_split_background()
+    test_ring_buffer_keeps_latest_output()
+    test_shell_job_control()
+    print("All job tests passed")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Test ls sorting, pagination and JSON output
+import sys
+import os
+import json
+import shlex
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.commands import ls
+from terminal.session import Session
+
+
+def make_dir(tmp):
+    for i, size in enumerate([30, 10, 20]):
+        path = os.path.join(tmp, f"file{i}.txt")
+        with open(path, 'w') as f:
+            f.write('x' * size)
+        os.utime(path, (1000 + i, 1000 + i))
+    os.mkdir(os.path.join(tmp, 'sub'))
+    open(os.path.join(tmp, '.hidden'), 'w').close()
+
+
+def names(output):
+    return [line.split()[-1].rstrip('/') for line in output.splitlines() if not line.startswith('--')]
+
+
+def test_sorting_and_hidden():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_dir(tmp)
+        with Session(cwd=tmp).activate():
+            assert names(ls([])) == ['file0.txt', 'file1.txt', 'file2.txt', 'sub']
+            assert names(ls(['-r'])) == ['sub', 'file2.txt', 'file1.txt', 'file0.txt']
+            by_size = [name for name in names(ls(['--sort', 'size'])) if name != 'sub']
+            assert by_size == ['file0.txt', 'file2.txt', 'file1.txt']
+            by_mtime = [name for name in names(ls(['-t', '-r'])) if name != 'sub']
+            assert by_mtime == ['file0.txt', 'file1.txt', 'file2.txt']
+            assert '.hidden' in names(ls(['-a']))
+            assert 'invalid sort key' in ls(['--sort', 'colour'])
+
+
+def test_pagination_and_json():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_dir(tmp)
+        with Session(cwd=tmp).activate():
+            output = ls(['--limit', '2', '--offset', '1'])
+            assert names(output) == ['file1.txt', 'file2.txt']
+            assert 'next: ls --limit 2 --offset 3 --' in output
+            listing = json.loads(ls(['--json', '--limit', '2']))
+            assert listing['total'] == 4 and listing['remaining'] == 2
+            assert listing['entries'][0] == {'name': 'file0.txt', 'is_dir': False, 'size': 30, 'mtime': 1000.0}
+            # The footer keeps the path and options; following it gives the next page
+            folder = os.path.join(tmp, 'my files')
+            os.mkdir(folder)
+            make_dir(folder)
+            first = ls(['-a', '--sort', 'size', '--limit', '2', folder])
+            command = first.splitlines()[-1].split('next: ', 1)[1].rsplit(' --', 1)[0]
+            assert shlex.split(command) == ['ls', '-a', '--sort', 'size', '--limit', '2', folder, '--offset', '2']
+            assert names(ls(shlex.split(command)[1:])) == ['file2.txt', 'file1.txt']
+
+
+if __name__ == "__main__":
+    test_sorting_and_hidden()
+    test_pagination_and_json()
+    print("All ls tests passed")
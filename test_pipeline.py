@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Test pipelines, streaming filters and redirection
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session
+from terminal.pipeline import Op, parse, tokenize
+
+
+def test_tokenize_and_parse():
+    assert tokenize('echo "a | b" > out.txt') == ['echo', 'a | b', Op('>'), 'out.txt']
+    assert tokenize("cat log|grep -i 'x y'>>o") == ['cat', 'log', Op('|'), 'grep', '-i', 'x y', Op('>>'), 'o']
+    pipeline = parse('sort < in.txt | head -n 3 > out.txt')
+    assert pipeline.stages == [('sort', []), ('head', ['-n', '3'])]
+    assert (pipeline.stdin, pipeline.stdout, pipeline.append) == ('in.txt', 'out.txt', False)
+    # Plain commands keep the normal dispatch
+    assert parse('ls -l') is None
+    assert parse('head notes.txt').stages == [('head', ['notes.txt'])]
+    # Natural language is not split on operators
+    assert parse('show files > 1MB') is None and parse('list files | sorted by size') is None
+    assert parse('< in.txt sort').stages == [('sort', [])]
+
+
+def test_filters_stream_through_pipeline():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'app.log'), 'w') as f:
+            for i in range(50000):
+                f.write(f"{i} {'ERROR' if i % 5 == 0 else 'INFO'} message\n")
+        shell = Shell(Session(cwd=tmp))
+        assert shell.run_command('cat app.log | filter ERROR | head 3') == "0 ERROR message\n5 ERROR message\n10 ERROR message"
+        assert shell.run_command('cat app.log | grep -v -c ERROR') == '40000'
+        assert shell.run_command('tail -n 2 app.log') == "49998 INFO message\n49999 INFO message"
+        assert shell.run_command('head -3 app.log | sort -rn | wc -l') == '3'
+        assert shell.run_command('head -3 < app.log | sort -r | head -1') == '2 INFO message'
+
+
+def test_redirection_replaces_echo_special_case():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        assert shell.run_command('echo "hello | world" > notes.txt') == 'Content written to notes.txt'
+        assert shell.run_command('echo again >> notes.txt') == 'Content appended to notes.txt'
+        shell.run_command('pwd > where.txt')
+        with open(os.path.join(tmp, 'notes.txt')) as f:
+            assert f.read() == "hello | world\nagain\n"
+        with open(os.path.join(tmp, 'where.txt')) as f:
+            assert '\x1b' not in f.read()  # Colors are stripped from files
+
+
+def test_head_stops_upstream_early():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'forever.py'), 'w') as f:
+            f.write("import itertools\nfor i in itertools.count():\n    print(i, flush=True)\n")
+        shell = Shell(Session(cwd=tmp))
+        start = time.time()
+        assert shell.run_command('python forever.py | head 3') == "0\n1\n2"
+        assert time.time() - start < 10
+
+
+def test_pipeline_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        assert 'Unknown command: nope' in shell.run_command('pwd | nope')
+        assert 'does not read piped input' in shell.run_command('pwd | ls')
+        assert 'missing file name' in shell.run_command('pwd >')
+        assert 'missing pattern' in shell.run_command('pwd | grep')
+
+
+if __name__ == "__main__":
+    test_tokenize_and_parse()
+    test_filters_stream_through_pipeline()
+    test_redirection_replaces_echo_special_case()
+    test_head_stops_upstream_early()
+    test_pipeline_errors()
+    print("All pipeline tests passed")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+# Test structured results and the CLI/web/JSON renderers
+import sys
+import os
+import json
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.render import Column, KeyValues, RenderCache, Table, Tree, get_console, render, render_cache, sanitize, sanitize_stream, to_json
+from terminal.system_monitor import get_host_facts
+from terminal.commands import help_cmd
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def test_renderers():
+    table = Table(["NAME", Column("SIZE", style="yellow", justify="right")], [["a.txt", "1 KB"], ["bb", "10 B"]],
+                  footer="2 files")
+    assert render(table, 'web') == "NAME   SIZE\na.txt  1 KB\nbb     10 B\n2 files"
+    assert '\x1b[33m' in render(table, 'cli')
+    info = KeyValues([("OS", "Linux"), ("Python", "3.11")], title="Info")
+    assert render(info, 'web') == "Info\n\nOS:     Linux\nPython: 3.11"
+    tree = Tree("root")
+    tree.add("a").add("b")
+    tree.add("c")
+    assert render(tree, 'text') == "root\n├── a\n│   └── b\n└── c"
+    assert to_json(tree) == {'type': 'tree', 'label': 'root', 'children': [
+        {'type': 'tree', 'label': 'a', 'children': [{'type': 'tree', 'label': 'b', 'children': []}]},
+        {'type': 'tree', 'label': 'c', 'children': []}]}
+    assert sanitize('plain') == 'plain' and sanitize('\x1b[31mred\x1b[0m') == 'red'
+
+
+def test_stream_sanitizer_joins_split_escape_codes():
+    chunks = ['plain ', 'red \x1b', '[31mtext\x1b[', '0m done', ' \x1b[1;3', '2mx\x1b']
+    assert list(sanitize_stream(chunks)) == ['plain ', 'red ', 'text', ' done', ' ', 'x']
+    assert ''.join(sanitize_stream(iter(['a' * 100 + '\x1b[', '33mb']))) == 'a' * 100 + 'b'
+
+
+def test_web_sessions_get_no_escape_codes():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, 'src'))
+        with open(os.path.join(tmp, 'src', 'main.py'), 'w') as f:
+            f.write('print(1)\n')
+        web = Shell(Session(cwd=tmp, mode='web'))
+        for command in ('ls -l', 'tree', 'sysinfo', 'history 3', 'ps -n 3', 'pwd'):
+            assert '\x1b' not in web.run_command(command), command
+        assert web.run_command('tree').splitlines()[1:] == ['└── 📁 src', '    └── 📄 main.py']
+        # The CLI session renders the same results with rich and colors
+        cli = Shell(Session(cwd=tmp))
+        assert '┏' in cli.run_command('sysinfo') and '\x1b' in cli.run_command('history 3')
+
+
+def test_structured_results_for_json_clients():
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, 'notes.txt'), 'w').close()
+        shell = Shell(Session(cwd=tmp, mode='web'))
+        listing = to_json(shell.run_structured('ls -l'))
+        assert listing['type'] == 'table' and listing['columns'][1] == 'NAME'
+        assert [row[1] for row in listing['rows']] == ['notes.txt']
+        info = to_json(shell.run_structured('sysinfo'))
+        assert {'key': 'Current Directory', 'value': tmp} in info['items']
+        json.dumps(info)
+        # Plain commands and pipelines still come back as text
+        assert shell.run_structured('pwd') == f"Current directory: {tmp}"
+        assert shell.run_structured('ls -l | wc -l').strip().isdigit()
+
+
+def test_render_cache_by_mode_and_width():
+    cache = RenderCache(max_entries=2)
+    builds = []
+    build = lambda: builds.append(1) or f"text {len(builds)}"
+    assert cache.get('help', 'web', build) == cache.get('help', 'web', build) == "text 1"
+    assert cache.get('help', 'cli', build) == "text 2"
+    console = get_console()
+    saved = console.width
+    console.width = saved + 10
+    try:
+        assert cache.get('help', 'cli', build) == "text 3"  # Re-rendered for the new width
+    finally:
+        console.width = saved
+    assert cache.get_status()['entries'] == 2 and cache.get('help', 'web', build) == "text 4"
+
+
+def test_help_and_sysinfo_reuse_renders():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        for mode in ('cli', 'web'):
+            with Session(mode=mode).activate():
+                first = help_cmd([])
+                hits = render_cache.hits
+                assert help_cmd([]) == first and render_cache.hits == hits + 1
+        facts = get_host_facts()
+        # Calls between two samples reuse the render; a newer sample replaces
+        # it instead of taking more cache slots from help
+        for _ in range(5):  # Retry if the sampler ticked between the calls
+            first = shell.run_command('sysinfo')
+            hits, entries = render_cache.hits, render_cache.get_status()['entries']
+            if shell.run_command('sysinfo') == first:
+                break
+        assert render_cache.hits == hits + 1
+        assert get_host_facts() is facts and render_cache.get_status()['entries'] == entries
+        cache = RenderCache()
+        assert cache.get('sysinfo', 'web', lambda: 'old', version=1) == 'old'
+        assert cache.get('sysinfo', 'web', lambda: 'new', version=2) == 'new'
+        assert cache.get('sysinfo', 'web', lambda: 'unused', version=2) == 'new'
+        assert cache.get_status()['entries'] == 1
+        assert facts['python'] in first
+
+
+if __name__ == "__main__":
+    test_renderers()
+    test_stream_sanitizer_joins_split_escape_codes()
+    test_web_sessions_get_no_escape_codes()
+    test_structured_results_for_json_clients()
+    test_render_cache_by_mode_and_width()
+    test_help_and_sysinfo_reuse_renders()
+    print("All render tests passed")
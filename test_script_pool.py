@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+# Test the pre-warmed worker pool behind python/run
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session
+from terminal.script_pool import STDERR_TAIL_BYTES, ScriptPool, StderrTail
+from terminal.commands import _iter_process
+
+
+def write(folder, name, code):
+    path = os.path.join(folder, name)
+    with open(path, 'w') as f:
+        f.write(code)
+    return path
+
+
+def test_fresh_namespace_args_and_environment():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'helper.py', "VALUE = 42\n")
+        script = write(tmp, 'job.py', (
+            "import os, sys, helper\n"
+            "print(globals().get('seen', 'fresh'), __name__, sys.argv[1:], helper.VALUE)\n"
+            "print(os.getcwd(), os.environ.get('JOB_FLAG'))\n"
+            "seen = True\n"
+        ))
+        pool = ScriptPool(size=1)
+        try:
+            env = dict(os.environ, JOB_FLAG='on')
+            for _ in range(2):
+                output = ''.join(pool.run(script, ['a', 'b c'], cwd=tmp, env=env))
+                assert output == f"fresh __main__ ['a', 'b c'] 42\n{os.path.realpath(tmp)} on\n"
+            status = pool.get_status()
+            assert status['jobs'] == 2 and status['workers_started'] == 1 and status['idle'] == 1
+        finally:
+            pool.shutdown()
+
+
+def test_output_streams_and_errors():
+    with tempfile.TemporaryDirectory() as tmp:
+        script = write(tmp, 'slow.py', "import time, sys\nprint('first', flush=True)\ntime.sleep(1)\nsys.exit('bad')\n")
+        pool = ScriptPool(size=1)
+        try:
+            chunks = pool.run(script, cwd=tmp)
+            start = time.time()
+            assert next(chunks) == 'first\n'
+            assert time.time() - start < 0.9  # Arrived before the script finished
+            assert list(chunks) == ['Error: bad\n']
+            quiet = write(tmp, 'quiet.py', "x = 1\n")
+            assert list(pool.run(quiet, cwd=tmp)) == ['Program executed successfully']
+        finally:
+            pool.shutdown()
+
+
+def test_timeout_and_memory_limit():
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = ScriptPool(size=1, memory=256)
+        try:
+            forever = write(tmp, 'forever.py', "print('start', flush=True)\nwhile True:\n    pass\n")
+            chunks = pool.run(forever, cwd=tmp, timeout=0.5)
+            assert next(chunks) == 'start\n'
+            try:
+                list(chunks)
+                assert False, "expected a timeout"
+            except ValueError as e:
+                assert 'timed out after 0.5s' in str(e)
+            hog = write(tmp, 'hog.py', "data = bytearray(1024 * 1024 * 1024)\n")
+            assert 'MemoryError' in ''.join(pool.run(hog, cwd=tmp))
+            # The worker survives both and is reused
+            assert pool.get_status()['workers_started'] == 1
+        finally:
+            pool.shutdown()
+
+
+def test_stderr_keeps_only_its_end():
+    tail = StderrTail(limit=4)
+    tail.add(b'abc')
+    tail.add(b'defg')
+    assert tail.text() == "… 3 earlier bytes of stderr truncated …\ndefg"
+    with tempfile.TemporaryDirectory() as tmp:
+        script = write(tmp, 'noisy.py', "import sys\nsys.stderr.write('x' * 300000)\nraise SystemExit('the end')\n")
+        pool = ScriptPool(size=1)
+        try:
+            output = ''.join(pool.run(script, cwd=tmp))
+        finally:
+            pool.shutdown()
+        assert output.startswith("Error: … ") and 'truncated' in output
+        assert output.rstrip().endswith('the end') and len(output) < STDERR_TAIL_BYTES + 100
+        # The subprocess fallback keeps the same tail
+        process = subprocess.Popen([sys.executable, script], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        assert ''.join(_iter_process(process)) == output
+
+
+def test_python_command_uses_pool():
+    with tempfile.TemporaryDirectory() as tmp:
+        write(tmp, 'hello.py', "import sys\nprint('hello', *sys.argv[1:])\n")
+        shell = Shell(Session(cwd=tmp))
+        assert shell.run_command('python hello.py world') == 'hello world'
+        assert shell.run_command('run hello.py') == 'hello'
+        start = time.time()
+        for _ in range(10):
+            shell.run_command('python hello.py')
+        # Warm workers skip interpreter startup entirely
+        assert (time.time() - start) / 10 < 0.1
+        write(tmp, 'sleepy.py', "import time\ntime.sleep(5)\n")
+        assert 'timed out after 0.2s' in shell.run_command('python --timeout 0.2 sleepy.py')
+
+
+if __name__ == "__main__":
+    test_fresh_namespace_args_and_environment()
+    test_output_streams_and_errors()
+    test_timeout_and_memory_limit()
+    test_stderr_keeps_only_its_end()
+    test_python_command_uses_pool()
+    print("All script pool tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Test that shell sessions keep their own cwd instead of using os.chdir
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session, SessionManager
+
+
+def test_sessions_have_independent_cwd():
+    process_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.mkdir(os.path.join(tmp, 'a'))
+        os.mkdir(os.path.join(tmp, 'b'))
+        first = Shell(Session(cwd=tmp))
+        second = Shell(Session(cwd=tmp))
+
+        first.run_command('cd a')
+        second.run_command('cd b')
+        first.run_command('touch one.txt')
+        second.run_command('write two.txt "hello"')
+
+        assert first.session.cwd == os.path.join(tmp, 'a')
+        assert second.session.cwd == os.path.join(tmp, 'b')
+        assert os.path.exists(os.path.join(tmp, 'a', 'one.txt'))
+        assert second.run_command('cat two.txt') == 'hello'
+        assert 'one.txt' in first.run_command('ls')
+        assert 'one.txt' not in second.run_command('ls')
+        assert 'cd b' in second.session.history
+    assert os.getcwd() == process_cwd
+
+
+def test_cd_errors_leave_cwd_unchanged():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        assert 'ERROR' in shell.run_command('cd missing')
+        assert shell.session.cwd == tmp
+
+
+def test_session_manager_reuses_and_expires():
+    manager = SessionManager(lambda session_id: Session(session_id=session_id), idle_timeout=3600, max_sessions=2)
+    first = manager.get('one')
+    assert manager.get('one') is first
+    manager.get('two')
+    manager.get('three')
+    assert len(manager) == 2
+    assert manager.get('one') is not first
+
+
+if __name__ == "__main__":
+    test_sessions_have_independent_cwd()
+    test_cd_errors_leave_cwd_unchanged()
+    test_session_manager_reuses_and_expires()
+    print("All session tests passed")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+# Test that CLI startup does not import the heavy optional dependencies
+import sys
+import os
+import subprocess
+sys.path.append(os.path.dirname(__file__))
+
+from utils.startup_profile import parse_importtime, summarize
+
+HEAVY = ['rich', 'psutil', 'google.generativeai', 'dotenv']
+
+
+def test_shell_import_is_lazy():
+    code = ("import sys, terminal.shell; "
+            f"print([m for m in {HEAVY!r} if m in sys.modules])")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert result.stdout.strip() == '[]', result.stdout + result.stderr
+
+
+def test_importtime_summary():
+    stderr = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       100 |        100 |   json.decoder\n"
+              "import time:       300 |        400 | json\n")
+    records = parse_importtime(stderr)
+    assert records == [('json.decoder', 100, 100, 1), ('json', 300, 400, 0)]
+    assert '0.4 ms total' in summarize(records)
+
+
+if __name__ == "__main__":
+    test_shell_import_is_lazy()
+    test_importtime_summary()
+    print("All startup tests passed")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+# Test that commands stream their output in chunks instead of buffering it
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def test_cat_streams_in_chunks():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'big.txt'), 'w') as f:
+            f.write('x' * 200_000)
+        shell = Shell(Session(cwd=tmp))
+        chunks = list(shell.stream_command('cat big.txt'))
+        assert len(chunks) > 1
+        assert ''.join(chunks) == 'x' * 200_000 + '\n'
+        assert shell.run_command('cat big.txt') == 'x' * 200_000
+
+
+def test_python_output_streams_line_by_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, 'hello.py'), 'w') as f:
+            f.write("import sys\nprint('one')\nprint('two')\nprint('oops', file=sys.stderr)\n")
+        shell = Shell(Session(cwd=tmp))
+        chunks = list(shell.stream_command('python hello.py'))
+        assert chunks[:2] == ['one\n', 'two\n']
+        assert chunks[2].startswith('Error: oops')
+
+
+def test_errors_and_builtins_still_reported():
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp))
+        assert 'Error' in ''.join(shell.stream_command('cat missing.txt'))
+        assert 'Documented commands' in ''.join(shell.stream_command('help'))
+
+
+if __name__ == "__main__":
+    test_cat_streams_in_chunks()
+    test_python_output_streams_line_by_line()
+    test_errors_and_builtins_still_reported()
+    print("All streaming tests passed")
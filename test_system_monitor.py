@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+# Test the background metrics sampler used by cpu/mem/sysinfo
+import sys
+import os
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.system_monitor import MetricsSampler, ProcessTable, cpu, mem, format_window, ps, top, process_table
+from terminal.render import render
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def test_sampler_window_stats():
+    sampler = MetricsSampler(interval=60, history=10)
+    now = time.time()
+    for age, value in [(120, 90.0), (2, 10.0), (1, 20.0), (0, 30.0)]:
+        sampler.samples.append({'time': now - age, 'cpu': value})
+    sampler._ready.set()
+    try:
+        stats = sampler.stats('cpu', 60)
+        assert stats == {'min': 10.0, 'avg': 20.0, 'max': 30.0, 'count': 3}
+    finally:
+        sampler.stop()
+
+
+def test_ring_buffer_is_bounded():
+    sampler = MetricsSampler(interval=0.01, history=5)
+    for _ in range(20):
+        sampler.sample_once()
+    assert len(sampler.samples) == 5
+
+
+def test_commands_answer_from_sampler():
+    start = time.time()
+    cpu()
+    assert time.time() - start < 2.5
+    start = time.time()
+    assert cpu().startswith("CPU Usage:")
+    assert mem().startswith("Memory Usage:")
+    assert time.time() - start < 0.1
+    assert "min" in cpu(['--window', '60'])
+    assert format_window("CPU Usage", None, 5) == "CPU Usage: no samples in the last 5s"
+
+
+def test_process_snapshot_is_cached_and_measures_cpu():
+    import psutil
+    from terminal import system_monitor
+    table = ProcessTable(ttl=60)
+    first = table.snapshot()
+    assert table.snapshot() is first and table.refreshes == 1
+
+    class FakeClock:
+        now = time.monotonic() + 1
+
+        def monotonic(self):
+            return self.now
+
+        def __getattr__(self, name):
+            return getattr(time, name)
+
+    class FakeProcess:
+        def __init__(self, pid, cpu_seconds):
+            self.info = {'pid': pid, 'name': f'p{pid}', 'username': 'me', 'memory_info': None, 'num_threads': 1,
+                         'create_time': 0.0, 'status': 'running',
+                         'cpu_times': SimpleNamespace(user=cpu_seconds, system=0.0)}
+
+    used = {1: 5.0, 2: 7.0}
+    clock = FakeClock()
+    process_iter = psutil.process_iter
+    psutil.process_iter = lambda attrs: [FakeProcess(pid, seconds) for pid, seconds in used.items()]
+    system_monitor.time = clock
+    try:
+        table.ttl = 0
+        table.snapshot()
+        # Two seconds later pid 1 used one more second of CPU, pid 2 none
+        clock.now += 2
+        used[1] += 1.0
+        rows = {row['pid']: row['cpu'] for row in table.snapshot()}
+        assert rows == {1: 50.0, 2: 0.0} and table.refreshes == 3
+    finally:
+        psutil.process_iter = process_iter
+        system_monitor.time = time
+
+
+def test_process_queries():
+    table = ProcessTable(ttl=60)
+    rows, matched = table.query(sort='rss', limit=3)
+    assert len(rows) == 3 and matched == len(table.snapshot())
+    assert [row['rss'] for row in rows] == sorted((row['rss'] for row in table.snapshot()), reverse=True)[:3]
+    rows, _ = table.query(sort='pid', reverse=True, limit=2)
+    assert rows[0]['pid'] > rows[1]['pid']
+    mine = table.query(name='python', user=table.query(name='python')[0][0]['user'])[0]
+    assert os.getpid() in [row['pid'] for row in mine]
+    assert 'python' in table.cmdline(next(row for row in mine if row['pid'] == os.getpid()))
+
+
+def test_command_lines_are_one_bounded_row():
+    class FakeProcess:
+        def __init__(self, argv):
+            self.argv = argv
+
+        def cmdline(self):
+            return self.argv
+
+    table = ProcessTable(ttl=60, cmd_width=20)
+    row = {'key': (1, 0.0), 'name': 'python', 'proc': FakeProcess(['python', '-c', 'print(1)\nprint(2)\tx' + 'a' * 400])}
+    assert table.cmdline(row) == 'python -c print(1) …'
+    assert len(table.cmdline(row)) == 20
+    empty = {'key': (2, 0.0), 'name': 'kthreadd', 'proc': FakeProcess([])}
+    assert table.cmdline(empty) == '[kthreadd]'
+
+
+def test_ps_and_top_output():
+    lines = render(ps(['-o', 'cmd,pid', '--name', 'python', '-n', '0']), 'text').splitlines()
+    assert lines[0].split() == ['PID', 'COMMAND']
+    assert any(line.split(None, 1)[0] == str(os.getpid()) for line in lines[1:])
+    lines = render(ps(['-n', '1']), 'text').splitlines()
+    assert len(lines) == 3 and lines[-1].startswith('... ')
+    output = Shell(Session(mode='web')).run_command('top').splitlines()
+    assert output[0].startswith('Tasks: ') and output[1].split()[:3] == ['PID', 'USER', '%CPU']
+    for bad in (['--sort', 'cmd'], ['-o', 'pid,colour'], ['-n', 'ten'], ['--bogus']):
+        try:
+            ps(bad)
+            assert False, f"expected an error for {bad}"
+        except ValueError:
+            pass
+    assert process_table.refreshes >= 1
+
+
+if __name__ == "__main__":
+    test_sampler_window_stats()
+    test_ring_buffer_is_bounded()
+    test_commands_answer_from_sampler()
+    test_process_snapshot_is_cached_and_measures_cpu()
+    test_process_queries()
+    test_command_lines_are_one_bounded_row()
+    test_ps_and_top_output()
+    print("All system monitor tests passed")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# Test the parallel directory walker used by search and tree
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.walker import walk
+from terminal.shell import Shell
+from terminal.session import Session
+
+
+def make_tree(tmp):
+    for d in ['a/b/c', 'a/.hidden', 'node_modules/pkg']:
+        os.makedirs(os.path.join(tmp, d))
+    for f in ['top.py', 'a/one.py', 'a/b/two.py', 'a/b/c/three.py', 'a/.hidden/secret.py', 'node_modules/pkg/x.py']:
+        open(os.path.join(tmp, f), 'w').close()
+
+
+def test_walk_matches_os_walk():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        expected = set()
+        for root, dirs, files in os.walk(tmp):
+            expected.update(os.path.join(root, name) for name in dirs + files)
+        assert {e.path for e in walk(tmp, workers=4)} == expected
+
+
+def test_walk_limits():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        shallow = {os.path.relpath(e.path, tmp) for e in walk(tmp, max_depth=1)}
+        assert shallow == {'a', 'node_modules', 'top.py'}
+        visible = {e.name for e in walk(tmp, include_hidden=False, exclude=['node_modules'])}
+        assert '.hidden' not in visible and 'secret.py' not in visible and 'x.py' not in visible
+        assert len(list(walk(tmp, match=lambda e: e.name.endswith('.py'), max_results=2))) == 2
+
+
+def test_search_and_tree_use_walker():
+    with tempfile.TemporaryDirectory() as tmp:
+        make_tree(tmp)
+        shell = Shell(Session(cwd=tmp))
+        assert 'Found 6 matches' in shell.run_command('search *.py --no-index')
+        assert 'Found 5 matches' in shell.run_command('search *.py --no-index --exclude node_modules')
+        assert 'Found 1 matches' in shell.run_command('search *.py --no-index --depth 1')
+        output = shell.run_command('tree')
+        assert 'two.py' in output and 'three.py' not in output and 'secret.py' not in output
+        assert 'three.py' in shell.run_command('tree -L 4')
+        assert 'tree:' in shell.run_command('tree missing')
+        # Three entries at depth 1: --max 3 shows them all, --max 2 is cut short
+        assert 'stopped after' not in shell.run_command('tree -L 1 --max 3')
+        assert 'stopped after 2 entries' in shell.run_command('tree -L 1 --max 2')
+
+
+if __name__ == "__main__":
+    test_walk_matches_os_walk()
+    test_walk_limits()
+    test_search_and_tree_use_walker()
+    print("All walker tests passed")
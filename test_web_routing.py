@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# Test how the browser routes command lines (static/terminal.js) and what the server does with them
+import sys
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+sys.path.append(os.path.dirname(__file__))
+
+from terminal.shell import Shell, split_command_chain
+from terminal.session import Session
+from terminal.pipeline import ANSI_ESCAPE
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'terminal.js')
+
+
+def js_routes(commands):
+    """Run routeCommand from terminal.js under node; None when node is not installed"""
+    if shutil.which('node') is None:
+        return None
+    with open(SCRIPT, encoding='utf-8') as f:
+        source = f.read()
+    # The routing helpers sit between the globals and the DOMContentLoaded handler
+    helpers = source[source.index('// Shell operators'):source.index("document.addEventListener('DOMContentLoaded'")]
+    program = helpers + f"\nconsole.log(JSON.stringify({json.dumps(commands)}.map(routeCommand)));\n"
+    result = subprocess.run(['node', '-e', program], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_chains_go_to_the_batch_endpoint():
+    routes = js_routes(['ls; pwd', 'ls -l && pwd', 'ls', 'python a.py', 'pwd'])
+    if routes is not None:
+        assert routes == ['batch', 'batch', 'listing', 'job', 'stream']
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, 'a.py'), 'w').close()
+        shell = Shell(Session(cwd=tmp, mode='web'))
+        results = shell.run_batch(split_command_chain('ls; pwd'))
+        assert [r['status'] for r in results] == ['ok', 'ok']
+        assert 'a.py' in ANSI_ESCAPE.sub('', results[0]['output'])
+
+
+def test_ls_pipes_and_redirects_stream_as_text():
+    routes = js_routes(['ls | grep py', 'ls > out.txt', 'ls >> out.txt', 'ls < x', 'ls "a|b"', "echo 'a; b'"])
+    if routes is not None:
+        assert routes == ['stream', 'stream', 'stream', 'stream', 'listing', 'stream']
+    with tempfile.TemporaryDirectory() as tmp:
+        open(os.path.join(tmp, 'a.py'), 'w').close()
+        shell = Shell(Session(cwd=tmp, mode='web'))
+        assert ANSI_ESCAPE.sub('', shell.run_command('ls | grep py')).strip().endswith('a.py')
+        shell.run_command('ls > out.txt')
+        with open(os.path.join(tmp, 'out.txt')) as f:
+            assert 'a.py' in f.read() and not os.path.exists(os.path.join(tmp, '--json'))
+
+
+def test_background_ls_starts_a_job():
+    routes = js_routes(['ls -l &', 'ls &', 'python a.py &'])
+    if routes is not None:
+        assert routes == ['stream', 'stream', 'stream']
+    with tempfile.TemporaryDirectory() as tmp:
+        shell = Shell(Session(cwd=tmp, mode='web'))
+        assert 'started: ls -l' in shell.run_command('ls -l &')
+        assert not os.path.exists(os.path.join(tmp, '--json'))
+
+
+if __name__ == "__main__":
+    test_chains_go_to_the_batch_endpoint()
+    test_ls_pipes_and_redirects_stream_as_text()
+    test_background_ls_starts_a_job()
+    print("All web routing tests passed")
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for the natural-language rule matcher.
+
+Run with ``python -m utils.nl_benchmark [--size N] [--repeat R]``. It times
+``engine.match`` over the phrases in ``test_file_commands.py`` and a
+seeded synthetic corpus; phrases the rules don't handle count as misses
+(they would go to the AI model, which is not called here).
+"""
+import argparse
+import ast
+import os
+import random
+import time
+
+from terminal.nl_rules import engine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Word pool for the synthetic corpus: rule keywords mixed with filler
+VOCABULARY = [
+    'create', 'make', 'a', 'new', 'file', 'folder', 'move', 'it', 'into', 'and', 'called',
+    'named', 'clear', 'the', 'terminal', 'screen', 'write', 'code', 'in', 'execute', 'run',
+    'show', 'python', 'all', 'list', 'find', 'files', 'main.py', 'static', 'notes.txt',
+    'please', 'what', 'is', 'here', 'disk', 'usage', 'me', 'my', 'project',
+]
+
+
+def load_phrases(path=None):
+    """Return the string test cases listed in test_file_commands.py"""
+    path = path or os.path.join(ROOT, 'test_file_commands.py')
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    phrases = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and any(getattr(t, 'id', None) == 'test_cases' for t in node.targets):
+            phrases.extend(ast.literal_eval(node.value))
+    return phrases
+
+
+def synthetic_corpus(size=10000, seed=0):
+    """Return ``size`` random phrases of 1-12 words drawn from VOCABULARY"""
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(VOCABULARY) for _ in range(rng.randint(1, 12))) for _ in range(size)]
+
+
+def run_benchmark(phrases, repeat=5):
+    """Match every phrase ``repeat`` times and return throughput figures"""
+    matched = 0
+    best = None
+    for _ in range(repeat):
+        hits = 0
+        start = time.perf_counter()
+        for phrase in phrases:
+            try:
+                if engine.match(phrase) is not None:
+                    hits += 1
+            except (IndexError, ValueError):
+                pass  # Malformed phrases some rules reject the same way the old chain did
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        matched = hits
+    return {
+        'phrases': len(phrases),
+        'matched': matched,
+        'seconds': best,
+        'per_second': len(phrases) / best if best else float('inf'),
+        'us_per_phrase': best / len(phrases) * 1e6 if phrases else 0.0,
+    }
+
+
+def format_result(name, result):
+    return (f"{name:<12} {result['phrases']:>8} phrases  {result['matched']:>8} matched  "
+            f"{result['per_second']:>12,.0f}/s  {result['us_per_phrase']:>8.2f} us/phrase")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the natural-language rule matcher')
+    parser.add_argument('--size', type=int, default=50000, help='Synthetic corpus size')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per corpus (best is reported)')
+    args = parser.parse_args(argv)
+
+    print(format_result('test cases', run_benchmark(load_phrases(), args.repeat)))
+    print(format_result('synthetic', run_benchmark(synthetic_corpus(args.size), args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Startup import-time profiling for ``main.py --profile-startup``.
+"""
+import os
+import subprocess
+import sys
+
+
+def parse_importtime(stderr):
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) tuples"""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return records
+
+
+def summarize(records, top=15):
+    """Group self time by top-level package and format a report"""
+    packages = {}
+    for name, self_us, _, _ in records:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    total = sum(packages.values())
+
+    lines = [f"Startup imports: {len(records)} modules, {total / 1000:.1f} ms total", ""]
+    lines.append(f"{'Package':<30} {'Self (ms)':>10} {'Share':>7}")
+    lines.append("=" * 49)
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        share = self_us / total * 100 if total else 0
+        lines.append(f"{package:<30} {self_us / 1000:>10.1f} {share:>6.1f}%")
+
+    # Direct imports of the profiled module, by cumulative time
+    lines += ["", f"{'Direct import':<30} {'Cumulative (ms)':>16}", "=" * 49]
+    direct = [r for r in records if r[3] == 1]
+    for name, _, cumulative_us, _ in sorted(direct, key=lambda r: -r[2])[:top]:
+        lines.append(f"{name:<30} {cumulative_us / 1000:>16.1f}")
+    return '\n'.join(lines)
+
+
+def profile_startup(mode='cli'):
+    """Import what ``main.py --mode <mode>`` imports in a fresh interpreter and summarize"""
+    statement = 'import terminal.shell'
+    if mode == 'web':
+        statement += '; import flask'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if result.returncode != 0:
+        return f"Startup profiling failed:\n{result.stderr.strip()}"
+    records = parse_importtime(result.stderr)
+    # Drop the interpreter's own startup (everything up to and including site)
+    site = [i for i, r in enumerate(records) if r[0] == 'site' and r[3] == 0]
+    if site:
+        records = records[site[-1] + 1:]
+    return summarize(records)